@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import base64
 import calendar
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -7,6 +8,7 @@ from html import unescape
 from typing import Any
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse, parse_qsl, urlsplit, urlunsplit
 import hashlib
+import json
 import re
 
 import feedparser
@@ -335,27 +337,7 @@ def get_project_podcast_image_prompt(project_id: str) -> str | None:
 
 def resolve_project_id_for_post(post_id: str) -> str | None:
     sb = get_supabase()
-    usage = (
-        sb.table("article_usage")
-        .select("article_id")
-        .eq("post_id", post_id)
-        .limit(1)
-        .execute()
-    )
-    usage_rows = usage.data or []
-    if not usage_rows:
-        return None
-    article_id = usage_rows[0].get("article_id")
-    if not article_id:
-        return None
-    article = (
-        sb.table("articles")
-        .select("project_id")
-        .eq("id", article_id)
-        .limit(1)
-        .execute()
-    )
-    rows = article.data or []
+    rows = sb.table("posts").select("project_id").eq("id", post_id).limit(1).execute().data or []
     if not rows:
         return None
     return rows[0].get("project_id")
@@ -434,42 +416,115 @@ def list_source_items(source_id: str, limit: int = 10) -> list[dict]:
     return res.data or []
 
 
+_ARTICLE_COLUMNS = (
+    "id, title, judge_score, scraped_at, processed, scored, unusable, unusable_reason, duplicate_of"
+)
+_COUNT_MODES = {"exact", "planned", "estimated"}
+
+
+def _article_sort_keys(order_by: str, desc: bool) -> list[tuple[str, bool]]:
+    # (column, descending); nulls always sort last. id breaks ties so keyset
+    # cursors are unambiguous.
+    if order_by == "age":
+        return [("scraped_at", desc), ("id", desc)]
+    if order_by == "status":
+        return [
+            ("unusable", False),
+            ("scored", True),
+            ("processed", True),
+            ("scraped_at", True),
+            ("id", True),
+        ]
+    return [("judge_score", desc), ("scraped_at", True), ("id", True)]
+
+
+def _cursor_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    # Quote so timestamps (":" and ".") survive PostgREST's logic-tree parser.
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _keyset_filter(keys: list[tuple[str, bool]], values: list[Any]) -> str | None:
+    # Lexicographic "comes after" over the sort keys, with NULLs ordered last.
+    terms: list[str] = []
+    equal: list[str] = []
+    for (column, desc), value in zip(keys, values):
+        if value is not None:
+            op = "lt" if desc else "gt"
+            after = [f"{column}.{op}.{_cursor_value(value)}"]
+            if column != "id":
+                after.append(f"{column}.is.null")
+            for cond in after:
+                terms.append(f"and({','.join(equal + [cond])})" if equal else cond)
+            equal.append(f"{column}.eq.{_cursor_value(value)}")
+        else:
+            equal.append(f"{column}.is.null")
+    if not terms:
+        return None
+    return ",".join(terms)
+
+
+def encode_articles_cursor(order_by: str, desc: bool, row: dict) -> str:
+    keys = _article_sort_keys(order_by, desc)
+    payload = {"o": order_by, "d": desc, "v": [row.get(column) for column, _ in keys]}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_articles_cursor(cursor: str, order_by: str, desc: bool) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["v"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if payload.get("o") != order_by or payload.get("d") != desc:
+        raise ValueError("Cursor does not match order_by/direction")
+    if len(values) != len(_article_sort_keys(order_by, desc)):
+        raise ValueError("Invalid cursor")
+    return values
+
+
 def list_articles_page(
     project_id: str,
     limit: int = 50,
     offset: int = 0,
     order_by: str = "score",
     direction: str = "desc",
+    cursor: str | None = None,
+    count: str | None = "exact",
 ) -> dict:
     sb = get_supabase()
-    query = (
-        sb.table("articles")
-        .select(
-            "id, title, judge_score, scraped_at, processed, scored, unusable, unusable_reason, duplicate_of",
-            count="exact",
-        )
-        .eq("project_id", project_id)
-    )
     order_by = (order_by or "score").lower()
+    if order_by not in ("score", "age", "status"):
+        order_by = "score"
     direction = (direction or "desc").lower()
     desc = direction != "asc"
-    if order_by == "age":
-        query = query.order("scraped_at", desc=desc)
-    elif order_by == "status":
-        query = (
-            query.order("unusable", desc=False)
-            .order("scored", desc=True)
-            .order("processed", desc=True)
-            .order("scraped_at", desc=True)
-        )
+    keys = _article_sort_keys(order_by, desc)
+
+    # Counting is only worth it for the first page; later pages reuse the client's total.
+    count_mode = (count or "").lower()
+    with_count = count_mode in _COUNT_MODES and not cursor
+    query = sb.table("articles").select(_ARTICLE_COLUMNS, count=count_mode if with_count else None)
+    query = query.eq("project_id", project_id)
+    if cursor:
+        keyset = _keyset_filter(keys, _decode_articles_cursor(cursor, order_by, desc))
+        if keyset is None:
+            return {"items": [], "total": None, "next_cursor": None}
+        query = query.or_(keyset)
+    for column, column_desc in keys:
+        query = query.order(column, desc=column_desc, nullsfirst=False)
+    if cursor:
+        query = query.limit(limit)
     else:
-        query = query.order("judge_score", desc=desc, nullsfirst=False).order("scraped_at", desc=True)
-    query = query.range(offset, offset + limit - 1)
+        query = query.range(offset, offset + limit - 1)
     resp = query.execute()
     items = resp.data or []
-    total = resp.count or 0
+    total = resp.count if with_count else None
+    next_cursor = encode_articles_cursor(order_by, desc, items[-1]) if len(items) == limit else None
     if not items:
-        return {"items": [], "total": total}
+        return {"items": [], "total": (total or 0) if with_count else None, "next_cursor": None}
     article_ids = [i["id"] for i in items]
     usage = (
         sb.table("article_usage")
@@ -483,71 +538,101 @@ def list_articles_page(
     used_ids = {u["article_id"] for u in usage if u.get("article_id")}
     for item in items:
         item["used_in_audio"] = item["id"] in used_ids
-    return {"items": items, "total": total}
+    return {"items": items, "total": total, "next_cursor": next_cursor}
 
 
 def _chunked(values: list[str], size: int = 200) -> list[list[str]]:
     return [values[i : i + size] for i in range(0, len(values), size)]
 
 
-def project_stats(project_id: str) -> dict:
+def _source_stats_rpc(project_id: str) -> dict[str, tuple[int, int, float | None]] | None:
     sb = get_supabase()
+    try:
+        resp = sb.rpc("project_source_stats", {"p_project_id": project_id}).execute()
+    except Exception as exc:
+        print(f"project_source_stats_rpc_failed project_id={project_id} error={exc}")
+        return None
+    counts: dict[str, tuple[int, int, float | None]] = {}
+    for row in resp.data or []:
+        if not row.get("source_id"):
+            continue
+        avg_score = row.get("avg_score")
+        counts[row["source_id"]] = (
+            int(row.get("total_articles") or 0),
+            int(row.get("used_in_audio") or 0),
+            round(float(avg_score), 2) if avg_score is not None else None,
+        )
+    return counts
+
+
+def _source_stats_scan(project_id: str, source_id: str) -> tuple[int, int, float | None]:
+    # Fallback for databases without the project_source_stats function.
+    sb = get_supabase()
+    total = (
+        sb.table("articles")
+        .select("id", count="exact")
+        .eq("project_id", project_id)
+        .eq("source_id", source_id)
+        .execute()
+        .count
+        or 0
+    )
+    used = 0
+    avg_score = None
+    if total:
+        score_sum = 0
+        score_count = 0
+        offset = 0
+        page_size = 1000
+        ids = []
+        while True:
+            page = (
+                sb.table("articles")
+                .select("id, judge_score")
+                .eq("project_id", project_id)
+                .eq("source_id", source_id)
+                .range(offset, offset + page_size - 1)
+                .execute()
+                .data
+                or []
+            )
+            if not page:
+                break
+            for row in page:
+                if row.get("id"):
+                    ids.append(row["id"])
+                if row.get("judge_score") is not None:
+                    score_sum += row["judge_score"]
+                    score_count += 1
+            offset += page_size
+            if len(page) < page_size:
+                break
+        if score_count:
+            avg_score = round(score_sum / score_count, 2)
+        if ids:
+            for chunk in _chunked(ids, size=200):
+                used += (
+                    sb.table("article_usage")
+                    .select("id", count="exact")
+                    .in_("article_id", chunk)
+                    .eq("usage_type", "audio_roundup")
+                    .execute()
+                    .count
+                    or 0
+                )
+    return total, used, avg_score
+
+
+def project_stats(project_id: str) -> dict:
     sources = list_sources(project_id)
+    counts = _source_stats_rpc(project_id)
     stats = []
     for source in sources:
         source_id = source.get("id")
-        total = (
-            sb.table("articles")
-            .select("id", count="exact")
-            .eq("project_id", project_id)
-            .eq("source_id", source_id)
-            .execute()
-            .count
-            or 0
-        )
-        used = 0
-        avg_score = None
-        if total:
-            score_sum = 0
-            score_count = 0
-            offset = 0
-            page_size = 1000
-            ids = []
-            while True:
-                page = (
-                    sb.table("articles")
-                    .select("id, judge_score")
-                    .eq("project_id", project_id)
-                    .eq("source_id", source_id)
-                    .range(offset, offset + page_size - 1)
-                    .execute()
-                    .data
-                    or []
-                )
-                if not page:
-                    break
-                for row in page:
-                    if row.get("id"):
-                        ids.append(row["id"])
-                    if row.get("judge_score") is not None:
-                        score_sum += row["judge_score"]
-                        score_count += 1
-                offset += page_size
-                if len(page) < page_size:
-                    break
-            if score_count:
-                avg_score = round(score_sum / score_count, 2)
-            if ids:
-                for chunk in _chunked(ids, size=200):
-                    used += (
-                        sb.table("article_usage")
-                        .select("id", count="exact")
-                        .in_("article_id", chunk)
-                        .eq("usage_type", "audio_roundup")
-                        .execute()
-                        .count
-                        or 0
-                    )
+        if counts is not None:
+            total, used, avg_score = counts.get(source_id, (0, 0, None))
+        else:
+            total, used, avg_score = _source_stats_scan(project_id, source_id)
         hitrate = round((used / total) * 100, 1) if total else 0.0
         stats.append(
             {
@@ -1,8 +1,6 @@
 import re
 from html import unescape
 
-import trafilatura
-
 from app.ai.openai_client import OpenAIClient
 from app.config import get_settings
 
@@ -23,6 +21,8 @@ def _strip_html(text: str) -> str:
 def _extract_main_content(raw_html: str) -> str:
     if not raw_html:
         return ""
+    import trafilatura
+
     extracted = trafilatura.extract(raw_html, include_comments=False, include_tables=False)
     if extracted:
         return extracted.strip()
@@ -19,6 +19,13 @@ class Settings(BaseModel):
     manual_intake_script: str = "scripts/extract_text.py"
     manual_intake_dir: str | None = None
     max_words: int = 2500
+    extractor_workers: int = 2
+    extractor_memory_mb: int = 1536
+    extractor_timeout_seconds: int = 300
+    extractor_page_workers: int = 2
+    intake_insert_batch: int = 50
+    scheduler_max_workers: int = 4
+    lock_ttl_seconds: int = 300
     request_timeout: int = 30
     extraction_max_chars: int = 20000
     extraction_use_llm: bool = True
@@ -35,6 +42,9 @@ class Settings(BaseModel):
     audio_roundup_voice_b: str = "nova"
     media_output_dir: str = "media_out"
     ffmpeg_path: str | None = None
+    ffmpeg_max_jobs: int = 0
+    ffmpeg_nice: int = 10
+    ffmpeg_timeout_seconds: int = 3600
     tts_provider: str = "openai"
     tts_model: str = "gpt-4o-mini-tts"
     tts_max_chars: int = 3500
@@ -44,10 +54,13 @@ class Settings(BaseModel):
     asr_model: str = "whisper-1"
     image_model: str = "gpt-image-1"
     enable_image_generation: bool = False
+    image_generation_workers: int = 4
+    image_generation_retries: int = 2
     image_caption_model: str = "gpt-4o-mini"
     enable_image_caption: bool = False
     enable_tts: bool = False
     enable_asr: bool = False
+    caption_alignment: str = "energy"
     user_agent: str = (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -57,12 +70,19 @@ class Settings(BaseModel):
     youtube_client_secret: str | None = None
     youtube_token_uri: str = "https://oauth2.googleapis.com/token"
     youtube_privacy_status: str = "public"
+    youtube_upload_chunk_mb: int = 16
     podcast_subscribe_url: str | None = None
     r2_access_key_id: str | None = None
     r2_secret_access_key: str | None = None
     r2_bucket: str | None = None
     r2_endpoint: str | None = None
     r2_public_base_url: str | None = None
+    r2_upload_concurrency: int = 8
+    r2_multipart_chunk_mb: int = 8
+    podcast_publish_workers: int = 3
+    podcast_publish_deadline_seconds: int = 1800
+    stats_cache_ttl_seconds: int = 60
+    stats_cache_stale_seconds: int = 3600
 
 
 @lru_cache(maxsize=1)
@@ -85,6 +105,13 @@ def get_settings() -> Settings:
         manual_intake_script=os.environ.get("MANUAL_INTAKE_SCRIPT", "scripts/extract_text.py"),
         manual_intake_dir=os.environ.get("MANUAL_INTAKE_DIR"),
         max_words=int(os.environ.get("MAX_WORDS", "2500")),
+        extractor_workers=int(os.environ.get("EXTRACTOR_WORKERS", "2")),
+        extractor_memory_mb=int(os.environ.get("EXTRACTOR_MEMORY_MB", "1536")),
+        extractor_timeout_seconds=int(os.environ.get("EXTRACTOR_TIMEOUT_SECONDS", "300")),
+        extractor_page_workers=int(os.environ.get("EXTRACTOR_PAGE_WORKERS", "2")),
+        intake_insert_batch=int(os.environ.get("INTAKE_INSERT_BATCH", "50")),
+        scheduler_max_workers=int(os.environ.get("SCHEDULER_MAX_WORKERS", "4")),
+        lock_ttl_seconds=int(os.environ.get("LOCK_TTL_SECONDS", "300")),
         request_timeout=int(os.environ.get("REQUEST_TIMEOUT", "30")),
         extraction_max_chars=int(os.environ.get("EXTRACTION_MAX_CHARS", "20000")),
         extraction_use_llm=os.environ.get("EXTRACTION_USE_LLM", "true").lower()
@@ -106,6 +133,9 @@ def get_settings() -> Settings:
         audio_roundup_voice_b=os.environ.get("AUDIO_ROUNDUP_VOICE_B", "nova"),
         media_output_dir=os.environ.get("MEDIA_OUTPUT_DIR", "media_out"),
         ffmpeg_path=os.environ.get("FFMPEG_PATH"),
+        ffmpeg_max_jobs=int(os.environ.get("FFMPEG_MAX_JOBS", "0")),
+        ffmpeg_nice=int(os.environ.get("FFMPEG_NICE", "10")),
+        ffmpeg_timeout_seconds=int(os.environ.get("FFMPEG_TIMEOUT_SECONDS", "3600")),
         tts_provider=tts_provider,
         tts_model=os.environ.get("TTS_MODEL", "gpt-4o-mini-tts"),
         tts_max_chars=tts_max_chars,
@@ -116,19 +146,29 @@ def get_settings() -> Settings:
         image_model=os.environ.get("IMAGE_MODEL", "gpt-image-1"),
         enable_image_generation=os.environ.get("ENABLE_IMAGE_GENERATION", "false").lower()
         in ("1", "true", "yes"),
+        image_generation_workers=int(os.environ.get("IMAGE_GENERATION_WORKERS", "4")),
+        image_generation_retries=int(os.environ.get("IMAGE_GENERATION_RETRIES", "2")),
         image_caption_model=os.environ.get("IMAGE_CAPTION_MODEL", "gpt-4o-mini"),
         enable_image_caption=os.environ.get("ENABLE_IMAGE_CAPTION", "false").lower()
         in ("1", "true", "yes"),
         enable_tts=os.environ.get("ENABLE_TTS", "false").lower() in ("1", "true", "yes"),
         enable_asr=os.environ.get("ENABLE_ASR", "false").lower() in ("1", "true", "yes"),
+        caption_alignment=os.environ.get("CAPTION_ALIGNMENT", "energy"),
         youtube_client_id=os.environ.get("YOUTUBE_CLIENT_ID"),
         youtube_client_secret=os.environ.get("YOUTUBE_CLIENT_SECRET"),
         youtube_token_uri=os.environ.get("YOUTUBE_TOKEN_URI", "https://oauth2.googleapis.com/token"),
         youtube_privacy_status=os.environ.get("YOUTUBE_PRIVACY_STATUS", "public"),
+        youtube_upload_chunk_mb=int(os.environ.get("YOUTUBE_UPLOAD_CHUNK_MB", "16")),
         podcast_subscribe_url=os.environ.get("PODCAST_SUBSCRIBE_URL"),
         r2_access_key_id=os.environ.get("R2_ACCESS_KEY_ID"),
         r2_secret_access_key=os.environ.get("R2_SECRET_ACCESS_KEY"),
         r2_bucket=os.environ.get("R2_BUCKET"),
         r2_endpoint=os.environ.get("R2_ENDPOINT"),
         r2_public_base_url=os.environ.get("R2_PUBLIC_BASE_URL"),
+        r2_upload_concurrency=int(os.environ.get("R2_UPLOAD_CONCURRENCY", "8")),
+        r2_multipart_chunk_mb=int(os.environ.get("R2_MULTIPART_CHUNK_MB", "8")),
+        podcast_publish_workers=int(os.environ.get("PODCAST_PUBLISH_WORKERS", "3")),
+        podcast_publish_deadline_seconds=int(os.environ.get("PODCAST_PUBLISH_DEADLINE_SECONDS", "1800")),
+        stats_cache_ttl_seconds=int(os.environ.get("STATS_CACHE_TTL_SECONDS", "60")),
+        stats_cache_stale_seconds=int(os.environ.get("STATS_CACHE_STALE_SECONDS", "3600")),
     )
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import atexit
+import importlib.util
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from app.config import get_settings
+
+# Long-lived extractor processes for /intake/file. Each worker loads
+# scripts/extract_text.py (MANUAL_INTAKE_SCRIPT) and the PDF/DOCX parsers once,
+# then serves jobs from its own queue and streams sections back one at a time.
+# A job that runs past EXTRACTOR_TIMEOUT_SECONDS, or whose worker dies (e.g. on
+# the EXTRACTOR_MEMORY_MB address-space limit), gets its worker replaced. PDFs are
+# read in page ranges by EXTRACTOR_PAGE_WORKERS child processes per job.
+
+_POLL_SECONDS = 0.5
+
+
+def _load_script(script_path: str) -> Any:
+    spec = importlib.util.spec_from_file_location("extract_text", script_path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError(f"Unable to load extractor script: {script_path}")
+    module = importlib.util.module_from_spec(spec)
+    # Registered under its own name, with its directory on sys.path, so the
+    # page-range processes it starts can unpickle references to its functions.
+    sys.modules["extract_text"] = module
+    sys.path.insert(0, str(Path(script_path).resolve().parent))
+    spec.loader.exec_module(module)
+    return module
+
+
+def _limit_memory(memory_mb: int) -> None:
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(script_path: str, memory_mb: int, page_workers: int, tasks: Any, results: Any) -> None:
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)
+    module = _load_script(script_path)
+    # Import the parsers up front so the first upload does not pay for them.
+    for name in ("pdfplumber", "docx"):
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    _limit_memory(memory_mb)
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        path, fmt, doc_title, max_words = task
+        try:
+            count = 0
+            for section in module.iter_sections(module.iter_text(path, fmt, page_workers), doc_title, max_words):
+                results.put(("section", section))
+                count += 1
+            if not count:
+                raise RuntimeError("No text extracted from file")
+            results.put(("done", count))
+        except MemoryError:
+            results.put(("error", f"Extraction exceeded the {memory_mb} MB memory limit"))
+        except Exception as exc:
+            results.put(("error", str(exc) or exc.__class__.__name__))
+
+
+class _Worker:
+    def __init__(self, ctx: Any, script_path: str, memory_mb: int, page_workers: int) -> None:
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        # Not a daemon: daemonic processes may not start the page-range children.
+        # shutdown_extractor_pool (also registered with atexit) stops it instead.
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(script_path, memory_mb, page_workers, self.tasks, self.results),
+            name="extractor",
+        )
+        self.process.start()
+
+    def stop(self) -> None:
+        # The worker leads its own process group; killing the group also takes
+        # down page-range children of a job abandoned mid-way.
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            if self.process.is_alive():
+                self.process.kill()
+        self.process.join(timeout=5)
+
+
+class ExtractorPool:
+    def __init__(
+        self, size: int, script_path: str, memory_mb: int, timeout_seconds: int, page_workers: int = 1
+    ) -> None:
+        self._ctx = mp.get_context("spawn")
+        self._script_path = script_path
+        self._memory_mb = memory_mb
+        self._page_workers = page_workers
+        self.timeout_seconds = timeout_seconds
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: set[_Worker] = set()
+        # sections() replaces workers from request threads concurrently.
+        self._workers_lock = threading.Lock()
+        for _ in range(max(1, size)):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self._script_path, self._memory_mb, self._page_workers)
+        with self._workers_lock:
+            self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.stop()
+        with self._workers_lock:
+            self._workers.discard(worker)
+        return self._spawn()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().tasks.put(None)
+            except queue.Empty:
+                break
+        with self._workers_lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.process.join(timeout=5)
+            worker.stop()
+
+    def sections(self, path: Path, fmt: str, doc_title: str, max_words: int) -> Iterator[dict]:
+        # Waiting for a free worker is bounded too, so a burst of uploads cannot tie
+        # up the API's threadpool indefinitely.
+        try:
+            worker = self._idle.get(timeout=self.timeout_seconds)
+        except queue.Empty:
+            raise RuntimeError(f"Extractor pool busy: no worker free within {self.timeout_seconds}s") from None
+        finished = False
+        try:
+            worker.tasks.put((str(path), fmt, doc_title, max_words))
+            # The timeout covers time spent waiting on the worker, not the caller's
+            # handling of each section, so the deadline is pushed back across yields.
+            deadline = time.monotonic() + self.timeout_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"Extraction timed out after {self.timeout_seconds}s")
+                try:
+                    kind, payload = worker.results.get(timeout=min(remaining, _POLL_SECONDS))
+                except queue.Empty:
+                    if not worker.process.is_alive():
+                        raise RuntimeError(f"Extractor process exited with code {worker.process.exitcode}")
+                    continue
+                if kind == "section":
+                    paused = time.monotonic()
+                    yield payload
+                    deadline += time.monotonic() - paused
+                elif kind == "done":
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise RuntimeError(payload)
+        finally:
+            # A worker abandoned mid-job (timeout, crash, caller stopped reading)
+            # may still be producing output, so it is replaced rather than reused.
+            if not finished:
+                print(f"extractor_worker_replaced pid={worker.process.pid} file={path.name}")
+                worker = self._replace(worker)
+            self._idle.put(worker)
+
+
+_pool: ExtractorPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_extractor_pool() -> ExtractorPool | None:
+    global _pool
+    settings = get_settings()
+    if settings.extractor_workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractorPool(
+                size=settings.extractor_workers,
+                script_path=settings.manual_intake_script,
+                memory_mb=settings.extractor_memory_mb,
+                timeout_seconds=settings.extractor_timeout_seconds,
+                page_workers=settings.extractor_page_workers,
+            )
+            atexit.register(shutdown_extractor_pool)
+            print(
+                f"extractor_pool_started workers={settings.extractor_workers} "
+                f"page_workers={settings.extractor_page_workers}"
+            )
+        return _pool
+
+
+def detect_format(path: Path) -> str:
+    fmt = path.suffix.lstrip(".").lower()
+    return fmt if fmt in {"pdf", "docx", "txt"} else "txt"
+
+
+def document_title(path: Path, title: str | None) -> str:
+    # Upload paths carry a uuid suffix (see save_upload_to_temp); callers pass the title.
+    return (title or "").strip() or path.stem or "Manual Upload"
+
+
+def extract_sections(path: Path, title: str | None, max_words: int) -> tuple[str, Iterator[dict]]:
+    pool = get_extractor_pool()
+    if pool is None:
+        raise RuntimeError("Extractor pool is disabled (EXTRACTOR_WORKERS=0)")
+    doc_title = document_title(path, title)
+    return doc_title, pool.sections(path, detect_format(path), doc_title, max_words)
+
+
+def shutdown_extractor_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
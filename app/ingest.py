@@ -5,11 +5,13 @@ import subprocess
 import sys
 import tempfile
 import uuid
+from collections.abc import Iterable, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
 
 from .config import get_settings
 from .db import get_supabase
+from .extractor_pool import extract_sections, get_extractor_pool
 
 
 _chapter_re = re.compile(r"^(chapter|kapitola|book|part)\s+([0-9ivxlcdm]+)(\b.*)?$", re.I)
@@ -21,38 +23,62 @@ def _slugify(value: str) -> str:
     return value.lower() or "upload"
 
 
-def split_text_into_sections(text: str, title: str, max_words: int) -> list[dict]:
-    raw_text = (text or "").strip()
-    if not raw_text:
-        raise ValueError("No text provided in request body")
-
-    doc_title = (title or "Manual Input").strip()
-    lines = [line.strip() for line in raw_text.splitlines()]
-
-    sections: list[dict] = []
-    current_title = doc_title
+def iter_text_sections(lines: Iterable[str], title: str, max_words: int) -> Iterator[dict]:
+    # Splits on chapter headings as lines arrive; only the current section is
+    # held in memory, so a request body can be read straight from its spool file.
+    # Until the first heading, text is cut every max_words words like chunk_by_words,
+    # so a document without headings does not become one giant section.
+    current_title = (title or "Manual Input").strip()
     current_lines: list[str] = []
+    current_words = 0
+    parts = 0
     saw_heading = False
 
-    def flush(section_title: str) -> None:
-        body = "\n".join([l for l in current_lines if l]).strip()
-        if body:
-            sections.append({"title": section_title, "text": body})
+    def flush(section_title: str) -> dict | None:
+        nonlocal current_words
+        body = "\n".join(current_lines).strip()
         current_lines.clear()
+        current_words = 0
+        return {"title": section_title, "text": body} if body else None
+
+    def untitled() -> str:
+        return f"Part {parts + 1}" if parts else "Intro"
 
     for line in lines:
+        line = line.strip()
         if not line:
             continue
         if _chapter_re.match(line):
             if current_lines:
-                flush(current_title if saw_heading else "Intro")
+                section = flush(current_title if saw_heading else untitled())
+                if section:
+                    yield section
             current_title = line
             saw_heading = True
             continue
         current_lines.append(line)
+        if saw_heading or max_words <= 0:
+            continue
+        current_words += len(line.split())
+        while current_words >= max_words:
+            words = " ".join(current_lines).split()
+            current_lines[:] = [" ".join(words[max_words:])] if len(words) > max_words else []
+            current_words = len(words) - max_words
+            parts += 1
+            yield {"title": f"Part {parts}", "text": " ".join(words[:max_words])}
 
     if current_lines:
-        flush(current_title)
+        section = flush(current_title if saw_heading or not parts else untitled())
+        if section:
+            yield section
+
+
+def split_text_into_sections(text: str, title: str, max_words: int) -> list[dict]:
+    raw_text = (text or "").strip()
+    if not raw_text:
+        raise ValueError("No text provided in request body")
+
+    sections = list(iter_text_sections(raw_text.splitlines(), title, max_words))
 
     if not sections:
         words = [w for w in raw_text.split() if w]
@@ -89,6 +115,8 @@ def run_extractor(file_path: Path, title: str, max_words: int) -> dict:
         title or "Manual Upload",
         "--max-words",
         str(max_words),
+        "--page-workers",
+        str(settings.extractor_page_workers),
     ]
     result = subprocess.run(cmd, capture_output=True, text=True, check=False)
     if result.returncode != 0:
@@ -99,10 +127,22 @@ def run_extractor(file_path: Path, title: str, max_words: int) -> dict:
         raise RuntimeError("extract_text.py returned invalid JSON") from exc
 
 
-def build_rows(sections: list[dict], title: str, source_website: str, request_id: str) -> list[dict]:
+def extract_file_sections(file_path: Path, title: str, max_words: int) -> tuple[str, Iterator[dict]]:
+    # Warm worker pool when enabled; otherwise one extract_text.py subprocess per file.
+    if get_extractor_pool() is not None:
+        return extract_sections(file_path, title, max_words)
+    payload = run_extractor(file_path, title, max_words)
+    if payload.get("error"):
+        raise RuntimeError(payload["error"])
+    return payload.get("document_title") or title, iter(payload.get("sections", []))
+
+
+def build_rows(
+    sections: list[dict], title: str, source_website: str, request_id: str, start: int = 0
+) -> list[dict]:
     rows = []
     safe_title = _slugify(title or "upload")
-    for idx, section in enumerate(sections):
+    for idx, section in enumerate(sections, start=start):
         rows.append(
             {
                 "source_url": f"{source_website}:{safe_title}:{request_id}:{idx}",
@@ -122,3 +162,42 @@ def insert_articles(rows: list[dict]) -> list[dict]:
     supabase = get_supabase()
     response = supabase.table("articles").insert(rows).execute()
     return response.data or []
+
+
+def insert_section_batches(
+    sections: Iterable[dict],
+    title: str,
+    source_website: str,
+    request_id: str,
+    batch_size: int | None = None,
+) -> Iterator[list[dict]]:
+    # Inserts rows in batches as sections arrive, so a long document is written
+    # while it is still being extracted; yields the inserted rows of each batch.
+    batch_size = max(1, batch_size or get_settings().intake_insert_batch)
+    batch: list[dict] = []
+    count = 0
+    for section in sections:
+        batch.append(section)
+        if len(batch) < batch_size:
+            continue
+        yield insert_articles(build_rows(batch, title, source_website, request_id, start=count))
+        count += len(batch)
+        batch.clear()
+        print(f"intake_batch_inserted request_id={request_id} rows={count}")
+    if batch:
+        yield insert_articles(build_rows(batch, title, source_website, request_id, start=count))
+        count += len(batch)
+        print(f"intake_batch_inserted request_id={request_id} rows={count}")
+
+
+def insert_sections(
+    sections: Iterable[dict],
+    title: str,
+    source_website: str,
+    request_id: str,
+    batch_size: int | None = None,
+) -> list[dict]:
+    inserted: list[dict] = []
+    for rows in insert_section_batches(sections, title, source_website, request_id, batch_size):
+        inserted.extend(rows)
+    return inserted
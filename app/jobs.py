@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from postgrest.exceptions import APIError
+
+from app.admin import get_project_podcast_image_prompt, resolve_project_id_for_post
+from app.db import get_supabase
+from app.media.artifacts import ensure_roundup_audio, ensure_roundup_video
+from app.pipeline import (
+    fetch_audio_roundup_content,
+    fetch_latest_audio_roundup_for_project,
+    run_audio_roundup,
+    run_project_pipeline,
+    update_post_audio_stats,
+    update_post_media,
+)
+
+# Background jobs for operations too slow for a request handler. The API inserts a
+# row into `jobs` and returns its id; `python -m app.worker jobs-worker` claims
+# queued rows with the claim_job RPC and records progress, result or error.
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("done", "error")
+_HEARTBEAT_SECONDS = 30
+_STALE_SECONDS = 600
+_MAX_ATTEMPTS = 3
+
+Progress = Callable[[float, str], None]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _post_content(post_id: str) -> dict:
+    content = fetch_audio_roundup_content(post_id)
+    if content is None:
+        raise RuntimeError("audio_roundup not found")
+    return content
+
+
+def _run_pipeline(params: dict, progress: Progress) -> dict:
+    results = run_project_pipeline(params["project_id"], max_items=10, on_progress=progress)
+    return {"status": "ok", "results": results}
+
+
+def _run_audio_roundup(params: dict, progress: Progress) -> dict:
+    project_id = params["project_id"]
+    progress(0.0, "script")
+    count = run_audio_roundup(project_id=project_id)
+    if count is None:
+        return {"status": "locked"}
+    if count == 0:
+        return {"status": "empty"}
+    return {"status": "ok", "post": fetch_latest_audio_roundup_for_project(project_id)}
+
+
+def _render_audio(params: dict, progress: Progress) -> dict:
+    post_id = params["post_id"]
+    content = _post_content(post_id)
+    progress(0.0, "tts")
+    artifact = ensure_roundup_audio(post_id, content, force=bool(params.get("force")))
+    url = f"/api/audio-roundup/{post_id}/audio"
+    update_post_media(post_id, url)
+    update_post_audio_stats(post_id, artifact.size_bytes, artifact.duration_seconds)
+    return {"status": "ok", "url": url, "rebuilt": artifact.rebuilt}
+
+
+def _render_video(params: dict, progress: Progress) -> dict:
+    post_id = params["post_id"]
+    content = _post_content(post_id)
+    project_id = resolve_project_id_for_post(post_id)
+    project_prompt = get_project_podcast_image_prompt(project_id) if project_id else None
+    progress(0.0, "render")
+    artifact = ensure_roundup_video(
+        post_id, content, project_id=project_id, project_prompt=project_prompt, force=bool(params.get("force"))
+    )
+    return {"status": "ok", "url": f"/api/audio-roundup/{post_id}/video", "rebuilt": artifact.rebuilt}
+
+
+JOB_HANDLERS: dict[str, Callable[[dict, Progress], dict]] = {
+    "pipeline": _run_pipeline,
+    "audio_roundup": _run_audio_roundup,
+    "render_audio": _render_audio,
+    "render_video": _render_video,
+}
+
+
+def get_job(job_id: str) -> dict | None:
+    sb = get_supabase()
+    resp = sb.table("jobs").select("*").eq("id", job_id).limit(1).execute()
+    data = resp.data or []
+    return data[0] if data else None
+
+
+def _active_job(dedupe_key: str) -> dict | None:
+    sb = get_supabase()
+    resp = (
+        sb.table("jobs")
+        .select("*")
+        .eq("dedupe_key", dedupe_key)
+        .in_("status", list(ACTIVE_STATUSES))
+        .limit(1)
+        .execute()
+    )
+    data = resp.data or []
+    return data[0] if data else None
+
+
+def enqueue_job(kind: str, target_id: str, params: dict | None = None) -> tuple[dict, bool]:
+    # Returns (job, created); a queued or running job for the same target is reused.
+    if kind not in JOB_HANDLERS:
+        raise RuntimeError(f"Unknown job kind: {kind}")
+    dedupe_key = f"{kind}:{target_id}"
+    existing = _active_job(dedupe_key)
+    if existing:
+        return existing, False
+    row = {
+        "kind": kind,
+        "target_id": target_id,
+        "params": params or {},
+        "dedupe_key": dedupe_key,
+        "status": "queued",
+        "created_at": _now_iso(),
+    }
+    sb = get_supabase()
+    try:
+        resp = sb.table("jobs").insert(row).execute()
+    except APIError as exc:
+        # Lost a race with another submission; the partial unique index kept one row.
+        if str(exc.code) != "23505":
+            raise
+        existing = _active_job(dedupe_key)
+        if existing:
+            return existing, False
+        raise
+    data = resp.data or []
+    if not data:
+        raise RuntimeError("Unable to enqueue job")
+    print(f"job_queued id={data[0]['id']} kind={kind} target={target_id}")
+    return data[0], True
+
+
+def _update_job(job_id: str, fields: dict) -> None:
+    get_supabase().table("jobs").update(fields).eq("id", job_id).execute()
+
+
+def _claim_job(worker_id: str) -> dict | None:
+    resp = get_supabase().rpc(
+        "claim_job", {"p_worker": worker_id, "p_stale_seconds": _STALE_SECONDS, "p_max_attempts": _MAX_ATTEMPTS}
+    ).execute()
+    data = resp.data or []
+    if isinstance(data, dict):
+        return data
+    return data[0] if data else None
+
+
+def run_job(job: dict) -> dict:
+    job_id = job["id"]
+    kind = job.get("kind") or ""
+    handler = JOB_HANDLERS.get(kind)
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.wait(_HEARTBEAT_SECONDS):
+            try:
+                _update_job(job_id, {"heartbeat_at": _now_iso()})
+            except Exception as exc:
+                print(f"job_heartbeat_failed id={job_id} error={exc}")
+
+    def progress(value: float, message: str) -> None:
+        try:
+            _update_job(
+                job_id,
+                {"progress": round(max(0.0, min(value, 1.0)) * 100, 2), "message": message, "heartbeat_at": _now_iso()},
+            )
+        except Exception as exc:
+            print(f"job_progress_failed id={job_id} error={exc}")
+
+    threading.Thread(target=heartbeat, name=f"job-heartbeat-{job_id}", daemon=True).start()
+    started = time.monotonic()
+    try:
+        if not handler:
+            raise RuntimeError(f"Unknown job kind: {kind}")
+        result = handler(job.get("params") or {}, progress)
+        fields = {"status": "done", "progress": 100, "message": None, "result": result, "finished_at": _now_iso()}
+    except Exception as exc:
+        fields = {"status": "error", "error": str(exc)[:2000], "finished_at": _now_iso()}
+    finally:
+        stop.set()
+    try:
+        _update_job(job_id, fields)
+    except Exception as exc:
+        # The row stays 'running' without heartbeats; claim_job requeues or fails it.
+        print(f"job_finish_failed id={job_id} status={fields['status']} error={exc}")
+    print(
+        f"job_finished id={job_id} kind={kind} status={fields['status']} "
+        f"seconds={time.monotonic() - started:.1f}"
+    )
+    return {**job, **fields}
+
+
+def run_jobs_worker(concurrency: int = 1, poll_seconds: float = 2.0, once: bool = False) -> int:
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    lock = threading.Lock()
+
+    def loop(slot: int) -> None:
+        nonlocal processed
+        name = f"{worker_id}:{slot}"
+        while True:
+            try:
+                job = _claim_job(name)
+            except Exception as exc:
+                print(f"job_claim_failed worker={name} error={exc}")
+                job = None
+            if not job:
+                if once:
+                    return
+                time.sleep(poll_seconds)
+                continue
+            print(f"job_started id={job['id']} kind={job.get('kind')} worker={name}")
+            try:
+                run_job(job)
+            except Exception as exc:
+                print(f"job_failed id={job['id']} worker={name} error={exc}")
+            with lock:
+                processed += 1
+
+    threads = [
+        threading.Thread(target=loop, args=(slot,), name=f"jobs-worker-{slot}", daemon=True)
+        for slot in range(max(1, concurrency))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return processed
+
+
+def job_view(job: dict, deduplicated: bool = False) -> dict[str, Any]:
+    view = {
+        "job_id": job.get("id"),
+        "kind": job.get("kind"),
+        "status": job.get("status"),
+        "progress": float(job.get("progress") or 0),
+        "message": job.get("message"),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+    if deduplicated:
+        view["deduplicated"] = True
+    return view
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from app.config import get_settings
+from app.db import get_supabase
+
+# Leased locks in the `locks` table (db/patches/2026-10-19-locks.sql) for work that
+# must not run twice at once on any host: podcast publish, YouTube upload and
+# audio roundup per project, and cleanup. Session advisory locks do not fit here
+# because PostgREST hands each request its own pooled connection.
+#
+# A lease expires after LOCK_TTL_SECONDS unless the holder's heartbeat renews it,
+# so a crashed host frees its locks. Each acquisition gets a new fencing token;
+# call Lease.check() before an irreversible write to make sure the lease was not
+# lost (e.g. after a long stall) and taken over by another holder.
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _scalar(data: object) -> object:
+    if isinstance(data, list):
+        return data[0] if data else None
+    return data
+
+
+@dataclass
+class Lease:
+    name: str
+    owner: str
+    token: int
+    ttl_seconds: int
+    lost: threading.Event = field(default_factory=threading.Event)
+
+    def renew(self) -> bool:
+        resp = (
+            get_supabase()
+            .rpc("renew_lock", {"p_name": self.name, "p_token": self.token, "p_ttl_seconds": self.ttl_seconds})
+            .execute()
+        )
+        if not _scalar(resp.data):
+            self.lost.set()
+        return not self.lost.is_set()
+
+    def check(self) -> None:
+        # Renewing doubles as the fencing check: it only succeeds for the current token.
+        if self.lost.is_set() or not self.renew():
+            raise RuntimeError(f"Lock lost: {self.name} token={self.token}")
+
+
+def acquire_lock(name: str, ttl_seconds: int | None = None) -> Lease | None:
+    ttl = ttl_seconds or get_settings().lock_ttl_seconds
+    owner = _owner()
+    resp = (
+        get_supabase()
+        .rpc("acquire_lock", {"p_name": name, "p_owner": owner, "p_ttl_seconds": ttl})
+        .execute()
+    )
+    token = _scalar(resp.data)
+    if token is None:
+        return None
+    return Lease(name=name, owner=owner, token=int(token), ttl_seconds=ttl)
+
+
+def release_lock(lease: Lease) -> None:
+    get_supabase().rpc("release_lock", {"p_name": lease.name, "p_token": lease.token}).execute()
+
+
+@contextmanager
+def distributed_lock(name: str, ttl_seconds: int | None = None) -> Iterator[Lease | None]:
+    # Yields None when another holder has the lock; callers report that and skip.
+    lease = acquire_lock(name, ttl_seconds)
+    if lease is None:
+        print(f"lock_busy name={name}")
+        yield None
+        return
+    print(f"lock_acquired name={name} token={lease.token}")
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.wait(lease.ttl_seconds / 3):
+            try:
+                if not lease.renew():
+                    print(f"lock_lost name={name} token={lease.token}")
+                    return
+            except Exception as exc:
+                # Keep trying; the lease only lapses after a full TTL without renewal.
+                print(f"lock_renew_failed name={name} token={lease.token} error={exc}")
+
+    threading.Thread(target=heartbeat, name=f"lock-{name}", daemon=True).start()
+    try:
+        yield lease
+    finally:
+        stop.set()
+        try:
+            release_lock(lease)
+        except Exception as exc:
+            print(f"lock_release_failed name={name} token={lease.token} error={exc}")
+        else:
+            print(f"lock_released name={name} token={lease.token}")
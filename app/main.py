@@ -1,10 +1,18 @@
+import asyncio
+import io
+import json
 import shutil
+import tempfile
 import uuid
+from collections.abc import Iterator
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any, TextIO
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 
 from .admin import (
     create_project,
@@ -19,7 +27,6 @@ from .admin import (
     list_projects,
     list_source_items,
     list_sources,
-    project_stats,
     scrape_project,
     scrape_source,
     check_project_access,
@@ -30,30 +37,35 @@ from .admin import (
     resolve_project_id_for_post,
 )
 from .config import get_settings
-from .db import get_supabase
 from .ingest import (
-    build_rows,
-    insert_articles,
-    run_extractor,
+    extract_file_sections,
+    insert_section_batches,
+    insert_sections,
+    iter_text_sections,
     save_upload_to_temp,
-    split_text_into_sections,
 )
-from .media.audio import render_audio_roundup
-from .media.roundup_video import ensure_roundup_image, render_audio_roundup_video
-from .media.paths import (
-    roundup_audio_path,
-    roundup_image_path,
-    roundup_video_path,
-)
-from .pipeline import (
-    fetch_latest_audio_roundup,
-    run_audio_roundup,
-    run_project_pipeline,
-    update_post_media,
+from .media.artifacts import (
+    ensure_roundup_image_artifact,
+    existing_artifact_path,
+    legacy_path,
 )
+from .extractor_pool import get_extractor_pool, shutdown_extractor_pool
+from .jobs import FINISHED_STATUSES, enqueue_job, get_job, job_view
+from .pipeline import fetch_audio_roundup_content
+from .stats_cache import get_project_stats, invalidate_project_stats, warm_project_stats
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    warm_project_stats()
+    get_extractor_pool()
+    yield
+    shutdown_extractor_pool()
+
 
+app = FastAPI(title="Gossip Intake API", version="0.1.0", lifespan=_lifespan)
 
-app = FastAPI(title="Gossip Intake API", version="0.1.0")
+_TEXT_SPOOL_BYTES = 1024 * 1024
 
 
 class TextIntake(BaseModel):
@@ -133,13 +145,70 @@ def stats_ui() -> HTMLResponse:
     return HTMLResponse(html_path.read_text(encoding="utf-8"))
 
 
+async def _read_intake_text(request: Request, title: str | None) -> tuple[str | None, TextIO]:
+    # JSON {title, text} as before; a multipart "text" part; or any other body as
+    # raw UTF-8 text (chunked uploads welcome), spooled to disk past 1 MB.
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "application/json":
+        try:
+            payload = TextIntake.model_validate_json(await request.body())
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=exc.errors(include_url=False))
+        return payload.title or title, io.StringIO(payload.text)
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        form_title = form.get("title")
+        if isinstance(form_title, str) and form_title.strip():
+            title = form_title
+        text = form.get("text")
+        if text is None:
+            raise HTTPException(status_code=400, detail="text is required")
+        if isinstance(text, str):
+            return title, io.StringIO(text)
+        return title, io.TextIOWrapper(text.file, encoding="utf-8", errors="ignore")
+    spool = tempfile.SpooledTemporaryFile(max_size=_TEXT_SPOOL_BYTES)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return title, io.TextIOWrapper(spool, encoding="utf-8", errors="ignore")
+
+
+def _intake_progress(reader: TextIO, sections: Iterator[dict], title: str, request_id: str) -> Iterator[str]:
+    inserted = 0
+    ids: list[str] = []
+    try:
+        for rows in insert_section_batches(sections, title, "manual", request_id):
+            inserted += len(rows)
+            ids.extend(r["id"] for r in rows)
+            yield json.dumps({"status": "running", "inserted": inserted}) + "\n"
+        if not inserted:
+            yield json.dumps({"status": "error", "detail": "No text provided in request body"}) + "\n"
+            return
+        yield json.dumps({"status": "ok", "inserted": inserted, "ids": ids}) + "\n"
+    except Exception as exc:
+        print(f"intake_text_failed request_id={request_id} inserted={inserted} error={exc}")
+        yield json.dumps({"status": "error", "inserted": inserted, "detail": str(exc)}) + "\n"
+    finally:
+        reader.close()
+
+
 @app.post("/intake/text")
-def intake_text(payload: TextIntake) -> dict:
-    settings = get_settings()
+async def intake_text(request: Request, title: str | None = None, stream: bool = False) -> Any:
     request_id = uuid.uuid4().hex
-    sections = split_text_into_sections(payload.text, payload.title or "Manual Input", settings.max_words)
-    rows = build_rows(sections, payload.title or "Manual Input", "manual", request_id)
-    inserted = insert_articles(rows)
+    doc_title, reader = await _read_intake_text(request, title)
+    doc_title = doc_title or "Manual Input"
+    sections = iter_text_sections(reader, doc_title, get_settings().max_words)
+    if stream:
+        # NDJSON: one progress line per inserted batch, then the final result.
+        return StreamingResponse(
+            _intake_progress(reader, sections, doc_title, request_id), media_type="application/x-ndjson"
+        )
+    try:
+        inserted = await run_in_threadpool(insert_sections, sections, doc_title, "manual", request_id)
+    finally:
+        reader.close()
+    if not inserted:
+        raise HTTPException(status_code=400, detail="No text provided in request body")
     return {"status": "ok", "inserted": len(inserted), "ids": [r["id"] for r in inserted]}
 
 
@@ -153,13 +222,8 @@ def intake_file(title: str | None = None, file: UploadFile = File(...)) -> dict:
     with target_path.open("wb") as f:
         shutil.copyfileobj(file.file, f)
 
-    payload = run_extractor(target_path, title or "Manual Upload", settings.max_words)
-    if payload.get("error"):
-        raise RuntimeError(payload["error"])
-
-    sections = payload.get("sections", [])
-    rows = build_rows(sections, payload.get("document_title") or title or "Manual Upload", "manual", request_id)
-    inserted = insert_articles(rows)
+    doc_title, sections = extract_file_sections(target_path, title or "Manual Upload", settings.max_words)
+    inserted = insert_sections(sections, doc_title or title or "Manual Upload", "manual", request_id)
     return {"status": "ok", "inserted": len(inserted), "ids": [r["id"] for r in inserted]}
 
 
@@ -221,19 +285,25 @@ def api_create_source(project_id: str, payload: SourceCreate) -> dict:
         raise HTTPException(status_code=400, detail="url is required")
     if payload.scrape_interval_hours is not None and payload.scrape_interval_hours <= 0:
         raise HTTPException(status_code=400, detail="scrape_interval_hours must be > 0")
-    return create_source(project_id, payload.model_dump())
+    source = create_source(project_id, payload.model_dump())
+    invalidate_project_stats(project_id)
+    return source
 
 
 @app.patch("/api/sources/{source_id}")
 def api_update_source(source_id: str, payload: SourceUpdate) -> dict:
     if payload.scrape_interval_hours is not None and payload.scrape_interval_hours <= 0:
         raise HTTPException(status_code=400, detail="scrape_interval_hours must be > 0")
-    return update_source(source_id, payload.model_dump())
+    source = update_source(source_id, payload.model_dump())
+    invalidate_project_stats(source.get("project_id") if source else None)
+    return source
 
 
 @app.delete("/api/sources/{source_id}")
 def api_delete_source(source_id: str) -> dict:
+    source = get_source(source_id)
     delete_source(source_id)
+    invalidate_project_stats(source.get("project_id") if source else None)
     return {"status": "ok"}
 
 
@@ -252,10 +322,14 @@ def api_scrape_source(source_id: str, max_items: int = Query(10, ge=1, le=50)) -
     return {"status": "ok", "result": result.__dict__}
 
 
-@app.post("/api/projects/{project_id}/pipeline")
+def _submit_job(kind: str, target_id: str, params: dict) -> dict:
+    job, created = enqueue_job(kind, target_id, params)
+    return job_view(job, deduplicated=not created)
+
+
+@app.post("/api/projects/{project_id}/pipeline", status_code=202)
 def api_run_pipeline(project_id: str) -> dict:
-    results = run_project_pipeline(project_id, max_items=10)
-    return {"status": "ok", "results": results}
+    return _submit_job("pipeline", project_id, {"project_id": project_id})
 
 
 @app.get("/api/sources/{source_id}/items")
@@ -270,13 +344,26 @@ def api_list_articles(
     offset: int = Query(0, ge=0),
     order_by: str = Query("score"),
     direction: str = Query("desc"),
+    cursor: str | None = Query(None),
+    count: str = Query("estimated", pattern="^(exact|planned|estimated|none)$"),
 ) -> dict:
-    return list_articles_page(project_id, limit=limit, offset=offset, order_by=order_by, direction=direction)
+    try:
+        return list_articles_page(
+            project_id,
+            limit=limit,
+            offset=offset,
+            order_by=order_by,
+            direction=direction,
+            cursor=cursor,
+            count=count,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @app.get("/api/projects/{project_id}/stats")
 def api_project_stats(project_id: str) -> dict:
-    return project_stats(project_id)
+    return get_project_stats(project_id)
 
 
 @app.post("/api/sources/{source_id}/check-access")
@@ -301,122 +388,99 @@ def api_get_youtube_account(project_id: str) -> dict | None:
 def api_upsert_youtube_account(project_id: str, payload: YoutubeAccountUpdate) -> dict:
     if not payload.refresh_token.strip():
         raise HTTPException(status_code=400, detail="refresh_token is required")
-    return upsert_youtube_account(project_id, payload.refresh_token, payload.channel_title, payload.scopes)
+    account = upsert_youtube_account(project_id, payload.refresh_token, payload.channel_title, payload.scopes)
+    invalidate_project_stats(project_id)
+    return account
 
 
-@app.post("/api/projects/{project_id}/audio-roundup")
+@app.post("/api/projects/{project_id}/audio-roundup", status_code=202)
 def api_generate_audio_roundup(project_id: str) -> dict:
-    count = run_audio_roundup(project_id=project_id)
-    if count == 0:
-        return {"status": "empty"}
-    latest = fetch_latest_audio_roundup()
-    return {"status": "ok", "post": latest}
-
-
-@app.post("/api/audio-roundup/{post_id}/render")
-def api_render_audio_roundup(post_id: str) -> dict:
-    row = (
-        get_supabase()
-        .table("posts")
-        .select("id, content")
-        .eq("id", post_id)
-        .eq("content_type", "audio_roundup")
-        .limit(1)
-        .execute()
-    )
-    data = row.data or []
-    if not data:
+    return _submit_job("audio_roundup", project_id, {"project_id": project_id})
+
+
+def _roundup_content(post_id: str) -> dict:
+    content = fetch_audio_roundup_content(post_id)
+    if content is None:
         raise HTTPException(status_code=404, detail="audio_roundup not found")
-    content = data[0].get("content") or {}
-    dialogue = content.get("dialogue") or []
-    voice_a = content.get("tts_voice_a")
-    voice_b = content.get("tts_voice_b")
-    settings = get_settings()
-    out_dir = Path(settings.media_output_dir)
-    out_path = roundup_audio_path(out_dir, post_id)
-    render_audio_roundup(dialogue, out_path, voice_a=voice_a, voice_b=voice_b)
-    url = f"/api/audio-roundup/{post_id}/audio"
-    update_post_media(post_id, url)
-    return {"status": "ok", "url": url}
+    return content
+
+
+@app.post("/api/audio-roundup/{post_id}/render", status_code=202)
+def api_render_audio_roundup(post_id: str, force: bool = Query(False)) -> dict:
+    _roundup_content(post_id)
+    return _submit_job("render_audio", post_id, {"post_id": post_id, "force": force})
 
 
 @app.get("/api/audio-roundup/{post_id}/audio")
 def api_get_audio_roundup(post_id: str) -> FileResponse:
-    settings = get_settings()
-    out_dir = Path(settings.media_output_dir)
-    out_path = roundup_audio_path(out_dir, post_id)
-    if not out_path.exists():
-        legacy_path = out_dir / f"audio_roundup_{post_id}.mp3"
-        if not legacy_path.exists():
-            raise HTTPException(status_code=404, detail="audio file not found")
-        return FileResponse(legacy_path, media_type="audio/mpeg")
-    return FileResponse(out_path, media_type="audio/mpeg")
-
-
-@app.post("/api/audio-roundup/{post_id}/render-video")
-def api_render_audio_roundup_video(post_id: str) -> dict:
-    row = (
-        get_supabase()
-        .table("posts")
-        .select("id, content")
-        .eq("id", post_id)
-        .eq("content_type", "audio_roundup")
-        .limit(1)
-        .execute()
-    )
-    data = row.data or []
-    if not data:
-        raise HTTPException(status_code=404, detail="audio_roundup not found")
-    content = data[0].get("content") or {}
-    settings = get_settings()
-    out_dir = Path(settings.media_output_dir)
-    out_path = roundup_video_path(out_dir, post_id)
-    project_id = resolve_project_id_for_post(post_id)
-    project_prompt = get_project_podcast_image_prompt(project_id) if project_id else None
-    render_audio_roundup_video(content, post_id, out_path, project_id=project_id, project_prompt=project_prompt)
-    url = f"/api/audio-roundup/{post_id}/video"
-    return {"status": "ok", "url": url}
+    path = existing_artifact_path(post_id, "audio")
+    if not path:
+        raise HTTPException(status_code=404, detail="audio file not found")
+    return FileResponse(path, media_type="audio/mpeg")
+
+
+@app.post("/api/audio-roundup/{post_id}/render-video", status_code=202)
+def api_render_audio_roundup_video(post_id: str, force: bool = Query(False)) -> dict:
+    _roundup_content(post_id)
+    return _submit_job("render_video", post_id, {"post_id": post_id, "force": force})
+
+
+@app.get("/api/jobs/{job_id}")
+def api_get_job(job_id: str) -> dict:
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job_view(job)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def api_job_events(job_id: str) -> StreamingResponse:
+    if not await run_in_threadpool(get_job, job_id):
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def stream():
+        last = None
+        idle = 0.0
+        while True:
+            job = await run_in_threadpool(get_job, job_id)
+            if not job:
+                return
+            view = job_view(job)
+            state = (view["status"], view["progress"], view["message"])
+            if state != last:
+                last = state
+                idle = 0.0
+                yield f"event: job\ndata: {json.dumps(view, default=str)}\n\n"
+                if view["status"] in FINISHED_STATUSES:
+                    return
+            elif idle >= 15:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            await asyncio.sleep(1.0)
+            idle += 1.0
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @app.get("/api/audio-roundup/{post_id}/video")
 def api_get_audio_roundup_video(post_id: str) -> FileResponse:
-    settings = get_settings()
-    out_dir = Path(settings.media_output_dir)
-    out_path = roundup_video_path(out_dir, post_id)
-    if not out_path.exists():
-        legacy_path = out_dir / f"audio_roundup_{post_id}.mp4"
-        if not legacy_path.exists():
-            raise HTTPException(status_code=404, detail="video file not found")
-        return FileResponse(legacy_path, media_type="video/mp4")
-    return FileResponse(out_path, media_type="video/mp4")
+    path = existing_artifact_path(post_id, "video")
+    if not path:
+        raise HTTPException(status_code=404, detail="video file not found")
+    return FileResponse(path, media_type="video/mp4")
 
 
 @app.get("/api/audio-roundup/{post_id}/image")
 def api_get_audio_roundup_image(post_id: str, refresh: bool = Query(False)) -> FileResponse:
-    row = (
-        get_supabase()
-        .table("posts")
-        .select("id, content")
-        .eq("id", post_id)
-        .eq("content_type", "audio_roundup")
-        .limit(1)
-        .execute()
-    )
-    data = row.data or []
-    if not data:
-        raise HTTPException(status_code=404, detail="audio_roundup not found")
-    content = data[0].get("content") or {}
+    content = _roundup_content(post_id)
     settings = get_settings()
     out_dir = Path(settings.media_output_dir)
-    out_path = roundup_image_path(out_dir, post_id)
     project_id = resolve_project_id_for_post(post_id)
     project_prompt = get_project_podcast_image_prompt(project_id) if project_id else None
     if refresh:
-        if out_path.exists():
-            out_path.unlink()
-        legacy_path = out_dir / f"audio_roundup_{post_id}.png"
-        if legacy_path.exists():
-            legacy_path.unlink()
+        legacy = legacy_path(post_id, "image")
+        if legacy.exists():
+            legacy.unlink()
     image_path = None
     if project_id and project_prompt:
         from .media.paths import podcast_image_path
@@ -427,11 +491,12 @@ def api_get_audio_roundup_image(post_id: str, refresh: bool = Query(False)) -> F
             project_path.unlink()
         image_path = ensure_project_podcast_image(project_prompt, project_path, allow_placeholder=False)
     if not image_path:
-        prompt = content.get("image_prompt") or content.get("imagePrompt")
-        image_path = ensure_roundup_image(prompt, out_path, allow_placeholder=False)
+        artifact = ensure_roundup_image_artifact(
+            post_id, content, allow_placeholder=False, force=refresh
+        )
+        image_path = artifact.path if artifact else None
     if not image_path or not image_path.exists():
-        legacy_path = out_dir / f"audio_roundup_{post_id}.png"
-        if not legacy_path.exists():
+        image_path = existing_artifact_path(post_id, "image")
+        if not image_path:
             raise HTTPException(status_code=404, detail="image not found")
-        return FileResponse(legacy_path, media_type="image/png")
     return FileResponse(image_path, media_type="image/png")
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import re
+import wave
+from array import array
+from pathlib import Path
+
+from app.media.ffmpeg import ffmpeg_bin, run_ffmpeg
+
+# Word timings for karaoke captions computed from audio we synthesized ourselves:
+# each TTS chunk's measured duration is split across its words by syllable weight,
+# optionally skipping the pauses found by a simple energy-based silence detector.
+
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+_PAUSE_WEIGHTS = {",": 0.5, ";": 0.6, ":": 0.6, ".": 1.0, "!": 1.0, "?": 1.0}
+
+_ANALYSIS_RATE = 8000
+_FRAME_SECONDS = 0.02
+_SILENCE_DB = -35.0
+_MIN_SILENCE_SECONDS = 0.15
+
+
+def syllable_count(word: str) -> int:
+    letters = re.sub(r"[^a-z0-9]", "", word.lower())
+    if not letters:
+        return 0
+    if letters.isdigit():
+        return max(1, len(letters))
+    groups = len(_VOWEL_GROUPS.findall(letters))
+    if letters.endswith("e") and not letters.endswith(("le", "ee")) and groups > 1:
+        groups -= 1
+    return max(1, groups)
+
+
+def _word_weight(word: str) -> float:
+    return float(syllable_count(word) or max(1, len(word) // 3))
+
+
+def _pause_weight(word: str) -> float:
+    stripped = word.rstrip("\"')]»”’")
+    return _PAUSE_WEIGHTS.get(stripped[-1:], 0.0) if stripped else 0.0
+
+
+def decode_pcm(audio_path: Path, work_dir: Path, rate: int = _ANALYSIS_RATE) -> array:
+    wav_path = work_dir / f"{audio_path.stem}_align.wav"
+    cmd = [
+        ffmpeg_bin(),
+        "-y",
+        "-i",
+        str(audio_path.resolve()),
+        "-ac",
+        "1",
+        "-ar",
+        str(rate),
+        "-c:a",
+        "pcm_s16le",
+        str(wav_path.resolve()),
+    ]
+    run_ffmpeg(cmd, cwd=work_dir, label=f"align:{audio_path.name}")
+    try:
+        with wave.open(str(wav_path), "rb") as handle:
+            samples = array("h")
+            samples.frombytes(handle.readframes(handle.getnframes()))
+    finally:
+        wav_path.unlink(missing_ok=True)
+    return samples
+
+
+def silence_intervals(
+    samples: array,
+    rate: int = _ANALYSIS_RATE,
+    threshold_db: float = _SILENCE_DB,
+    min_seconds: float = _MIN_SILENCE_SECONDS,
+) -> list[tuple[float, float]]:
+    frame = max(1, int(rate * _FRAME_SECONDS))
+    levels: list[float] = []
+    for start in range(0, len(samples), frame):
+        window = samples[start : start + frame]
+        levels.append((sum(s * s for s in window) / len(window)) ** 0.5)
+    if not levels:
+        return []
+    # Threshold relative to loud speech so quiet and loud voices behave the same.
+    reference = sorted(levels)[int(len(levels) * 0.95)]
+    threshold = max(1.0, reference * 10 ** (threshold_db / 20))
+
+    intervals: list[tuple[float, float]] = []
+    run_start: int | None = None
+    for idx, level in enumerate(levels + [threshold + 1]):
+        if level < threshold:
+            if run_start is None:
+                run_start = idx
+        elif run_start is not None:
+            start_s = run_start * _FRAME_SECONDS
+            end_s = min(idx * _FRAME_SECONDS, len(samples) / rate)
+            if end_s - start_s >= min_seconds:
+                intervals.append((start_s, end_s))
+            run_start = None
+    return intervals
+
+
+def _speech_segments(
+    start: float, end: float, silences: list[tuple[float, float]]
+) -> list[tuple[float, float]]:
+    segments: list[tuple[float, float]] = []
+    cursor = start
+    for s_start, s_end in silences:
+        if s_end <= start or s_start >= end:
+            continue
+        if s_start > cursor:
+            segments.append((cursor, s_start))
+        cursor = max(cursor, s_end)
+    if cursor < end:
+        segments.append((cursor, end))
+    return segments
+
+
+def _locate(position: float, segments: list[tuple[float, float]], is_end: bool) -> tuple[int, float]:
+    for idx, (seg_start, seg_end) in enumerate(segments):
+        length = seg_end - seg_start
+        if position < length or (is_end and position <= length):
+            return idx, seg_start + position
+        position -= length
+    return len(segments) - 1, segments[-1][1]
+
+
+def _word_span(
+    start_pos: float, end_pos: float, segments: list[tuple[float, float]]
+) -> tuple[float, float]:
+    start_idx, start = _locate(start_pos, segments, is_end=False)
+    end_idx, end = _locate(end_pos, segments, is_end=True)
+    if start_idx != end_idx:
+        # A word spanning a pause belongs to whichever side holds most of it.
+        before = segments[start_idx][1] - start
+        if before >= (end_pos - start_pos) / 2:
+            end = segments[start_idx][1]
+        else:
+            start = segments[start_idx + 1][0]
+    return start, end
+
+
+def align_chunk(
+    text: str,
+    start: float,
+    duration: float,
+    silences: list[tuple[float, float]] | None = None,
+) -> list[dict]:
+    tokens = text.split()
+    if not tokens or duration <= 0:
+        return []
+    end = start + duration
+    segments = _speech_segments(start, end, silences or [])
+    if not segments:
+        segments = [(start, end)]
+    # Pauses at punctuation are only modelled when silences were not measured.
+    use_pauses = silences is None
+
+    weights = [_word_weight(t) for t in tokens]
+    pauses = [_pause_weight(t) if use_pauses else 0.0 for t in tokens[:-1]] + [0.0]
+    total = sum(weights) + sum(pauses)
+    speech = sum(seg_end - seg_start for seg_start, seg_end in segments)
+    scale = speech / total if total else 0.0
+
+    words: list[dict] = []
+    position = 0.0
+    for token, weight, pause in zip(tokens, weights, pauses):
+        word_start, word_end = _word_span(position, position + weight * scale, segments)
+        position += weight * scale
+        words.append({"word": token, "start": round(word_start, 3), "end": round(word_end, 3)})
+        position += pause * scale
+    return words
+
+
+def align_chunks(
+    chunks: list[tuple[str, float]],
+    silences: list[tuple[float, float]] | None = None,
+) -> list[dict]:
+    words: list[dict] = []
+    offset = 0.0
+    for text, duration in chunks:
+        words.extend(align_chunk(text, offset, duration, silences))
+        offset += duration
+    return words
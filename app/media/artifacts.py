@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from app.config import get_settings
+from app.media.audio import render_audio_roundup
+from app.media.paths import (
+    podcast_image_path,
+    roundup_audio_path,
+    roundup_dir,
+    roundup_image_path,
+    roundup_video_path,
+)
+from app.media.probe import probe
+from app.media.roundup_video import (
+    ensure_project_podcast_image,
+    ensure_roundup_image,
+    render_roundup_video,
+)
+
+# Render-once store for roundup media. Each post directory keeps a manifest.json
+# recording, per artifact, the hash of the inputs that produced it plus size,
+# duration and checksum. ensure_* rebuilds only when the inputs change or the
+# file no longer matches the manifest.
+
+_MANIFEST_NAME = "manifest.json"
+# Bumped when the inputs hashed for an artifact change; older entries whose file
+# is intact are re-stamped rather than rebuilt.
+_HASH_VERSION = 2
+_VIDEO_PROFILE = "still"
+_LEGACY_SUFFIXES = {"audio": ".mp3", "video": ".mp4", "image": ".png"}
+
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+@dataclass
+class Artifact:
+    kind: str
+    path: Path
+    input_hash: str
+    size_bytes: int
+    duration_seconds: float
+    checksum: str
+    built_at: str
+    rebuilt: bool = False
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _base_dir() -> Path:
+    return Path(get_settings().media_output_dir)
+
+
+def _post_lock(post_id: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(post_id, threading.Lock())
+
+
+def input_hash(inputs: dict) -> str:
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path(post_id: str) -> Path:
+    return roundup_dir(_base_dir(), post_id) / _MANIFEST_NAME
+
+
+def load_manifest(post_id: str) -> dict:
+    path = manifest_path(post_id)
+    if not path.exists():
+        return {"post_id": post_id, "artifacts": {}}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"artifact_manifest_unreadable post_id={post_id} error={exc}")
+        return {"post_id": post_id, "artifacts": {}}
+    data.setdefault("artifacts", {})
+    return data
+
+
+def _save_manifest(post_id: str, manifest: dict) -> None:
+    path = manifest_path(post_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _from_entry(post_id: str, kind: str, entry: dict) -> Artifact:
+    # Files are recorded relative to the post directory so MEDIA_OUTPUT_DIR can move.
+    return Artifact(
+        kind=kind,
+        path=roundup_dir(_base_dir(), post_id) / entry["file"],
+        input_hash=entry.get("input_hash") or "",
+        size_bytes=int(entry.get("size_bytes") or 0),
+        duration_seconds=float(entry.get("duration_seconds") or 0.0),
+        checksum=entry.get("checksum") or "",
+        built_at=entry.get("built_at") or "",
+    )
+
+
+def _to_entry(artifact: Artifact) -> dict:
+    entry = asdict(artifact)
+    entry["file"] = entry.pop("path").name
+    entry.pop("kind")
+    entry.pop("rebuilt")
+    entry["hash_version"] = _HASH_VERSION
+    return entry
+
+
+def _describe(kind: str, path: Path, inputs_hash: str) -> Artifact:
+    info = probe(path)
+    return Artifact(
+        kind=kind,
+        path=path,
+        input_hash=inputs_hash,
+        size_bytes=path.stat().st_size,
+        duration_seconds=info.duration_seconds if info else 0.0,
+        checksum=file_checksum(path),
+        built_at=_now_iso(),
+    )
+
+
+def _is_current(artifact: Artifact, inputs_hash: str) -> bool:
+    path = artifact.path
+    return (
+        artifact.input_hash == inputs_hash
+        and path.exists()
+        and path.stat().st_size == artifact.size_bytes
+    )
+
+
+def legacy_path(post_id: str, kind: str) -> Path:
+    return _base_dir() / f"audio_roundup_{post_id}{_LEGACY_SUFFIXES[kind]}"
+
+
+def read_artifact(post_id: str, kind: str) -> Artifact | None:
+    entry = load_manifest(post_id)["artifacts"].get(kind)
+    if not entry:
+        return None
+    artifact = _from_entry(post_id, kind, entry)
+    if not artifact.path.exists():
+        return None
+    return artifact
+
+
+def existing_artifact_path(post_id: str, kind: str) -> Path | None:
+    artifact = read_artifact(post_id, kind)
+    if artifact:
+        return artifact.path
+    paths = {
+        "audio": roundup_audio_path,
+        "video": roundup_video_path,
+        "image": roundup_image_path,
+    }
+    for path in (paths[kind](_base_dir(), post_id), legacy_path(post_id, kind)):
+        if path.exists():
+            return path
+    return None
+
+
+def ensure_artifact(
+    post_id: str,
+    kind: str,
+    path: Path,
+    inputs: dict,
+    build: Callable[[Path], Path | None],
+    force: bool = False,
+) -> Artifact | None:
+    inputs_hash = input_hash(inputs)
+    with _post_lock(post_id):
+        manifest = load_manifest(post_id)
+        entry = manifest["artifacts"].get(kind)
+        if entry and not force:
+            artifact = _from_entry(post_id, kind, entry)
+            if entry.get("hash_version") != _HASH_VERSION and _is_current(artifact, artifact.input_hash):
+                artifact.input_hash = inputs_hash
+                manifest["artifacts"][kind] = _to_entry(artifact)
+                _save_manifest(post_id, manifest)
+                print(f"artifact_rehashed post_id={post_id} kind={kind}")
+                return artifact
+            if _is_current(artifact, inputs_hash):
+                return artifact
+            print(f"artifact_stale post_id={post_id} kind={kind}")
+        elif not entry and not force and path.exists():
+            # Renders from before the manifest existed are adopted as-is instead of re-rendered.
+            artifact = _describe(kind, path, inputs_hash)
+            manifest["artifacts"][kind] = _to_entry(artifact)
+            _save_manifest(post_id, manifest)
+            print(f"artifact_adopted post_id={post_id} kind={kind} bytes={artifact.size_bytes}")
+            return artifact
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Build next to the target and swap it in only on success, so a failed
+        # rebuild leaves the published file in place.
+        tmp = path.with_name(f"{path.stem}.building-{os.getpid()}-{threading.get_ident()}{path.suffix}")
+        try:
+            built = build(tmp)
+            if not built or not Path(built).exists():
+                return None
+            built = Path(built)
+            if built == tmp:
+                os.replace(tmp, path)
+                built = path
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        artifact = _describe(kind, built, inputs_hash)
+        artifact.rebuilt = True
+        manifest = load_manifest(post_id)
+        manifest["artifacts"][kind] = _to_entry(artifact)
+        _save_manifest(post_id, manifest)
+        print(
+            f"artifact_built post_id={post_id} kind={kind} bytes={artifact.size_bytes} "
+            f"duration={artifact.duration_seconds:.1f}"
+        )
+        return artifact
+
+
+def _audio_inputs(content: dict) -> dict:
+    # Only what is stored on the post: changing a settings default must not make
+    # published episodes stale and re-render the back catalogue.
+    return {
+        "dialogue": content.get("dialogue") or [],
+        "voice_a": (content.get("tts_voice_a") or "").strip() or None,
+        "voice_b": (content.get("tts_voice_b") or "").strip() or None,
+        "tts_provider": content.get("tts_provider"),
+        "tts_model": content.get("tts_model"),
+    }
+
+
+def ensure_roundup_audio(post_id: str, content: dict, force: bool = False) -> Artifact:
+    settings = get_settings()
+    inputs = _audio_inputs(content)
+
+    def build(path: Path) -> Path:
+        return render_audio_roundup(
+            inputs["dialogue"],
+            path,
+            voice_a=inputs["voice_a"] or settings.audio_roundup_voice_a.strip(),
+            voice_b=inputs["voice_b"] or settings.audio_roundup_voice_b.strip(),
+        )
+
+    artifact = ensure_artifact(
+        post_id, "audio", roundup_audio_path(_base_dir(), post_id), inputs, build, force=force
+    )
+    if not artifact:
+        raise RuntimeError("Unable to render roundup audio")
+    return artifact
+
+
+def ensure_roundup_image_artifact(
+    post_id: str, content: dict, allow_placeholder: bool = True, force: bool = False
+) -> Artifact | None:
+    prompt = content.get("image_prompt") or content.get("imagePrompt")
+    inputs = {"image_prompt": (prompt or "").strip()}
+    return ensure_artifact(
+        post_id,
+        "image",
+        roundup_image_path(_base_dir(), post_id),
+        inputs,
+        lambda path: ensure_roundup_image(prompt, path, allow_placeholder=allow_placeholder),
+        force=force,
+    )
+
+
+def roundup_cover_image(
+    post_id: str,
+    content: dict,
+    project_id: str | None = None,
+    project_prompt: str | None = None,
+) -> Path:
+    if project_id and project_prompt:
+        image = ensure_project_podcast_image(
+            project_prompt, podcast_image_path(_base_dir(), project_id), allow_placeholder=True
+        )
+        if image:
+            return image
+    artifact = ensure_roundup_image_artifact(post_id, content, allow_placeholder=True)
+    if not artifact:
+        raise RuntimeError("Unable to generate or create a roundup image")
+    return artifact.path
+
+
+def ensure_roundup_video(
+    post_id: str,
+    content: dict,
+    project_id: str | None = None,
+    project_prompt: str | None = None,
+    force: bool = False,
+) -> Artifact:
+    audio = ensure_roundup_audio(post_id, content)
+    image = roundup_cover_image(post_id, content, project_id, project_prompt)
+    inputs = {
+        "audio_checksum": audio.checksum,
+        "image_checksum": file_checksum(image),
+        "profile": _VIDEO_PROFILE,
+    }
+    duration = audio.duration_seconds or float(content.get("duration_seconds") or 0) or 60.0
+
+    def build(path: Path) -> Path:
+        return render_roundup_video(audio.path, image, path, duration, profile=_VIDEO_PROFILE)
+
+    artifact = ensure_artifact(
+        post_id, "video", roundup_video_path(_base_dir(), post_id), inputs, build, force=force
+    )
+    if not artifact:
+        raise RuntimeError("Unable to render roundup video")
+    return artifact
@@ -5,6 +5,7 @@ import shutil
 
 from app.ai.tts import generate_voiceover
 from app.config import get_settings
+from app.media.ffmpeg import ffmpeg_bin, run_ffmpeg
 
 
 def _chunks(text: str, max_chars: int | None = None) -> Iterable[str]:
@@ -62,12 +63,8 @@ def render_audio_roundup(
     concat_file.write_text("\n".join(concat_lines))
 
     # Stitch using ffmpeg concat demuxer
-    ffmpeg_bin = settings.ffmpeg_path or shutil.which("ffmpeg")
-    if not ffmpeg_bin:
-        raise RuntimeError("ffmpeg not found. Set FFMPEG_PATH or add ffmpeg to PATH.")
-
     cmd = [
-        ffmpeg_bin,
+        ffmpeg_bin(),
         "-y",
         "-f",
         "concat",
@@ -79,8 +76,6 @@ def render_audio_roundup(
         "copy",
         str(output_path.resolve()),
     ]
-    import subprocess
-
-    subprocess.run(cmd, check=True, cwd=tmp_dir)
+    run_ffmpeg(cmd, cwd=tmp_dir, label=f"audio:{output_path.name}")
     shutil.rmtree(tmp_dir, ignore_errors=True)
     return output_path
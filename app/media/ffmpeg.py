@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from app.config import get_settings
+
+# Every ffmpeg invocation goes through run_ffmpeg(): it caps concurrent encodes per
+# process, lowers CPU priority, enforces a wall-clock timeout and turns `-progress`
+# output into FfmpegProgress events.
+
+_STDERR_LINES = 200
+
+_slots: threading.BoundedSemaphore | None = None
+_slots_lock = threading.Lock()
+
+
+class FfmpegError(RuntimeError):
+    def __init__(self, message: str, returncode: int | None = None, stderr: str = "") -> None:
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+@dataclass
+class FfmpegProgress:
+    label: str
+    out_time_seconds: float = 0.0
+    frame: int = 0
+    fps: float = 0.0
+    speed: float | None = None
+    total_size: int = 0
+    duration_seconds: float | None = None
+    done: bool = False
+
+    @property
+    def percent(self) -> float | None:
+        if not self.duration_seconds:
+            return None
+        return min(100.0, round(self.out_time_seconds / self.duration_seconds * 100, 1))
+
+
+@dataclass
+class FfmpegResult:
+    returncode: int
+    elapsed_seconds: float
+    progress: FfmpegProgress
+
+
+def ffmpeg_bin() -> str:
+    settings = get_settings()
+    ffmpeg = settings.ffmpeg_path or shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found. Set FFMPEG_PATH or add ffmpeg to PATH.")
+    return ffmpeg
+
+
+def max_jobs() -> int:
+    configured = get_settings().ffmpeg_max_jobs
+    if configured and configured > 0:
+        return configured
+    return os.cpu_count() or 1
+
+
+def _job_slots() -> threading.BoundedSemaphore:
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(max_jobs())
+        return _slots
+
+
+def _priority_kwargs(nice: int) -> dict:
+    if nice <= 0 or os.name != "nt":
+        return {}
+    return {"creationflags": getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0)}
+
+
+def _lower_priority(pid: int, nice: int) -> None:
+    # Set from the parent after Popen: preexec_fn is not safe in a threaded process,
+    # and ffmpeg runs from pool threads here.
+    if nice <= 0 or not hasattr(os, "setpriority"):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, pid, min(os.getpriority(os.PRIO_PROCESS, 0) + nice, 19))
+    except OSError as exc:
+        print(f"ffmpeg_nice_failed pid={pid} error={exc}")
+
+
+def _parse_seconds(value: str) -> float:
+    # out_time is HH:MM:SS.micro; out_time_us/out_time_ms are both microseconds.
+    try:
+        h, m, s = value.split(":")
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    except ValueError:
+        return 0.0
+
+
+def _apply_progress(progress: FfmpegProgress, key: str, value: str) -> bool:
+    value = value.strip()
+    if key == "frame":
+        progress.frame = int(value or 0)
+    elif key == "fps":
+        try:
+            progress.fps = float(value)
+        except ValueError:
+            pass
+    elif key in ("out_time_us", "out_time_ms"):
+        if value.isdigit():
+            progress.out_time_seconds = int(value) / 1_000_000
+    elif key == "out_time" and not progress.out_time_seconds:
+        progress.out_time_seconds = _parse_seconds(value)
+    elif key == "total_size":
+        if value.isdigit():
+            progress.total_size = int(value)
+    elif key == "speed":
+        try:
+            progress.speed = float(value.rstrip("x"))
+        except ValueError:
+            progress.speed = None
+    elif key == "progress":
+        progress.done = value == "end"
+        return True
+    return False
+
+
+def run_ffmpeg(
+    cmd: list[str],
+    cwd: Path | None = None,
+    label: str = "ffmpeg",
+    timeout: float | None = None,
+    nice: int | None = None,
+    duration_seconds: float | None = None,
+    on_progress: Callable[[FfmpegProgress], None] | None = None,
+) -> FfmpegResult:
+    settings = get_settings()
+    if timeout is None:
+        timeout = settings.ffmpeg_timeout_seconds
+    if nice is None:
+        nice = settings.ffmpeg_nice
+    full_cmd = [cmd[0], "-hide_banner", "-nostats", "-progress", "pipe:1", *cmd[1:]]
+    stderr_tail: deque[str] = deque(maxlen=_STDERR_LINES)
+    progress = FfmpegProgress(label=label, duration_seconds=duration_seconds)
+    timed_out = threading.Event()
+
+    with _job_slots():
+        started = time.monotonic()
+        proc = subprocess.Popen(
+            full_cmd,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            **_priority_kwargs(nice),
+        )
+        _lower_priority(proc.pid, nice)
+
+        def drain_stderr() -> None:
+            for line in proc.stderr:
+                stderr_tail.append(line.rstrip())
+
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
+
+        reader = threading.Thread(target=drain_stderr, daemon=True)
+        reader.start()
+        timer = threading.Timer(timeout, kill) if timeout and timeout > 0 else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        try:
+            for line in proc.stdout:
+                key, sep, value = line.partition("=")
+                if not sep:
+                    continue
+                if _apply_progress(progress, key.strip(), value) and on_progress:
+                    on_progress(progress)
+            returncode = proc.wait()
+        finally:
+            if timer:
+                timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            reader.join(timeout=5)
+        elapsed = time.monotonic() - started
+
+    stderr = "\n".join(stderr_tail)
+    if timed_out.is_set():
+        print(f"ffmpeg_timeout label={label} seconds={elapsed:.1f}")
+        raise FfmpegError(f"ffmpeg timed out after {timeout}s ({label})", returncode, stderr)
+    if returncode != 0:
+        last = stderr_tail[-1] if stderr_tail else ""
+        print(f"ffmpeg_failed label={label} code={returncode} error={last}")
+        raise FfmpegError(f"ffmpeg failed with code {returncode} ({label}): {last}", returncode, stderr)
+    print(f"ffmpeg_done label={label} seconds={elapsed:.1f}")
+    return FfmpegResult(returncode=returncode, elapsed_seconds=elapsed, progress=progress)
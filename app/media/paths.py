@@ -27,3 +27,15 @@ def short_video_path(base_dir: Path, post_id: str) -> Path:
 
 def podcast_image_path(base_dir: Path, project_id: str) -> Path:
     return base_dir / "podcast" / project_id / "image.png"
+
+
+def podcast_feed_cache_path(base_dir: Path, project_id: str) -> Path:
+    return base_dir / "podcast" / project_id / "feed_cache.json"
+
+
+def roundup_youtube_upload_state_path(base_dir: Path, post_id: str) -> Path:
+    return roundup_dir(base_dir, post_id) / "youtube_upload.json"
+
+
+def scheduler_state_path(base_dir: Path) -> Path:
+    return base_dir / "scheduler_state.json"
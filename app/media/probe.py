@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import struct
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+
+# Pure-Python probes for the media we produce (MP3 voiceovers, PNG artwork, MP4 renders).
+# Avoids spawning ffprobe for simple duration/dimension questions.
+
+_MP3_BITRATES = {
+    # (mpeg1, layer) -> kbps table indexed by the 4-bit bitrate index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia"}
+
+
+@dataclass
+class MediaInfo:
+    kind: str
+    duration_seconds: float = 0.0
+    width: int | None = None
+    height: int | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+    bitrate_kbps: int | None = None
+
+
+@dataclass
+class _Mp3Frame:
+    mpeg1: bool
+    layer: int
+    bitrate_kbps: int
+    sample_rate: int
+    channels: int
+    samples: int
+    length: int
+
+
+def _parse_mp3_header(data: bytes | memoryview, pos: int) -> _Mp3Frame | None:
+    if pos + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_idx = b2 >> 4
+    rate_idx = (b2 >> 2) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+    layer = 4 - layer_bits
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_idx]
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        length = (samples // 8) * bitrate * 1000 // sample_rate + padding
+    if length < 4:
+        return None
+    return _Mp3Frame(mpeg1, layer, bitrate, sample_rate, channels, samples, length)
+
+
+def _skip_id3v2(data: bytes) -> int:
+    pos = 0
+    while data[pos : pos + 3] == b"ID3" and pos + 10 <= len(data):
+        flags = data[pos + 5]
+        size_bytes = data[pos + 6 : pos + 10]
+        size = 0
+        for b in size_bytes:
+            size = (size << 7) | (b & 0x7F)
+        pos += 10 + size + (10 if flags & 0x10 else 0)
+    return pos
+
+
+def _info_frame_count(data: bytes, pos: int, frame: _Mp3Frame) -> tuple[int | None, int | None]:
+    # Xing/Info (LAME) header lives after the side info of the first frame.
+    if frame.mpeg1:
+        side_info = 17 if frame.channels == 1 else 32
+    else:
+        side_info = 9 if frame.channels == 1 else 17
+    xing = pos + 4 + side_info
+    tag = data[xing : xing + 4]
+    if tag in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4 : xing + 8])[0]
+        cursor = xing + 8
+        frames = None
+        size = None
+        if flags & 0x01:
+            frames = struct.unpack(">I", data[cursor : cursor + 4])[0]
+            cursor += 4
+        if flags & 0x02:
+            size = struct.unpack(">I", data[cursor : cursor + 4])[0]
+        return frames, size
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI":
+        size, frames = struct.unpack(">II", data[vbri + 10 : vbri + 18])
+        return frames, size
+    return None, None
+
+
+def mp3_info(path: Path) -> MediaInfo | None:
+    data = Path(path).read_bytes()
+    end = len(data)
+    if end >= 128 and data[end - 128 : end - 125] == b"TAG":
+        end -= 128
+    pos = _skip_id3v2(data)
+    first = None
+    while pos + 4 <= end:
+        first = _parse_mp3_header(data, pos)
+        if first and (pos + first.length == end or _parse_mp3_header(data, pos + first.length)):
+            break
+        first = None
+        pos += 1
+    if not first:
+        return None
+    info = MediaInfo(
+        kind="mp3",
+        sample_rate=first.sample_rate,
+        channels=first.channels,
+        bitrate_kbps=first.bitrate_kbps,
+    )
+
+    frames, size = _info_frame_count(data, pos, first)
+    audio_bytes = end - pos
+    # Trust the info header only when its byte count matches the file; concatenated
+    # parts can carry a stale header from the first chunk.
+    if frames and (size is None or abs(size - audio_bytes) <= max(audio_bytes // 100, first.length)):
+        info.duration_seconds = frames * first.samples / first.sample_rate
+        if info.duration_seconds > 0:
+            info.bitrate_kbps = int(round(audio_bytes * 8 / info.duration_seconds / 1000))
+        return info
+    if frames is not None or size is not None:
+        pos += first.length
+
+    total_samples = 0
+    total_bytes = 0
+    while pos + 4 <= end:
+        frame = _parse_mp3_header(data, pos)
+        if not frame or frame.sample_rate != first.sample_rate:
+            pos += 1
+            continue
+        total_samples += frame.samples
+        total_bytes += frame.length
+        pos += frame.length
+    info.duration_seconds = total_samples / first.sample_rate
+    if info.duration_seconds > 0:
+        info.bitrate_kbps = int(round(total_bytes * 8 / info.duration_seconds / 1000))
+    return info
+
+
+def png_info(path: Path) -> MediaInfo | None:
+    with Path(path).open("rb") as handle:
+        header = handle.read(24)
+    if len(header) < 24 or header[:8] != _PNG_SIGNATURE or header[12:16] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", header[16:24])
+    return MediaInfo(kind="png", width=width, height=height)
+
+
+def _mp4_boxes(handle, start: int, end: int):
+    pos = start
+    while pos + 8 <= end:
+        handle.seek(pos)
+        header = handle.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_len = 8
+        if size == 1:
+            size = struct.unpack(">Q", handle.read(8))[0]
+            header_len = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_len:
+            return
+        yield box_type, pos + header_len, pos + size
+        pos += size
+
+
+def _mp4_walk(handle, start: int, end: int, info: MediaInfo) -> None:
+    for box_type, body, box_end in _mp4_boxes(handle, start, end):
+        if box_type in _MP4_CONTAINERS:
+            _mp4_walk(handle, body, box_end, info)
+        elif box_type == b"mvhd":
+            handle.seek(body)
+            version = handle.read(1)[0]
+            if version == 1:
+                handle.seek(body + 4 + 16)
+                timescale, duration = struct.unpack(">IQ", handle.read(12))
+            else:
+                handle.seek(body + 4 + 8)
+                timescale, duration = struct.unpack(">II", handle.read(8))
+            if timescale:
+                info.duration_seconds = duration / timescale
+        elif box_type == b"tkhd" and not info.width:
+            handle.seek(body)
+            version = handle.read(1)[0]
+            # width/height are the last 8 bytes of tkhd (16.16 fixed point)
+            offset = 4 + (32 if version == 1 else 20) + 8 + 8 + 36
+            handle.seek(body + offset)
+            raw = handle.read(8)
+            if len(raw) == 8:
+                width, height = struct.unpack(">II", raw)
+                if width and height:
+                    info.width = width >> 16
+                    info.height = height >> 16
+
+
+def mp4_info(path: Path) -> MediaInfo | None:
+    path = Path(path)
+    end = path.stat().st_size
+    with path.open("rb") as handle:
+        head = handle.read(8)
+        if len(head) < 8 or head[4:8] != b"ftyp":
+            return None
+        info = MediaInfo(kind="mp4")
+        _mp4_walk(handle, 0, end, info)
+    return info
+
+
+def wav_info(path: Path) -> MediaInfo | None:
+    with wave.open(str(path), "rb") as handle:
+        rate = handle.getframerate()
+        frames = handle.getnframes()
+        return MediaInfo(
+            kind="wav",
+            duration_seconds=frames / rate if rate else 0.0,
+            sample_rate=rate,
+            channels=handle.getnchannels(),
+        )
+
+
+_PROBES = {
+    ".mp3": mp3_info,
+    ".png": png_info,
+    ".mp4": mp4_info,
+    ".m4a": mp4_info,
+    ".wav": wav_info,
+}
+
+
+def probe(path: Path) -> MediaInfo | None:
+    path = Path(path)
+    handler = _PROBES.get(path.suffix.lower())
+    if not handler or not path.exists():
+        return None
+    try:
+        return handler(path)
+    except Exception as exc:
+        print(f"media_probe_failed path={path} error={exc}")
+        return None
+
+
+def audio_duration_seconds(path: Path) -> float:
+    info = probe(path)
+    return info.duration_seconds if info else 0.0
@@ -1,6 +1,4 @@
 import base64
-import shutil
-import subprocess
 from pathlib import Path
 
 import requests
@@ -8,9 +6,7 @@ from PIL import Image, ImageDraw, ImageOps
 
 from app.ai.image import generate_image
 from app.config import get_settings
-from app.media.audio import render_audio_roundup
 from app.media.video import assemble_video
-from app.media.paths import podcast_image_path
 
 
 def _download_image(url: str, path: Path) -> None:
@@ -44,33 +40,6 @@ def _create_placeholder(path: Path, text: str = "Audio Roundup") -> None:
     img.save(path)
 
 
-def _audio_duration_seconds(audio_path: Path) -> float:
-    settings = get_settings()
-    ffprobe = shutil.which("ffprobe")
-    if settings.ffmpeg_path:
-        base = Path(settings.ffmpeg_path).parent
-        candidate = base / "ffprobe.exe"
-        if candidate.exists():
-            ffprobe = str(candidate)
-    if not ffprobe:
-        return 0.0
-    cmd = [
-        ffprobe,
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "default=noprint_wrappers=1:nokey=1",
-        str(audio_path),
-    ]
-    try:
-        out = subprocess.check_output(cmd, text=True).strip()
-        return float(out) if out else 0.0
-    except Exception:
-        return 0.0
-
-
 def ensure_roundup_image(prompt: str | None, output_path: Path, allow_placeholder: bool = False) -> Path | None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     if output_path.exists():
@@ -119,44 +88,20 @@ def ensure_project_podcast_image(
     return output_path
 
 
-def render_audio_roundup_video(
-    content: dict,
-    post_id: str,
+def render_roundup_video(
+    audio_path: Path,
+    image: Path,
     output_path: Path,
-    project_id: str | None = None,
-    project_prompt: str | None = None,
+    duration_seconds: float,
+    profile: str = "still",
 ) -> Path:
-    settings = get_settings()
     output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    audio_path = output_path.parent / "audio.mp3"
-    if not audio_path.exists():
-        dialogue = content.get("dialogue") or []
-        voice_a = content.get("tts_voice_a")
-        voice_b = content.get("tts_voice_b")
-        render_audio_roundup(dialogue, audio_path, voice_a=voice_a, voice_b=voice_b)
-
-    image = None
-    if project_id and project_prompt:
-        base_dir = Path(settings.media_output_dir)
-        image = ensure_project_podcast_image(
-            project_prompt, podcast_image_path(base_dir, project_id), allow_placeholder=True
-        )
-    if not image:
-        image_path = output_path.parent / "image.png"
-        prompt = content.get("image_prompt") or content.get("imagePrompt")
-        image = ensure_roundup_image(prompt, image_path, allow_placeholder=True)
-    if not image:
-        raise RuntimeError("Unable to generate or create a roundup image")
-
-    duration = _audio_duration_seconds(audio_path)
-    if not duration:
-        duration = float(content.get("duration_seconds") or 0) or 60.0
-    seconds_per_image = max(2, int(round(duration)))
+    seconds_per_image = max(2, int(round(duration_seconds)))
     assemble_video(
         images=[image],
         audio_path=audio_path,
         output_path=output_path,
         seconds_per_image=seconds_per_image,
+        profile=profile,
     )
     return output_path
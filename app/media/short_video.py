@@ -1,7 +1,8 @@
 import base64
 import json
 import shutil
-import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Iterable
 
@@ -12,6 +13,9 @@ from app.ai.asr import transcribe_audio
 from app.ai.image import generate_image
 from app.ai.tts import generate_voiceover
 from app.config import get_settings
+from app.media.align import align_chunk, align_chunks, decode_pcm, silence_intervals
+from app.media.ffmpeg import ffmpeg_bin, run_ffmpeg
+from app.media.probe import audio_duration_seconds
 from app.media.video import assemble_video, create_placeholder_images
 
 
@@ -50,29 +54,26 @@ def _resize_to_vertical(path: Path, size: tuple[int, int] = (1080, 1920)) -> Non
     img.save(path)
 
 
-def _render_voiceover(script: str, output_path: Path, voice: str = "onyx") -> Path:
-    settings = get_settings()
+def _render_voiceover(script: str, output_path: Path, voice: str = "onyx") -> list[tuple[str, float]]:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     tmp_dir = output_path.parent / "tmp_voice"
     tmp_dir.mkdir(parents=True, exist_ok=True)
     parts: list[Path] = []
+    timed_chunks: list[tuple[str, float]] = []
     idx = 1
     for chunk in _chunks(script):
         part = tmp_dir / f"chunk_{idx:03d}.mp3"
         generate_voiceover(chunk, part, voice=voice)
         parts.append(part)
+        timed_chunks.append((chunk, audio_duration_seconds(part)))
         idx += 1
     if not parts:
         raise RuntimeError("No voiceover chunks generated")
 
-    ffmpeg_bin = settings.ffmpeg_path or shutil.which("ffmpeg")
-    if not ffmpeg_bin:
-        raise RuntimeError("ffmpeg not found. Set FFMPEG_PATH or add ffmpeg to PATH.")
-
     concat_file = tmp_dir / "concat.txt"
     concat_file.write_text("\n".join([f"file '{p.name}'" for p in parts]))
     cmd = [
-        ffmpeg_bin,
+        ffmpeg_bin(),
         "-y",
         "-f",
         "concat",
@@ -84,8 +85,57 @@ def _render_voiceover(script: str, output_path: Path, voice: str = "onyx") -> Pa
         "copy",
         str(output_path.resolve()),
     ]
-    subprocess.run(cmd, check=True, cwd=tmp_dir)
-    return output_path
+    run_ffmpeg(cmd, cwd=tmp_dir, label=f"voiceover:{output_path.name}")
+    return timed_chunks
+
+
+def _generate_scene_image(prompt: str, path: Path, retries: int) -> Path:
+    for attempt in range(retries + 1):
+        try:
+            result = generate_image(prompt, size="1024x1536")
+            if result.startswith("http"):
+                _download_image(result, path)
+            else:
+                _write_image_from_b64(result, path)
+            _resize_to_vertical(path)
+            return path
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(1 + attempt)
+    return path
+
+
+def _generate_scene_images(prompts: list[str], scene_texts: list[str], tmp_dir: Path) -> list[Path]:
+    settings = get_settings()
+    workers = max(1, min(settings.image_generation_workers, len(prompts)))
+    images: list[Path | None] = [None] * len(prompts)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _generate_scene_image,
+                prompt,
+                tmp_dir / f"scene_{idx + 1:02d}.png",
+                settings.image_generation_retries,
+            ): idx
+            for idx, prompt in enumerate(prompts)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                images[idx] = future.result()
+            except Exception as exc:
+                print(f"image_generation_failed scene={idx + 1} error={exc}")
+
+    failed = [idx for idx, img in enumerate(images) if img is None]
+    for idx in failed:
+        text = scene_texts[idx] if idx < len(scene_texts) else ""
+        placeholder_dir = tmp_dir / f"placeholder_{idx + 1:02d}"
+        placeholder = create_placeholder_images([text or prompts[idx][:120]], placeholder_dir)[0]
+        images[idx] = placeholder.replace(tmp_dir / f"scene_{idx + 1:02d}.png")
+        shutil.rmtree(placeholder_dir, ignore_errors=True)
+    print(f"scene_images_done total={len(prompts)} generated={len(prompts) - len(failed)} placeholders={len(failed)}")
+    return [img for img in images if img is not None]
 
 
 def _escape_ass(text: str) -> str:
@@ -129,28 +179,6 @@ def _write_ass_karaoke(words: list[dict], path: Path, max_words: int = 8) -> Pat
     return path
 
 
-def _audio_duration_seconds(audio_path: Path) -> float:
-    settings = get_settings()
-    ffprobe = settings.ffmpeg_path or shutil.which("ffprobe")
-    if not ffprobe:
-        return 0.0
-    cmd = [
-        ffprobe,
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "default=noprint_wrappers=1:nokey=1",
-        str(audio_path),
-    ]
-    try:
-        out = subprocess.check_output(cmd, text=True).strip()
-        return float(out) if out else 0.0
-    except Exception:
-        return 0.0
-
-
 def _format_ass_time(seconds: float) -> str:
     total_cs = int(round(seconds * 100))
     h = total_cs // 360000
@@ -160,6 +188,27 @@ def _format_ass_time(seconds: float) -> str:
     return f"{h:d}:{m:02d}:{s:02d}.{cs:02d}"
 
 
+def _asr_word_timings(voice_path: Path) -> list[dict]:
+    normalized: list[dict] = []
+    try:
+        asr = transcribe_audio(str(voice_path), with_timestamps=True)
+        if isinstance(asr, dict):
+            words = asr.get("words") or []
+            if not words and isinstance(asr.get("segments"), list):
+                for seg in asr.get("segments"):
+                    for w in seg.get("words") or []:
+                        words.append(w)
+            for w in words:
+                if not isinstance(w, dict):
+                    continue
+                if "start" in w and "end" in w and "word" in w:
+                    normalized.append(w)
+    except Exception as exc:
+        print(f"asr_failed error={exc}")
+        return []
+    return normalized
+
+
 def render_short_video(content: dict, output_path: Path) -> Path:
     settings = get_settings()
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -174,63 +223,38 @@ def render_short_video(content: dict, output_path: Path) -> Path:
     scene_texts = [s.get("scene_text") or "" for s in scenes] if scenes else []
     image_prompts = [s.get("image_prompt") or "" for s in scenes] if scenes else []
 
-    images: list[Path] = []
     if settings.enable_image_generation and image_prompts:
-        for idx, prompt in enumerate(image_prompts, start=1):
-            img_path = tmp_dir / f"scene_{idx:02d}.png"
-            try:
-                result = generate_image(prompt, size="1024x1536")
-                if result.startswith("http"):
-                    _download_image(result, img_path)
-                else:
-                    _write_image_from_b64(result, img_path)
-                _resize_to_vertical(img_path)
-                images.append(img_path)
-            except Exception as exc:
-                print(f"image_generation_failed scene={idx} error={exc}")
-                images = []
-                break
-
-    if not images:
+        images = _generate_scene_images(image_prompts, scene_texts, tmp_dir)
+    else:
         images = create_placeholder_images(
             scene_texts or [script[:120] or "Scene"] * 8,
             tmp_dir,
         )
 
     voice_path = tmp_dir / "voiceover.mp3"
-    _render_voiceover(script, voice_path, voice=settings.audio_roundup_voice_a)
+    timed_chunks = _render_voiceover(script, voice_path, voice=settings.audio_roundup_voice_a)
 
     captions_path = tmp_dir / "captions.ass"
     normalized: list[dict] = []
-    if settings.enable_asr:
-        try:
-            asr = transcribe_audio(str(voice_path), with_timestamps=True)
-            if isinstance(asr, dict):
-                words = asr.get("words") or []
-                if not words and isinstance(asr.get("segments"), list):
-                    for seg in asr.get("segments"):
-                        for w in seg.get("words") or []:
-                            words.append(w)
-                for w in words:
-                    if not isinstance(w, dict):
-                        continue
-                    if "start" in w and "end" in w and "word" in w:
-                        normalized.append(w)
-        except Exception as exc:
-            print(f"asr_failed error={exc}")
-            normalized = []
+    alignment = (settings.caption_alignment or "energy").lower()
+    if alignment == "asr" and settings.enable_asr:
+        normalized = _asr_word_timings(voice_path)
+    elif all(duration > 0 for _, duration in timed_chunks):
+        silences = None
+        if alignment == "energy":
+            try:
+                silences = silence_intervals(decode_pcm(voice_path, tmp_dir))
+            except Exception as exc:
+                print(f"caption_silence_detection_failed error={exc}")
+        normalized = align_chunks(timed_chunks, silences)
 
     if not normalized:
-        duration = _audio_duration_seconds(voice_path) or float(duration_seconds)
+        duration = audio_duration_seconds(voice_path) or float(duration_seconds)
         tokens = (script or "").split()
         if not tokens and captions:
             tokens = " ".join(captions).split()
         if tokens and duration > 0:
-            step = duration / max(1, len(tokens))
-            t = 0.0
-            for token in tokens:
-                normalized.append({"word": token, "start": t, "end": t + step})
-                t += step
+            normalized = align_chunk(" ".join(tokens), 0.0, duration)
 
     _write_ass_karaoke(normalized, captions_path)
 
@@ -241,6 +265,7 @@ def render_short_video(content: dict, output_path: Path) -> Path:
         output_path=output_path,
         seconds_per_image=seconds_per_image,
         captions_path=captions_path,
+        profile="short",
     )
     shutil.rmtree(tmp_dir, ignore_errors=True)
     return output_path
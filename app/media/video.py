@@ -1,11 +1,10 @@
-import shutil
-import subprocess
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Sequence
+from typing import Callable, Sequence
 
 from PIL import Image, ImageDraw, ImageFont
 
-from app.config import get_settings
+from app.media.ffmpeg import FfmpegProgress, ffmpeg_bin, run_ffmpeg
 
 
 def create_placeholder_images(
@@ -26,23 +25,96 @@ def create_placeholder_images(
     return images
 
 
-def assemble_video(
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    fps: int
+    video_args: tuple[str, ...] = ()
+    gop_seconds: int | None = None
+    copy_audio: bool = False
+
+
+# Named encoder settings; assemble_video(profile=None) keeps the original command.
+RENDER_PROFILES: dict[str, RenderProfile] = {
+    # One static frame for a whole episode: 1 fps, cheapest x264 preset, audio copied as-is.
+    "still": RenderProfile(
+        name="still",
+        fps=1,
+        video_args=(
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-tune", "stillimage",
+            "-crf", "28",
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+        ),
+        gop_seconds=120,
+        copy_audio=True,
+    ),
+    # Vertical 1080x1920 shorts with burned-in captions.
+    "short": RenderProfile(
+        name="short",
+        fps=30,
+        video_args=(
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "23",
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+        ),
+        gop_seconds=2,
+        copy_audio=True,
+    ),
+}
+
+# Audio codecs (by source suffix) each output container accepts without re-encoding.
+_COPYABLE_AUDIO: dict[str, set[str]] = {
+    ".mp4": {".mp3", ".m4a", ".aac"},
+    ".mov": {".mp3", ".m4a", ".aac"},
+    ".mkv": {".mp3", ".m4a", ".aac", ".opus", ".ogg", ".wav", ".flac"},
+}
+
+
+def get_render_profile(profile: str | RenderProfile | None) -> RenderProfile | None:
+    if profile is None or isinstance(profile, RenderProfile):
+        return profile
+    try:
+        return RENDER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown render profile: {profile}") from None
+
+
+def _audio_args(profile: RenderProfile, audio_path: Path, output_path: Path) -> list[str]:
+    allowed = _COPYABLE_AUDIO.get(output_path.suffix.lower()) or set()
+    if profile.copy_audio and audio_path.suffix.lower() in allowed:
+        return ["-c:a", "copy"]
+    return ["-c:a", "aac", "-b:a", "128k"]
+
+
+def build_video_command(
+    ffmpeg: str,
     images: Sequence[Path],
     audio_path: Path | None,
     output_path: Path,
     fps: int = 30,
     seconds_per_image: int = 6,
     captions_path: Path | None = None,
-) -> None:
+    profile: str | RenderProfile | None = None,
+) -> list[str]:
     if not images:
         raise ValueError("No images to assemble")
-
-    settings = get_settings()
-    ffmpeg_bin = settings.ffmpeg_path or shutil.which("ffmpeg")
-    if not ffmpeg_bin:
-        raise RuntimeError("ffmpeg not found. Set FFMPEG_PATH or add ffmpeg to PATH.")
+    render = get_render_profile(profile)
+    if render:
+        fps = render.fps
 
     work_dir = images[0].parent
+    audio_arg = str(audio_path.resolve()) if audio_path else None
+    captions_arg = str(captions_path.resolve()) if captions_path else None
+    if audio_path and audio_path.parent == work_dir:
+        audio_arg = audio_path.name
+    if captions_path and captions_path.parent == work_dir:
+        captions_arg = captions_path.name
+
     concat_file = work_dir / "concat.txt"
     lines = []
     for img in images:
@@ -52,15 +124,8 @@ def assemble_video(
     lines.append(f"file '{images[-1].name}'")
     concat_file.write_text("\n".join(lines))
 
-    audio_arg = str(audio_path.resolve()) if audio_path else None
-    captions_arg = str(captions_path.resolve()) if captions_path else None
-    if audio_path and audio_path.parent == work_dir:
-        audio_arg = audio_path.name
-    if captions_path and captions_path.parent == work_dir:
-        captions_arg = captions_path.name
-
     cmd = [
-        ffmpeg_bin,
+        ffmpeg,
         "-y",
         "-f",
         "concat",
@@ -68,15 +133,57 @@ def assemble_video(
         "0",
         "-i",
         "concat.txt",
-        "-vsync",
-        "vfr",
-        "-r",
-        str(fps),
     ]
+    if not render:
+        # Original command for callers that don't pick a profile.
+        cmd += ["-vsync", "vfr", "-r", str(fps)]
+        if audio_path:
+            cmd += ["-i", audio_arg, "-shortest"]
+        if captions_path:
+            cmd += ["-vf", f"subtitles={captions_arg}"]
+        cmd += [str(output_path.resolve())]
+        return cmd
+
     if audio_path:
         cmd += ["-i", audio_arg, "-shortest"]
     if captions_path:
         cmd += ["-vf", f"subtitles={captions_arg}"]
+    cmd += ["-r", str(fps)]
+    cmd += list(render.video_args)
+    if render.gop_seconds:
+        cmd += ["-g", str(max(1, fps * render.gop_seconds))]
+    if audio_path:
+        cmd += _audio_args(render, audio_path, output_path)
     cmd += [str(output_path.resolve())]
+    return cmd
 
-    subprocess.run(cmd, check=True, cwd=work_dir)
+
+def assemble_video(
+    images: Sequence[Path],
+    audio_path: Path | None,
+    output_path: Path,
+    fps: int = 30,
+    seconds_per_image: int = 6,
+    captions_path: Path | None = None,
+    profile: str | RenderProfile | None = None,
+    on_progress: Callable[[FfmpegProgress], None] | None = None,
+) -> None:
+    if not images:
+        raise ValueError("No images to assemble")
+    cmd = build_video_command(
+        ffmpeg_bin(),
+        images,
+        audio_path,
+        output_path,
+        fps=fps,
+        seconds_per_image=seconds_per_image,
+        captions_path=captions_path,
+        profile=profile,
+    )
+    run_ffmpeg(
+        cmd,
+        cwd=images[0].parent,
+        label=f"video:{output_path.name}",
+        duration_seconds=seconds_per_image * len(images),
+        on_progress=on_progress,
+    )
@@ -1,3 +1,6 @@
+from collections import Counter
+from collections.abc import Callable
+from contextlib import ExitStack
 from datetime import datetime, timezone, timedelta
 import hashlib
 import re
@@ -7,9 +10,10 @@ from app.ai.extract import extract_summary
 from app.ai.first_judge import default_format_rules, judge_summary
 from app.ai.generate import generate_video_variant, generation_models
 from app.ai.second_judge import pick_winner
-from app.admin import ingest_source_items, list_projects, scrape_project
 from app.config import get_settings
 from app.db import get_supabase
+from app.locks import Lease, distributed_lock
+from app.stats_cache import invalidate_project_stats
 
 
 def _now() -> str:
@@ -348,6 +352,7 @@ def update_model_performance(model: str, content_type: str, winner: bool) -> Non
 
 
 def run_second_judge(limit: int = 20) -> int:
+    # Returns the number of posts judged (not articles), so it can reach limit.
     items = fetch_for_second_judge(limit=limit)
     grouped = group_versions(items)
     count = 0
@@ -363,7 +368,7 @@ def run_second_judge(limit: int = 20) -> int:
         mark_post_selected(winner_post["id"])
         for v in versions:
             update_model_performance(v["model"], fmt, v["id"] == winner_post["id"])
-        count += 1
+        count += len(versions)
     return count
 
 
@@ -374,7 +379,7 @@ def fetch_for_audio_roundup(
     since = datetime.now(timezone.utc) - timedelta(hours=hours)
     query = (
         sb.table("articles")
-        .select("id, title, summary, content, judge_score, scraped_at")
+        .select("id, project_id, title, summary, content, judge_score, scraped_at")
         .eq("processed", True)
         .eq("scored", True)
         .eq("unusable", False)
@@ -403,10 +408,11 @@ def fetch_for_audio_roundup(
     return filtered[:limit]
 
 
-def insert_audio_roundup(model: str, content: dict) -> dict | None:
+def insert_audio_roundup(model: str, content: dict, project_id: str | None = None) -> dict | None:
     sb = get_supabase()
     row = {
         "article_id": None,
+        "project_id": project_id,
         "platform": "youtube",
         "content_type": "audio_roundup",
         "generating_model": model,
@@ -414,6 +420,7 @@ def insert_audio_roundup(model: str, content: dict) -> dict | None:
     }
     resp = sb.table("posts").insert(row).execute()
     data = resp.data or []
+    invalidate_project_stats(project_id)
     return data[0] if data else None
 
 
@@ -494,7 +501,34 @@ def _next_tts_combo() -> tuple[int, str, str] | None:
     return (idx, male, female)
 
 
-def run_audio_roundup(project_id: str | None = None, language: str | None = None) -> int:
+def run_audio_roundup(project_id: str | None = None, language: str | None = None) -> int | None:
+    # Returns None when another run holds one of the locks, 0 when there is nothing new.
+    settings = get_settings()
+    projects: set[str] | None = None
+    if project_id:
+        names = [f"audio-roundup:{project_id}"]
+    else:
+        # An unscoped roundup takes stories from any project, so it also locks each
+        # project it draws from; otherwise it could use the same articles as a
+        # concurrent per-project run.
+        items = fetch_for_audio_roundup(limit=settings.audio_roundup_size, hours=settings.audio_roundup_hours)
+        if not items:
+            return 0
+        projects = {item["project_id"] for item in items if item.get("project_id")}
+        names = ["audio-roundup:all"] + [f"audio-roundup:{pid}" for pid in sorted(projects)]
+    with ExitStack() as stack:
+        leases: list[Lease] = []
+        for name in names:
+            lease = stack.enter_context(distributed_lock(name))
+            if lease is None:
+                return None
+            leases.append(lease)
+        return _run_audio_roundup(project_id, language, leases, projects)
+
+
+def _run_audio_roundup(
+    project_id: str | None, language: str | None, leases: list[Lease], projects: set[str] | None
+) -> int:
     settings = get_settings()
     prompt_extra = None
     if project_id and not language:
@@ -504,6 +538,9 @@ def run_audio_roundup(project_id: str | None = None, language: str | None = None
     items = fetch_for_audio_roundup(
         limit=settings.audio_roundup_size, hours=settings.audio_roundup_hours, project_id=project_id
     )
+    if projects is not None:
+        # Re-fetched under the locks; skip stories from projects that were not locked.
+        items = [item for item in items if not item.get("project_id") or item["project_id"] in projects]
     if not items:
         return 0
     stories = []
@@ -528,7 +565,13 @@ def run_audio_roundup(project_id: str | None = None, language: str | None = None
         provider = (settings.tts_provider or "openai").lower()
         content["tts_provider"] = provider
         content["tts_model"] = settings.inworld_tts_model if provider == "inworld" else settings.tts_model
-    post = insert_audio_roundup(settings.audio_roundup_model, content)
+    if not project_id:
+        # Unscoped roundups belong to the project most of their stories came from.
+        counts = Counter(item.get("project_id") for item in items if item.get("project_id"))
+        project_id = counts.most_common(1)[0][0] if counts else None
+    for lease in leases:
+        lease.check()
+    post = insert_audio_roundup(settings.audio_roundup_model, content, project_id=project_id)
     if post:
         usage_rows = [
             {
@@ -564,57 +607,31 @@ def fetch_latest_audio_roundup_for_project(project_id: str) -> dict | None:
     sb = get_supabase()
     resp = (
         sb.table("posts")
-        .select("id, content, created_at")
+        .select("id, content, created_at, posted")
+        .eq("project_id", project_id)
         .eq("content_type", "audio_roundup")
         .order("created_at", desc=True)
-        .limit(50)
+        .limit(1)
         .execute()
     )
-    candidates = resp.data or []
-    if not candidates:
-        return None
-    post_ids = [row.get("id") for row in candidates if row.get("id")]
-    if not post_ids:
-        return None
-    usage = (
-        sb.table("article_usage")
-        .select("post_id, article_id")
-        .in_("post_id", post_ids)
+    data = resp.data or []
+    return data[0] if data else None
+
+
+def fetch_audio_roundup_content(post_id: str) -> dict | None:
+    sb = get_supabase()
+    resp = (
+        sb.table("posts")
+        .select("id, content")
+        .eq("id", post_id)
+        .eq("content_type", "audio_roundup")
+        .limit(1)
         .execute()
-        .data
-        or []
     )
-    if not usage:
-        return None
-    article_ids = [row.get("article_id") for row in usage if row.get("article_id")]
-    if not article_ids:
+    data = resp.data or []
+    if not data:
         return None
-    articles = (
-        sb.table("articles")
-        .select("id, project_id")
-        .in_("id", article_ids)
-        .execute()
-        .data
-        or []
-    )
-    project_lookup = {row["id"]: row.get("project_id") for row in articles if row.get("id")}
-    post_projects: dict[str, set[str]] = {}
-    for row in usage:
-        post_id = row.get("post_id")
-        article_id = row.get("article_id")
-        if not post_id or not article_id:
-            continue
-        project = project_lookup.get(article_id)
-        if not project:
-            continue
-        post_projects.setdefault(post_id, set()).add(project)
-
-    for row in candidates:
-        post_id = row.get("id")
-        projects = post_projects.get(post_id) or set()
-        if project_id in projects:
-            return row
-    return None
+    return data[0].get("content") or {}
 
 
 def fetch_latest_selected_video() -> dict | None:
@@ -637,6 +654,14 @@ def update_post_media(post_id: str, media_url: str) -> None:
     sb.table("posts").update({"media_urls": [media_url]}).eq("id", post_id).execute()
 
 
+def update_post_audio_stats(post_id: str, audio_bytes: int, duration_seconds: float | None) -> None:
+    payload: dict = {"audio_bytes": int(audio_bytes)}
+    if duration_seconds:
+        payload["audio_duration_seconds"] = round(float(duration_seconds), 3)
+    sb = get_supabase()
+    sb.table("posts").update(payload).eq("id", post_id).execute()
+
+
 def _chunk_ids(values: list[str], size: int = 200) -> list[list[str]]:
     return [values[i : i + size] for i in range(0, len(values), size)]
 
@@ -646,6 +671,13 @@ def cleanup_old_data(
     delete_legacy: bool = True,
     wipe_unusable: bool = True,
 ) -> dict:
+    with distributed_lock("cleanup") as lease:
+        if lease is None:
+            return {"locked": 1}
+        return _cleanup_old_data(hours, delete_legacy, wipe_unusable)
+
+
+def _cleanup_old_data(hours: int, delete_legacy: bool, wipe_unusable: bool) -> dict:
     sb = get_supabase()
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
     cutoff_iso = cutoff.isoformat()
@@ -742,12 +774,26 @@ def log_pipeline_run(
         return
 
 
-def run_project_pipeline(project_id: str, max_items: int = 10) -> dict:
+def run_project_pipeline(
+    project_id: str,
+    max_items: int = 10,
+    on_progress: Callable[[float, str], None] | None = None,
+) -> dict:
+    def report(progress: float, stage: str) -> None:
+        if on_progress:
+            on_progress(progress, stage)
+
+    # admin pulls in the scraping libraries; only full pipeline runs need them.
+    from app.admin import ingest_source_items, scrape_project
+
     started_at = _now()
     results: dict = {}
+    report(0.0, "scrape")
     scrape_results = scrape_project(project_id, max_items=max_items)
     results["scrape"] = [r.__dict__ for r in scrape_results]
+    report(0.2, "ingest")
     results["ingest"] = ingest_source_items(limit=50, fetch_full=True, project_id=project_id)
+    report(0.35, "extract")
     extract_total = 0
     judge_total = 0
     max_extract = 200
@@ -757,6 +803,7 @@ def run_project_pipeline(project_id: str, max_items: int = 10) -> dict:
         extract_total += count
         if count == 0:
             break
+    report(0.65, "judge")
     while judge_total < max_judge:
         count = run_first_judge(limit=50, project_id=project_id)
         judge_total += count
@@ -764,14 +811,18 @@ def run_project_pipeline(project_id: str, max_items: int = 10) -> dict:
             break
     results["extract"] = extract_total
     results["judge"] = judge_total
+    report(0.9, "dedupe")
     results["dedupe"] = dedupe_articles(project_id)
     results["unusable"] = mark_low_score_unusable(project_id)
     finished_at = _now()
     log_pipeline_run(project_id, results, started_at=started_at, finished_at=finished_at)
+    invalidate_project_stats(project_id)
     return results
 
 
 def run_pipeline_all(max_items: int = 10) -> list[dict]:
+    from app.admin import list_projects
+
     results: list[dict] = []
     projects = list_projects()
     for project in projects:
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.config import get_settings
+from app.media.paths import podcast_feed_cache_path
+
+# Per-project cache of rendered RSS <item> fragments and the hash of the last
+# uploaded feed, so a publish run that changes nothing rebuilds and uploads nothing.
+
+
+@dataclass
+class CachedItem:
+    key: str
+    xml: str
+    audio_url: str
+    published_at: str
+
+
+@dataclass
+class FeedCache:
+    path: Path
+    items: dict[str, CachedItem] = field(default_factory=dict)
+    feed_hash: str | None = None
+
+
+def content_hash(*parts: object) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_feed_cache(project_id: str) -> FeedCache:
+    path = podcast_feed_cache_path(Path(get_settings().media_output_dir), project_id)
+    cache = FeedCache(path=path)
+    if not path.exists():
+        return cache
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"podcast_feed_cache_unreadable project_id={project_id} error={exc}")
+        return cache
+    cache.feed_hash = data.get("feed_hash")
+    for guid, item in (data.get("items") or {}).items():
+        try:
+            cache.items[guid] = CachedItem(
+                key=item["key"],
+                xml=item["xml"],
+                audio_url=item["audio_url"],
+                published_at=item["published_at"],
+            )
+        except (KeyError, TypeError):
+            continue
+    return cache
+
+
+def save_feed_cache(cache: FeedCache) -> None:
+    cache.path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "feed_hash": cache.feed_hash,
+        "items": {
+            guid: {
+                "key": item.key,
+                "xml": item.xml,
+                "audio_url": item.audio_url,
+                "published_at": item.published_at,
+            }
+            for guid, item in cache.items.items()
+        },
+    }
+    tmp = cache.path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, cache.path)
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import queue
 import re
+import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
 from app.db import get_supabase
-from app.media.audio import render_audio_roundup
+from app.locks import Lease, distributed_lock
+from app.media.artifacts import Artifact, ensure_roundup_audio, read_artifact
 from app.media.paths import podcast_image_path, roundup_audio_path
+from app.media.probe import audio_duration_seconds
 from app.media.roundup_video import ensure_project_podcast_image
 from app.podcast.meta import PodcastMeta, get_meta_for_project
-from app.podcast.rss import PodcastEpisode, build_rss
+from app.pipeline import update_post_audio_stats
+from app.podcast.feed_cache import CachedItem, content_hash, load_feed_cache, save_feed_cache
+from app.podcast.rss import PodcastEpisode, build_item, build_rss_from_items
 from app.storage.r2 import upload_file, upload_text, public_url
 from app.config import get_settings
 import requests
@@ -59,62 +67,20 @@ def _project_meta(project_name: str) -> PodcastMeta | None:
 
 def _project_roundups(project_id: str, limit: int = 30) -> list[dict]:
     sb = get_supabase()
-    posts = (
+    return (
         sb.table("posts")
-        .select("id, content, created_at, podcast_url, podcast_posted, podcast_published_at")
+        .select(
+            "id, content, created_at, podcast_url, podcast_posted, podcast_published_at, "
+            "audio_bytes, audio_duration_seconds"
+        )
+        .eq("project_id", project_id)
         .eq("content_type", "audio_roundup")
         .order("created_at", desc=True)
-        .limit(200)
+        .limit(limit)
         .execute()
         .data
         or []
     )
-    if not posts:
-        return []
-    post_ids = [p.get("id") for p in posts if p.get("id")]
-    usage = (
-        sb.table("article_usage")
-        .select("post_id, article_id")
-        .in_("post_id", post_ids)
-        .execute()
-        .data
-        or []
-    )
-    article_ids = list({u.get("article_id") for u in usage if u.get("article_id")})
-    if not article_ids:
-        return []
-    articles = (
-        sb.table("articles")
-        .select("id, project_id")
-        .in_("id", article_ids)
-        .execute()
-        .data
-        or []
-    )
-    article_project = {a["id"]: a.get("project_id") for a in articles if a.get("id")}
-    post_projects: dict[str, set[str]] = {}
-    for row in usage:
-        post_id = row.get("post_id")
-        article_id = row.get("article_id")
-        if post_id and article_id:
-            proj = article_project.get(article_id)
-            if proj:
-                post_projects.setdefault(post_id, set()).add(proj)
-    filtered = [p for p in posts if project_id in (post_projects.get(p.get("id")) or set())]
-    return filtered[:limit]
-
-
-def _ensure_audio_file(post_id: str, content: dict) -> Path:
-    settings = get_settings()
-    out_dir = Path(settings.media_output_dir)
-    audio_path = roundup_audio_path(out_dir, post_id)
-    if audio_path.exists():
-        return audio_path
-    dialogue = content.get("dialogue") or []
-    voice_a = content.get("tts_voice_a")
-    voice_b = content.get("tts_voice_b")
-    render_audio_roundup(dialogue, audio_path, voice_a=voice_a, voice_b=voice_b)
-    return audio_path
 
 
 def _remote_length(url: str) -> int:
@@ -163,8 +129,10 @@ def _episode_description(content: dict) -> str:
     return content.get("description") or "Daily roundup from OnePlace."
 
 
-def _episode_duration(content: dict, audio_path: Path | None) -> int:
-    # Prefer model-provided duration if present; fallback to file size timing if missing.
+def _episode_duration(content: dict, measured_seconds: float | None, audio_bytes: int) -> int:
+    # Prefer the duration measured when the audio was rendered; fall back to the model-provided value.
+    if measured_seconds and measured_seconds > 0:
+        return int(round(measured_seconds))
     try:
         seconds = int(content.get("duration_seconds") or 0)
         if seconds > 0:
@@ -172,13 +140,40 @@ def _episode_duration(content: dict, audio_path: Path | None) -> int:
     except Exception:
         pass
     # Last resort: estimate by file length (rough), but keep > 0.
-    if not audio_path:
+    if not audio_bytes:
         return 0
-    size = audio_path.stat().st_size
-    return max(60, int(size / 16000))
+    return max(60, int(audio_bytes / 16000))
+
+
+def _audio_stats(post: dict, content: dict, audio: Artifact | None, audio_url: str) -> tuple[int, float | None]:
+    audio_bytes = int(post.get("audio_bytes") or 0)
+    duration = float(post.get("audio_duration_seconds") or 0) or None
+    if audio_bytes and duration:
+        return audio_bytes, duration
+    post_id = post["id"]
+    if audio is None and roundup_audio_path(Path(get_settings().media_output_dir), post_id).exists():
+        # Adopts renders made before the manifest existed; never re-renders here.
+        audio = ensure_roundup_audio(post_id, content)
+    if audio:
+        audio_bytes, duration = audio.size_bytes, audio.duration_seconds or None
+    elif not audio_bytes:
+        # Only for episodes with neither stored stats nor a local file; stored so it happens once.
+        audio_bytes = _remote_length(audio_url)
+    else:
+        return audio_bytes, duration
+    if audio_bytes:
+        update_post_audio_stats(post_id, audio_bytes, duration)
+    return audio_bytes, duration
 
 
 def publish_podcast_for_project(project_id: str, refresh: bool = False) -> PublishResult:
+    with distributed_lock(f"publish-podcast:{project_id}") as lease:
+        if lease is None:
+            return PublishResult(project_id=project_id, project_name="", status="locked")
+        return _publish_podcast_for_project(project_id, refresh, lease)
+
+
+def _publish_podcast_for_project(project_id: str, refresh: bool, lease: Lease) -> PublishResult:
     project = _project_row(project_id)
     if not project:
         return PublishResult(project_id=project_id, project_name="", status="missing_project")
@@ -235,7 +230,9 @@ def publish_podcast_for_project(project_id: str, refresh: bool = False) -> Publi
         image_url = public_url(artwork_key)
 
     sb = get_supabase()
-    episodes: list[PodcastEpisode] = []
+    cache = load_feed_cache(project_id)
+    items: list[CachedItem] = []
+    rebuilt_items = 0
     for post in posts:
         content = post.get("content") or {}
         if isinstance(content, str):
@@ -250,11 +247,11 @@ def publish_podcast_for_project(project_id: str, refresh: bool = False) -> Publi
             continue
         audio_key = f"podcasts/{slug}/episodes/{post_id}.mp3"
         audio_url = post.get("podcast_url")
-        audio_path = None
+        audio = None
         if refresh or not audio_url:
-            audio_path = _ensure_audio_file(post_id, content)
+            audio = ensure_roundup_audio(post_id, content)
             audio_url = upload_file(
-                audio_path,
+                audio.path,
                 audio_key,
                 content_type="audio/mpeg",
                 cache_control="public, max-age=31536000, immutable",
@@ -264,56 +261,204 @@ def publish_podcast_for_project(project_id: str, refresh: bool = False) -> Publi
                     "podcast_posted": True,
                     "podcast_url": audio_url,
                     "podcast_published_at": post.get("podcast_published_at") or _now_iso(),
+                    "audio_bytes": audio.size_bytes,
+                    "audio_duration_seconds": round(audio.duration_seconds, 3) or None,
                 }
             ).eq("id", post_id).execute()
+            post["audio_bytes"] = audio.size_bytes
+            post["audio_duration_seconds"] = audio.duration_seconds
         if not audio_url:
             audio_url = public_url(audio_key)
-        if audio_path is None and Path(get_settings().media_output_dir).exists():
-            path = roundup_audio_path(Path(get_settings().media_output_dir), post_id)
-            if path.exists():
-                audio_path = path
-        audio_length = audio_path.stat().st_size if audio_path and audio_path.exists() else _remote_length(audio_url)
+        if audio is None:
+            audio = read_artifact(post_id, "audio")
         published_at = _parse_iso(post.get("podcast_published_at") or post.get("created_at"))
-        episodes.append(
-            PodcastEpisode(
-                title=_episode_title(content),
-                description=_episode_description(content),
-                guid=post_id,
-                audio_url=audio_url,
-                audio_length=audio_length,
-                duration_seconds=_episode_duration(content, audio_path),
-                published_at=published_at,
-            )
+        key = content_hash(
+            _episode_title(content),
+            _episode_description(content),
+            content.get("duration_seconds"),
+            post_id,
+            audio_url,
+            published_at.isoformat(),
+            meta.explicit,
+            audio.checksum if audio else "",
+            post.get("audio_bytes"),
+            post.get("audio_duration_seconds"),
+        )
+        cached = cache.items.get(post_id)
+        if cached and cached.key == key and not refresh:
+            items.append(cached)
+            continue
+
+        audio_length, measured = _audio_stats(post, content, audio, audio_url)
+        episode = PodcastEpisode(
+            title=_episode_title(content),
+            description=_episode_description(content),
+            guid=post_id,
+            audio_url=audio_url,
+            audio_length=audio_length,
+            duration_seconds=_episode_duration(content, measured, audio_length),
+            published_at=published_at,
+        )
+        item = CachedItem(
+            key=key,
+            xml=build_item(episode, meta.explicit),
+            audio_url=audio_url,
+            published_at=published_at.isoformat(),
         )
+        cache.items[post_id] = item
+        items.append(item)
+        rebuilt_items += 1
 
-    episodes_sorted = sorted(episodes, key=lambda e: e.published_at, reverse=True)
+    items_sorted = sorted(items, key=lambda i: _parse_iso(i.published_at), reverse=True)
     rss_url = public_url(rss_key)
-    rss_xml = build_rss(
+    rss_xml = build_rss_from_items(
         meta=meta,
-        episodes=episodes_sorted,
+        items_xml=[i.xml for i in items_sorted],
         feed_url=rss_url,
         site_url=meta.site_url,
         image_url=image_url,
     )
-    upload_text(rss_xml, rss_key, cache_control="public, max-age=300")
+    feed_hash = content_hash(rss_xml)
+    if feed_hash == cache.feed_hash and not refresh:
+        print(f"podcast_feed_unchanged project_id={project_id} items={len(items_sorted)}")
+    else:
+        lease.check()
+        upload_text(rss_xml, rss_key, cache_control="public, max-age=300")
+        cache.feed_hash = feed_hash
+        print(f"podcast_feed_uploaded project_id={project_id} items={len(items_sorted)} rebuilt={rebuilt_items}")
+    current = {i.key for i in items_sorted}
+    cache.items = {guid: item for guid, item in cache.items.items() if item.key in current}
+    save_feed_cache(cache)
 
     return PublishResult(
         project_id=project_id,
         project_name=project_name,
         status="ok",
         rss_url=rss_url,
-        audio_url=episodes_sorted[0].audio_url if episodes_sorted else None,
+        audio_url=items_sorted[0].audio_url if items_sorted else None,
         image_url=image_url,
     )
 
 
-def publish_podcasts_all(refresh: bool = False) -> list[PublishResult]:
+def _download_duration(url: str) -> tuple[int, float | None]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "episode.mp3"
+        with requests.get(url, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            with path.open("wb") as handle:
+                for block in resp.iter_content(chunk_size=1024 * 1024):
+                    handle.write(block)
+        return path.stat().st_size, audio_duration_seconds(path) or None
+
+
+def backfill_audio_stats(limit: int = 200, download: bool = True) -> dict:
     sb = get_supabase()
-    projects = sb.table("projects").select("id,name").execute().data or []
-    results: list[PublishResult] = []
+    rows = (
+        sb.table("posts")
+        .select("id, content, podcast_url, audio_bytes, audio_duration_seconds")
+        .eq("content_type", "audio_roundup")
+        .is_("audio_duration_seconds", "null")
+        .order("created_at", desc=True)
+        .limit(limit)
+        .execute()
+        .data
+        or []
+    )
+    base_dir = Path(get_settings().media_output_dir)
+    stats = {"local": 0, "remote": 0, "missing": 0, "failed": 0}
+    for row in rows:
+        post_id = row["id"]
+        content = row.get("content") or {}
+        try:
+            audio = read_artifact(post_id, "audio")
+            if audio is None and roundup_audio_path(base_dir, post_id).exists():
+                audio = ensure_roundup_audio(post_id, content)
+            if audio:
+                update_post_audio_stats(post_id, audio.size_bytes, audio.duration_seconds)
+                stats["local"] += 1
+            elif download and row.get("podcast_url"):
+                audio_bytes, duration = _download_duration(row["podcast_url"])
+                update_post_audio_stats(post_id, audio_bytes, duration)
+                stats["remote"] += 1
+            else:
+                stats["missing"] += 1
+        except Exception as exc:
+            print(f"audio_stats_backfill_failed post_id={post_id} error={exc}")
+            stats["failed"] += 1
+    return stats
+
+
+def _publish_safely(project_id: str, project_name: str, refresh: bool) -> PublishResult:
+    try:
+        return publish_podcast_for_project(project_id, refresh=refresh)
+    except Exception as exc:
+        print(f"podcast_publish_failed project_id={project_id} error={exc}")
+        return PublishResult(
+            project_id=project_id, project_name=project_name, status="error", error=str(exc)
+        )
+
+
+def publish_podcasts_all(
+    refresh: bool = False,
+    workers: int | None = None,
+    deadline_seconds: float | None = None,
+) -> list[PublishResult]:
+    settings = get_settings()
+    if workers is None:
+        workers = settings.podcast_publish_workers
+    if deadline_seconds is None:
+        deadline_seconds = settings.podcast_publish_deadline_seconds
+    sb = get_supabase()
+    projects = [p for p in sb.table("projects").select("id,name").execute().data or [] if p.get("id")]
+    if not projects:
+        return []
+
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds and deadline_seconds > 0 else None
+    pending: queue.Queue[dict] = queue.Queue()
     for project in projects:
-        project_id = project.get("id")
-        if not project_id:
-            continue
-        results.append(publish_podcast_for_project(project_id, refresh=refresh))
-    return results
+        pending.put(project)
+    results: dict[str, PublishResult] = {}
+    lock = threading.Lock()
+
+    def run() -> None:
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            try:
+                project = pending.get_nowait()
+            except queue.Empty:
+                return
+            result = _publish_safely(project["id"], project.get("name") or "", refresh)
+            with lock:
+                results[project["id"]] = result
+
+    # No project starts after the deadline, but one already in progress finishes its
+    # uploads; abandoning it mid-upload would leave R2 and the feed out of step.
+    # The scheduler's hard timeout still bounds a publish that hangs.
+    threads = [
+        threading.Thread(target=run, name=f"podcast-publish-{idx}")
+        for idx in range(max(1, min(workers, len(projects))))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    busy = [thread for thread in threads if thread.is_alive()]
+    if busy:
+        print(f"podcast_publish_deadline_reached waiting_for={len(busy)}")
+        for thread in busy:
+            thread.join()
+
+    ordered: list[PublishResult] = []
+    with lock:
+        for project in projects:
+            result = results.get(project["id"])
+            if result is None:
+                result = PublishResult(
+                    project_id=project["id"],
+                    project_name=project.get("name") or "",
+                    status="deadline_exceeded",
+                    error=f"not finished within {deadline_seconds}s",
+                )
+            ordered.append(result)
+    return ordered
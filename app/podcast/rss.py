@@ -44,33 +44,32 @@ def _category_xml(meta: PodcastMeta) -> str:
     return f'<itunes:category text="{escape(meta.category_main)}" />'
 
 
-def build_rss(
+def build_item(ep: PodcastEpisode, explicit: str) -> str:
+    return "\n".join(
+        [
+            "<item>",
+            f"<title>{escape(ep.title)}</title>",
+            f"<description>{escape(ep.description)}</description>",
+            f"<guid isPermaLink=\"false\">{escape(ep.guid)}</guid>",
+            f"<pubDate>{_rfc2822(ep.published_at)}</pubDate>",
+            (
+                f"<enclosure url=\"{escape(ep.audio_url)}\" "
+                f"length=\"{int(ep.audio_length)}\" type=\"audio/mpeg\" />"
+            ),
+            f"<itunes:duration>{_itunes_duration(ep.duration_seconds)}</itunes:duration>",
+            f"<itunes:explicit>{escape(explicit)}</itunes:explicit>",
+            "</item>",
+        ]
+    )
+
+
+def build_rss_from_items(
     meta: PodcastMeta,
-    episodes: Iterable[PodcastEpisode],
+    items_xml: Iterable[str],
     feed_url: str,
     site_url: str | None,
     image_url: str,
 ) -> str:
-    items_xml = []
-    for ep in episodes:
-        items_xml.append(
-            "\n".join(
-                [
-                    "<item>",
-                    f"<title>{escape(ep.title)}</title>",
-                    f"<description>{escape(ep.description)}</description>",
-                    f"<guid isPermaLink=\"false\">{escape(ep.guid)}</guid>",
-                    f"<pubDate>{_rfc2822(ep.published_at)}</pubDate>",
-                    (
-                        f"<enclosure url=\"{escape(ep.audio_url)}\" "
-                        f"length=\"{int(ep.audio_length)}\" type=\"audio/mpeg\" />"
-                    ),
-                    f"<itunes:duration>{_itunes_duration(ep.duration_seconds)}</itunes:duration>",
-                    f"<itunes:explicit>{escape(meta.explicit)}</itunes:explicit>",
-                    "</item>",
-                ]
-            )
-        )
     items = "\n".join(items_xml)
 
     description = escape(meta.description)
@@ -102,3 +101,14 @@ def build_rss(
             "</rss>",
         ]
     )
+
+
+def build_rss(
+    meta: PodcastMeta,
+    episodes: Iterable[PodcastEpisode],
+    feed_url: str,
+    site_url: str | None,
+    image_url: str,
+) -> str:
+    items_xml = [build_item(ep, meta.explicit) for ep in episodes]
+    return build_rss_from_items(meta, items_xml, feed_url, site_url, image_url)
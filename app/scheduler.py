@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from app.config import get_settings
+from app.media.paths import scheduler_state_path
+
+# One long-running process for the periodic work that used to be split between
+# the *-loop commands and systemd timers: `python -m app.worker scheduler`.
+#
+# Jobs either call a function in-process (pipeline stages; the return value is the
+# number of items processed) or run a worker subcommand as a child process (daily
+# jobs with heavy imports, or ones that need a hard timeout). A job never overlaps
+# itself beyond max_concurrency. Backlog-aware jobs re-run almost immediately when
+# a run processed a full batch and back off towards max_backoff_seconds while
+# there is nothing to do.
+#
+# Like the Persistent=true timers they replace, cron jobs record when they last
+# started (MEDIA_OUTPUT_DIR/scheduler_state.json) and run right away on startup if
+# the scheduler was down over their last scheduled time.
+
+_BACKLOG_DELAY_SECONDS = 5
+_TICK_SECONDS = 30
+# Batch limits of the old *-loop commands (the stage functions' defaults).
+_EXTRACT_BATCH = 3
+_JUDGE_BATCH = 20
+_GENERATE_BATCH = 10
+_SECOND_JUDGE_BATCH = 20
+
+
+@dataclass
+class JobSpec:
+    name: str
+    func: Callable[[], int | None] | None = None
+    command: list[str] | None = None
+    interval_seconds: int = 0
+    cron: str | None = None
+    jitter_seconds: int = 0
+    # Child processes are killed at the timeout; in-process jobs can only be
+    # reported, and keep their slot until they return.
+    timeout_seconds: int | None = None
+    max_concurrency: int = 1
+    batch_size: int | None = None
+    max_backoff_seconds: int | None = None
+
+
+@dataclass
+class _JobState:
+    spec: JobSpec
+    next_run: float
+    running: int = 0
+    idle_runs: int = 0
+    children: list[subprocess.Popen] = field(default_factory=list)
+
+
+def _cron_field(value: str, low: int, high: int) -> set[int]:
+    values: set[int] = set()
+    for part in value.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = end = int(part)
+        if start < low or end > high or step < 1:
+            raise RuntimeError(f"Cron field out of range: {value}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def next_cron_time(expr: str, after: datetime) -> datetime:
+    # Five-field cron (minute hour day month weekday) in UTC; weekday 0 is Sunday.
+    fields = expr.split()
+    if len(fields) != 5:
+        raise RuntimeError(f"Cron expression needs five fields: {expr}")
+    minutes = _cron_field(fields[0], 0, 59)
+    hours = _cron_field(fields[1], 0, 23)
+    days = _cron_field(fields[2], 1, 31)
+    months = _cron_field(fields[3], 1, 12)
+    weekdays = {d % 7 for d in _cron_field(fields[4], 0, 7)}
+    day_any, weekday_any = fields[2] == "*", fields[4] == "*"
+    candidate = after.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+    # Long enough for a 29 February schedule.
+    limit = candidate + timedelta(days=366 * 5)
+    while candidate < limit:
+        if candidate.month not in months:
+            candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            continue
+        day_ok = candidate.day in days
+        weekday_ok = (candidate.weekday() + 1) % 7 in weekdays
+        if day_any or weekday_any:
+            matches_day = day_ok and weekday_ok
+        else:
+            # Standard cron: a restricted day-of-month OR a restricted weekday.
+            matches_day = day_ok or weekday_ok
+        if not matches_day:
+            candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            continue
+        if candidate.hour not in hours:
+            candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            continue
+        if candidate.minute in minutes:
+            return candidate
+        candidate += timedelta(minutes=1)
+    raise RuntimeError(f"Cron expression never fires: {expr}")
+
+
+def _scrape() -> int:
+    from app.worker import run_scrape_sources
+
+    return int(run_scrape_sources().get("total", 0))
+
+
+def _extract() -> int:
+    from app.pipeline import run_extraction
+
+    return run_extraction(limit=_EXTRACT_BATCH)
+
+
+def _judge() -> int:
+    from app.pipeline import run_first_judge
+
+    return run_first_judge(limit=_JUDGE_BATCH)
+
+
+def _generate() -> int:
+    from app.pipeline import run_generation
+
+    # run_generation counts inserted posts; report articles so a full batch of new
+    # articles (and only that) looks like a backlog.
+    return run_generation(limit=_GENERATE_BATCH) // max(1, get_settings().generation_variants)
+
+
+def _second_judge() -> int:
+    from app.pipeline import run_second_judge
+
+    return run_second_judge(limit=_SECOND_JUDGE_BATCH)
+
+
+def default_jobs() -> list[JobSpec]:
+    # Intervals match the old *-loop defaults; cron times match the systemd timers.
+    settings = get_settings()
+    return [
+        JobSpec("scrape", func=_scrape, interval_seconds=3600, jitter_seconds=60, timeout_seconds=1800),
+        JobSpec(
+            "extract",
+            func=_extract,
+            interval_seconds=600,
+            jitter_seconds=30,
+            timeout_seconds=1800,
+            batch_size=_EXTRACT_BATCH,
+            max_backoff_seconds=1800,
+        ),
+        JobSpec(
+            "judge",
+            func=_judge,
+            interval_seconds=900,
+            jitter_seconds=30,
+            timeout_seconds=1800,
+            batch_size=_JUDGE_BATCH,
+            max_backoff_seconds=2700,
+        ),
+        JobSpec(
+            "generate",
+            func=_generate,
+            interval_seconds=1200,
+            jitter_seconds=60,
+            timeout_seconds=3600,
+            batch_size=_GENERATE_BATCH,
+            max_backoff_seconds=3600,
+        ),
+        JobSpec(
+            "second-judge",
+            func=_second_judge,
+            interval_seconds=1800,
+            jitter_seconds=60,
+            timeout_seconds=1800,
+            batch_size=_SECOND_JUDGE_BATCH,
+            max_backoff_seconds=3600,
+        ),
+        JobSpec(
+            "publish-podcast",
+            command=["publish-podcast", "--all-projects"],
+            cron="45 13 * * *",
+            # A little past the in-process deadline, like the old TimeoutStartSec.
+            timeout_seconds=settings.podcast_publish_deadline_seconds + 300,
+        ),
+        JobSpec(
+            "youtube-analytics",
+            command=["youtube-analytics", "--all-projects", "--days", "7"],
+            cron="15 7 * * *",
+            timeout_seconds=3600,
+        ),
+        JobSpec(
+            "youtube-video-metrics",
+            command=["youtube-video-metrics", "--all-projects", "--max-posts", "50"],
+            cron="0 * * * *",
+            jitter_seconds=300,
+            timeout_seconds=1800,
+        ),
+    ]
+
+
+def _load_last_runs(path: Path) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {name: float(value) for name, value in (data.get("last_run") or {}).items()}
+    except (OSError, ValueError, AttributeError) as exc:
+        print(f"scheduler_state_unreadable path={path} error={exc}")
+        return {}
+
+
+def _save_last_runs(path: Path, last_runs: dict[str, float]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({"last_run": last_runs}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class Scheduler:
+    def __init__(self, jobs: list[JobSpec], max_workers: int, state_path: Path | None = None) -> None:
+        now = time.time()
+        self._state_path = state_path
+        self._last_runs = _load_last_runs(state_path) if state_path else {}
+        self._states = [_JobState(spec=spec, next_run=0.0) for spec in jobs]
+        for state in self._states:
+            state.next_run = self._first_run(state.spec, now)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="scheduler")
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def _jitter(spec: JobSpec) -> float:
+        return random.uniform(0, spec.jitter_seconds) if spec.jitter_seconds > 0 else 0.0
+
+    def _first_run(self, spec: JobSpec, now: float) -> float:
+        last_run = self._last_runs.get(spec.name)
+        if spec.cron and last_run is not None:
+            missed = next_cron_time(spec.cron, datetime.fromtimestamp(last_run, timezone.utc)).timestamp()
+            if missed <= now:
+                scheduled = datetime.fromtimestamp(missed, timezone.utc).isoformat()
+                print(f"scheduler_job_missed name={spec.name} scheduled={scheduled}")
+                return now + self._jitter(spec)
+        if spec.cron:
+            return next_cron_time(spec.cron, datetime.fromtimestamp(now, timezone.utc)).timestamp() + self._jitter(spec)
+        return now + self._jitter(spec)
+
+    def _next_run(self, state: _JobState, count: int | None, ok: bool) -> float:
+        spec = state.spec
+        now = time.time()
+        if spec.cron:
+            return next_cron_time(spec.cron, datetime.fromtimestamp(now, timezone.utc)).timestamp() + self._jitter(spec)
+        delay = float(spec.interval_seconds)
+        if ok and count is not None and spec.batch_size:
+            if count >= spec.batch_size:
+                state.idle_runs = 0
+                return now + _BACKLOG_DELAY_SECONDS
+            if count == 0 and spec.max_backoff_seconds:
+                state.idle_runs += 1
+                delay = min(delay * 2 ** (state.idle_runs - 1), float(spec.max_backoff_seconds))
+            else:
+                state.idle_runs = 0
+        return now + delay + self._jitter(spec)
+
+    def _run_command(self, state: _JobState) -> int | None:
+        spec = state.spec
+        cmd = [sys.executable, "-m", "app.worker", *(spec.command or [])]
+        proc = subprocess.Popen(cmd)
+        with self._lock:
+            state.children.append(proc)
+        try:
+            code = proc.wait(timeout=spec.timeout_seconds)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise RuntimeError(f"timed out after {spec.timeout_seconds}s")
+        finally:
+            with self._lock:
+                state.children.remove(proc)
+        if code != 0:
+            raise RuntimeError(f"exit code {code}")
+        return None
+
+    def _run(self, state: _JobState) -> None:
+        spec = state.spec
+        started = time.monotonic()
+        count: int | None = None
+        ok = True
+        watchdog = None
+        if spec.func and spec.timeout_seconds:
+            watchdog = threading.Timer(
+                spec.timeout_seconds,
+                lambda: print(f"scheduler_job_overdue name={spec.name} seconds={spec.timeout_seconds}"),
+            )
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            count = spec.func() if spec.func else self._run_command(state)
+        except Exception as exc:
+            ok = False
+            print(f"scheduler_job_failed name={spec.name} error={exc}")
+        finally:
+            if watchdog:
+                watchdog.cancel()
+        with self._lock:
+            state.running -= 1
+            state.next_run = self._next_run(state, count, ok)
+            delay = state.next_run - time.time()
+        print(
+            f"scheduler_job_finished name={spec.name} status={'ok' if ok else 'error'} "
+            f"count={count if count is not None else '-'} seconds={time.monotonic() - started:.1f} "
+            f"next_in={max(delay, 0):.0f}s"
+        )
+        self._wake.set()
+
+    def _dispatch(self) -> float:
+        # Starts every due job with a free slot; returns seconds until the next one.
+        now = time.time()
+        wait = float(_TICK_SECONDS)
+        started_cron = False
+        with self._lock:
+            for state in self._states:
+                if state.running >= max(1, state.spec.max_concurrency):
+                    continue
+                if state.next_run <= now:
+                    state.running += 1
+                    if state.running < state.spec.max_concurrency:
+                        # Further instances start on the next interval, not in a burst.
+                        state.next_run = now + max(state.spec.interval_seconds, 1)
+                    else:
+                        state.next_run = float("inf")
+                    print(f"scheduler_job_started name={state.spec.name}")
+                    if state.spec.cron:
+                        self._last_runs[state.spec.name] = now
+                        started_cron = True
+                    self._executor.submit(self._run, state)
+                    continue
+                wait = min(wait, state.next_run - now)
+            last_runs = dict(self._last_runs)
+        if started_cron and self._state_path:
+            try:
+                _save_last_runs(self._state_path, last_runs)
+            except OSError as exc:
+                print(f"scheduler_state_save_failed path={self._state_path} error={exc}")
+        return max(wait, 0.1)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        names = ",".join(state.spec.name for state in self._states)
+        print(f"scheduler_started jobs={names}")
+        try:
+            while not self._stopping.is_set():
+                wait = self._dispatch()
+                self._wake.wait(wait)
+                self._wake.clear()
+        finally:
+            with self._lock:
+                children = [proc for state in self._states for proc in state.children]
+            for proc in children:
+                proc.terminate()
+            # In-process jobs finish their current batch before the process exits.
+            self._executor.shutdown(wait=True)
+            print("scheduler_stopped")
+
+
+def run_scheduler(only: list[str] | None = None, skip: list[str] | None = None, max_workers: int | None = None) -> None:
+    jobs = default_jobs()
+    known = {spec.name for spec in jobs}
+    for name in (only or []) + (skip or []):
+        if name not in known:
+            raise RuntimeError(f"Unknown scheduler job: {name}")
+    if only:
+        jobs = [spec for spec in jobs if spec.name in only]
+    if skip:
+        jobs = [spec for spec in jobs if spec.name not in skip]
+    if not jobs:
+        raise RuntimeError("No scheduler jobs selected")
+    settings = get_settings()
+    scheduler = Scheduler(
+        jobs,
+        max_workers or settings.scheduler_max_workers,
+        state_path=scheduler_state_path(Path(settings.media_output_dir)),
+    )
+
+    def handle_signal(signum: int, frame: object) -> None:
+        print(f"scheduler_signal signal={signum}")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    scheduler.run()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import get_settings
+
+# Response cache for /api/projects/{id}/stats. Entries are fresh for
+# STATS_CACHE_TTL_SECONDS; after that (or after an invalidation) the cached value
+# is still served for up to STATS_CACHE_STALE_SECONDS while a background thread
+# recomputes it. Invalidation has to reach the API process from the worker
+# commands, so it is signalled by touching a stamp file under MEDIA_OUTPUT_DIR.
+
+
+@dataclass
+class _Entry:
+    value: dict
+    computed_at: float
+    generation: tuple[int, int]
+
+
+_entries: dict[str, _Entry] = {}
+_refreshing: set[str] = set()
+_lock = threading.Lock()
+
+
+def _stamp_path(project_id: str | None) -> Path:
+    name = f"stats_{project_id}.stamp" if project_id else "stats_all.stamp"
+    return Path(get_settings().media_output_dir) / "cache" / name
+
+
+def _stamp(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _generation(project_id: str) -> tuple[int, int]:
+    return _stamp(_stamp_path(project_id)), _stamp(_stamp_path(None))
+
+
+def invalidate_project_stats(project_id: str | None = None) -> None:
+    # project_id=None invalidates every project.
+    path = _stamp_path(project_id)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(str(time.time_ns()), encoding="utf-8")
+    except OSError as exc:
+        print(f"stats_cache_invalidate_failed project_id={project_id or 'all'} error={exc}")
+        return
+    print(f"stats_cache_invalidated project_id={project_id or 'all'}")
+
+
+def _compute(project_id: str) -> _Entry:
+    from app.admin import project_stats
+
+    # Read the generation first so an invalidation that lands mid-computation
+    # leaves the new entry stale.
+    generation = _generation(project_id)
+    entry = _Entry(value=project_stats(project_id), computed_at=time.monotonic(), generation=generation)
+    with _lock:
+        _entries[project_id] = entry
+    return entry
+
+
+def _refresh_in_background(project_id: str) -> None:
+    with _lock:
+        if project_id in _refreshing:
+            return
+        _refreshing.add(project_id)
+
+    def run() -> None:
+        try:
+            _compute(project_id)
+        except Exception as exc:
+            print(f"stats_cache_refresh_failed project_id={project_id} error={exc}")
+        finally:
+            with _lock:
+                _refreshing.discard(project_id)
+
+    threading.Thread(target=run, name=f"stats-refresh-{project_id}", daemon=True).start()
+
+
+def get_project_stats(project_id: str) -> dict:
+    settings = get_settings()
+    with _lock:
+        entry = _entries.get(project_id)
+    if entry is None:
+        return _compute(project_id).value
+    age = time.monotonic() - entry.computed_at
+    if age < settings.stats_cache_ttl_seconds and entry.generation == _generation(project_id):
+        return entry.value
+    if age < settings.stats_cache_ttl_seconds + settings.stats_cache_stale_seconds:
+        _refresh_in_background(project_id)
+        return entry.value
+    return _compute(project_id).value
+
+
+def warm_project_stats() -> None:
+    from app.admin import list_projects
+
+    def run() -> None:
+        try:
+            projects = list_projects()
+        except Exception as exc:
+            print(f"stats_cache_warm_failed error={exc}")
+            return
+        for project in projects:
+            project_id = project.get("id")
+            if not project_id:
+                continue
+            try:
+                _compute(project_id)
+            except Exception as exc:
+                print(f"stats_cache_warm_failed project_id={project_id} error={exc}")
+        print(f"stats_cache_warmed projects={len(projects)}")
+
+    threading.Thread(target=run, name="stats-warm", daemon=True).start()
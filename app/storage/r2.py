@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from app.config import get_settings
 
+# Objects are uploaded with their MD5 in metadata so unchanged bytes can be detected
+# with a HEAD request (multipart ETags are not plain MD5s).
+_MD5_META = "md5"
 
-@dataclass
+
+@dataclass(frozen=True)
 class R2Config:
     access_key_id: str
     secret_access_key: str
@@ -43,17 +51,60 @@ def _load_config() -> R2Config:
     )
 
 
+@lru_cache(maxsize=4)
 def _client(config: R2Config):
+    # boto3 clients are thread-safe; one per process keeps connections pooled.
+    concurrency = max(1, get_settings().r2_upload_concurrency)
     return boto3.client(
         "s3",
         endpoint_url=config.endpoint,
         aws_access_key_id=config.access_key_id,
         aws_secret_access_key=config.secret_access_key,
         region_name="auto",
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=max(10, concurrency * 2),
+            retries={"max_attempts": 5, "mode": "standard"},
+        ),
+    )
+
+
+@lru_cache(maxsize=1)
+def _transfer_config() -> TransferConfig:
+    settings = get_settings()
+    chunk = max(5, settings.r2_multipart_chunk_mb) * 1024 * 1024
+    return TransferConfig(
+        multipart_threshold=chunk * 2,
+        multipart_chunksize=chunk,
+        max_concurrency=max(1, settings.r2_upload_concurrency),
+        use_threads=True,
     )
 
 
+def _file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_unchanged(client, bucket: str, key: str, md5: str, extra: dict[str, Any]) -> bool:
+    try:
+        head = client.head_object(Bucket=bucket, Key=key)
+    except ClientError as exc:
+        code = str(exc.response.get("Error", {}).get("Code", ""))
+        if code in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    remote_md5 = (head.get("Metadata") or {}).get(_MD5_META) or head.get("ETag", "").strip('"')
+    if remote_md5 != md5:
+        return False
+    if head.get("ContentType") != extra.get("ContentType"):
+        return False
+    return head.get("CacheControl") == extra.get("CacheControl")
+
+
 def public_url(key: str) -> str:
     cfg = _load_config()
     key = key.lstrip("/")
@@ -65,6 +116,7 @@ def upload_file(
     key: str,
     content_type: str,
     cache_control: str | None = None,
+    skip_unchanged: bool = True,
 ) -> str:
     cfg = _load_config()
     client = _client(cfg)
@@ -72,11 +124,17 @@ def upload_file(
     extra: dict[str, Any] = {"ContentType": content_type}
     if cache_control:
         extra["CacheControl"] = cache_control
+    md5 = _file_md5(Path(file_path))
+    if skip_unchanged and _is_unchanged(client, cfg.bucket, key, md5, extra):
+        print(f"r2_upload_skipped key={key}")
+        return public_url(key)
+    extra["Metadata"] = {_MD5_META: md5}
     client.upload_file(
         Filename=str(file_path),
         Bucket=cfg.bucket,
         Key=key,
         ExtraArgs=extra,
+        Config=_transfer_config(),
     )
     return public_url(key)
 
@@ -86,6 +144,7 @@ def upload_text(
     key: str,
     content_type: str = "application/rss+xml; charset=utf-8",
     cache_control: str | None = None,
+    skip_unchanged: bool = True,
 ) -> str:
     cfg = _load_config()
     client = _client(cfg)
@@ -93,10 +152,16 @@ def upload_text(
     extra: dict[str, Any] = {"ContentType": content_type}
     if cache_control:
         extra["CacheControl"] = cache_control
+    body = content.encode("utf-8")
+    md5 = hashlib.md5(body).hexdigest()
+    if skip_unchanged and _is_unchanged(client, cfg.bucket, key, md5, extra):
+        print(f"r2_upload_skipped key={key}")
+        return public_url(key)
     client.put_object(
         Bucket=cfg.bucket,
         Key=key,
-        Body=content.encode("utf-8"),
+        Body=body,
+        Metadata={_MD5_META: md5},
         **extra,
     )
     return public_url(key)
@@ -4,41 +4,15 @@ import time
 from pathlib import Path
 
 from .config import get_settings
-from .admin import (
-    ingest_source_items,
-    list_projects,
-    scrape_project,
-    get_project_podcast_image_prompt,
-    resolve_project_id_for_post,
-)
-from .media.audio import render_audio_roundup
-from .media.roundup_video import render_audio_roundup_video, ensure_project_podcast_image
-from .media.short_video import render_short_video
-from .media.paths import podcast_image_path, roundup_audio_path, roundup_video_path, short_video_path
-from .youtube_upload import upload_latest_roundup_for_project, upload_latest_roundups_all
-from .youtube_analytics import fetch_youtube_analytics_for_project, fetch_youtube_analytics_all
-from .youtube_video_metrics import (
-    fetch_youtube_video_metrics_for_project,
-    fetch_youtube_video_metrics_all,
-)
-from .podcast.publish import publish_podcast_for_project, publish_podcasts_all
-from .pipeline import (
-    fetch_latest_audio_roundup,
-    fetch_latest_audio_roundup_for_project,
-    fetch_latest_selected_video,
-    cleanup_old_data,
-    run_pipeline_all,
-    run_project_pipeline,
-    run_audio_roundup,
-    run_extraction,
-    run_first_judge,
-    run_generation,
-    run_second_judge,
-    update_post_media,
-)
+
+# Subcommands import what they use inside their own branch: timers and loop
+# restarts start this process constantly, and a `judge` run should not pay for
+# googleapiclient, boto3 or PIL. scripts/bench_worker_startup.py checks this.
 
 
 def run_scrape_sources(project_id: str | None = None, max_items: int = 10) -> dict:
+    from .admin import list_projects, scrape_project
+
     results: list[dict] = []
     if project_id:
         scrape_results = scrape_project(project_id, max_items=max_items)
@@ -99,7 +73,19 @@ def main() -> None:
         action="store_true",
         help="Render latest audio roundup for every project",
     )
-    sub.add_parser("render-audio-roundup-video", help="Render latest audio roundup to MP4")
+    render_roundup.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render even if the inputs have not changed",
+    )
+    render_roundup_video = sub.add_parser(
+        "render-audio-roundup-video", help="Render latest audio roundup to MP4"
+    )
+    render_roundup_video.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render even if the inputs have not changed",
+    )
     podcast_image = sub.add_parser("podcast-image", help="Generate reusable podcast image per project")
     podcast_image.add_argument("--project-id", type=str, default=None, help="Project ID filter")
     podcast_image.add_argument(
@@ -124,6 +110,24 @@ def main() -> None:
         action="store_true",
         help="Re-upload audio and regenerate RSS",
     )
+    publish_podcast.add_argument(
+        "--workers", type=int, default=None, help="Parallel project publishes (default PODCAST_PUBLISH_WORKERS)"
+    )
+    publish_podcast.add_argument(
+        "--deadline",
+        type=int,
+        default=None,
+        help="Overall seconds for --all-projects (default PODCAST_PUBLISH_DEADLINE_SECONDS)",
+    )
+    backfill_audio = sub.add_parser(
+        "backfill-audio-stats", help="Store byte length + measured duration on audio roundup posts"
+    )
+    backfill_audio.add_argument("--limit", type=int, default=200, help="Max posts to backfill")
+    backfill_audio.add_argument(
+        "--no-download",
+        action="store_true",
+        help="Skip posts without a local MP3 instead of downloading them from R2",
+    )
     sub.add_parser("render-video", help="Render latest selected video to MP4")
     yt_upload = sub.add_parser("youtube-upload", help="Upload latest audio roundup video to YouTube")
     yt_upload.add_argument("--project-id", type=str, default=None, help="Project ID filter")
@@ -164,6 +168,22 @@ def main() -> None:
         help="Skip wiping unusable article content",
     )
 
+    jobs_parser = sub.add_parser("jobs-worker", help="Run queued API jobs (pipeline, roundup, renders)")
+    jobs_parser.add_argument("--concurrency", type=int, default=1, help="Jobs run in parallel")
+    jobs_parser.add_argument("--poll", type=float, default=2.0, help="Seconds between polls when idle")
+    jobs_parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+
+    scheduler_parser = sub.add_parser(
+        "scheduler", help="Run scrape, pipeline stages, podcast publish and YouTube jobs on their schedules"
+    )
+    scheduler_parser.add_argument("--only", type=str, default="", help="Comma-separated job names to run")
+    scheduler_parser.add_argument("--skip", type=str, default="", help="Comma-separated job names to leave out")
+    scheduler_parser.add_argument(
+        "--max-workers", type=int, default=None, help="Jobs running at once (default SCHEDULER_MAX_WORKERS)"
+    )
+    scheduler_parser.add_argument("--list", action="store_true", help="Print the job table and exit")
+
+    # The *-loop commands predate the scheduler command; kept for ad-hoc runs.
     loop_parser = sub.add_parser("scrape-loop", help="Scrape on an interval")
     loop_parser.add_argument("--interval", type=int, default=3600, help="Seconds between runs")
     loop_parser.add_argument("--project-id", type=str, default=None, help="Project ID filter")
@@ -188,45 +208,70 @@ def main() -> None:
         print(f"scraped_total={result.get('total', 0)}")
         return
     if args.command == "ingest-sources":
+        from .admin import ingest_source_items
+
         count = ingest_source_items(limit=args.limit, fetch_full=not args.no_fetch, project_id=args.project_id)
         print(f"ingested_sources={count}")
         return
 
     if args.command == "extract":
+        from .pipeline import run_extraction
+
         count = run_extraction()
         print(f"extracted={count}")
         return
 
     if args.command == "judge":
+        from .pipeline import run_first_judge
+
         count = run_first_judge()
         print(f"judged={count}")
         return
 
     if args.command == "generate":
+        from .pipeline import run_generation
+
         count = run_generation()
         print(f"generated_posts={count}")
         return
 
     if args.command == "second-judge":
+        from .pipeline import run_second_judge
+
         count = run_second_judge()
         print(f"second_judged={count}")
         return
     if args.command == "audio-roundup":
+        from .admin import list_projects
+        from .pipeline import run_audio_roundup
+
         if args.all_projects:
             total = 0
+            locked = 0
             projects = list_projects()
             for project in projects:
                 project_id = project.get("id")
                 if not project_id:
                     continue
-                total += run_audio_roundup(project_id=project_id)
-            print(f"audio_roundup_all={total}")
+                count = run_audio_roundup(project_id=project_id)
+                if count is None:
+                    locked += 1
+                else:
+                    total += count
+            print(f"audio_roundup_all={total} locked={locked}")
             return
         count = run_audio_roundup(project_id=args.project_id, language=args.language)
-        print(f"audio_roundup={count}")
+        print(f"audio_roundup={'locked' if count is None else count}")
         return
     if args.command == "render-audio-roundup":
-        settings = get_settings()
+        from .admin import list_projects
+        from .media.artifacts import ensure_roundup_audio
+        from .pipeline import (
+            fetch_latest_audio_roundup,
+            fetch_latest_audio_roundup_for_project,
+            update_post_audio_stats,
+        )
+
         if args.all_projects:
             rendered = 0
             projects = list_projects()
@@ -237,14 +282,9 @@ def main() -> None:
                 row = fetch_latest_audio_roundup_for_project(project_id)
                 if not row:
                     continue
-                content = row.get("content") or {}
-                dialogue = content.get("dialogue") or []
-                voice_a = content.get("tts_voice_a")
-                voice_b = content.get("tts_voice_b")
-                out_dir = Path(settings.media_output_dir)
-                out_path = roundup_audio_path(out_dir, row["id"])
-                render_audio_roundup(dialogue, out_path, voice_a=voice_a, voice_b=voice_b)
-                rendered += 1
+                artifact = ensure_roundup_audio(row["id"], row.get("content") or {}, force=args.force)
+                update_post_audio_stats(row["id"], artifact.size_bytes, artifact.duration_seconds)
+                rendered += 1 if artifact.rebuilt else 0
             print(f"audio_roundup_rendered_all={rendered}")
             return
         if args.project_id:
@@ -254,32 +294,35 @@ def main() -> None:
         if not row:
             print("audio_roundup_rendered=0")
             return
-        content = row.get("content") or {}
-        dialogue = content.get("dialogue") or []
-        voice_a = content.get("tts_voice_a")
-        voice_b = content.get("tts_voice_b")
-        out_dir = Path(settings.media_output_dir)
-        out_path = roundup_audio_path(out_dir, row["id"])
-        render_audio_roundup(dialogue, out_path, voice_a=voice_a, voice_b=voice_b)
-        print(f"audio_roundup_rendered=1 path={out_path}")
+        artifact = ensure_roundup_audio(row["id"], row.get("content") or {}, force=args.force)
+        update_post_audio_stats(row["id"], artifact.size_bytes, artifact.duration_seconds)
+        print(f"audio_roundup_rendered={int(artifact.rebuilt)} path={artifact.path}")
         return
     if args.command == "render-audio-roundup-video":
-        settings = get_settings()
+        from .admin import get_project_podcast_image_prompt, resolve_project_id_for_post
+        from .media.artifacts import ensure_roundup_video
+        from .pipeline import fetch_latest_audio_roundup
+
         row = fetch_latest_audio_roundup()
         if not row:
             print("audio_roundup_video_rendered=0")
             return
-        content = row.get("content") or {}
-        out_dir = Path(settings.media_output_dir)
-        out_path = roundup_video_path(out_dir, row["id"])
         project_id = resolve_project_id_for_post(row["id"])
         project_prompt = get_project_podcast_image_prompt(project_id) if project_id else None
-        render_audio_roundup_video(
-            content, row["id"], out_path, project_id=project_id, project_prompt=project_prompt
+        artifact = ensure_roundup_video(
+            row["id"],
+            row.get("content") or {},
+            project_id=project_id,
+            project_prompt=project_prompt,
+            force=args.force,
         )
-        print(f"audio_roundup_video_rendered=1 path={out_path}")
+        print(f"audio_roundup_video_rendered={int(artifact.rebuilt)} path={artifact.path}")
         return
     if args.command == "render-video":
+        from .media.paths import short_video_path
+        from .media.short_video import render_short_video
+        from .pipeline import fetch_latest_selected_video, update_post_media
+
         settings = get_settings()
         row = fetch_latest_selected_video()
         if not row:
@@ -293,6 +336,10 @@ def main() -> None:
         print(f"video_rendered=1 path={out_path}")
         return
     if args.command == "podcast-image":
+        from .admin import get_project_podcast_image_prompt, list_projects
+        from .media.paths import podcast_image_path
+        from .media.roundup_video import ensure_project_podcast_image
+
         settings = get_settings()
         out_dir = Path(settings.media_output_dir)
         targets: list[str] = []
@@ -320,8 +367,12 @@ def main() -> None:
         print(f"podcast_image_generated={generated} missing_prompt={missing} failed={failed}")
         return
     if args.command == "publish-podcast":
+        from .podcast.publish import publish_podcast_for_project, publish_podcasts_all
+
         if args.all_projects or not args.project_id:
-            results = publish_podcasts_all(refresh=args.refresh)
+            results = publish_podcasts_all(
+                refresh=args.refresh, workers=args.workers, deadline_seconds=args.deadline
+            )
             success = sum(1 for r in results if r.status == "ok")
             print(f"podcast_publish_all={success}")
             for row in results:
@@ -334,7 +385,18 @@ def main() -> None:
         else:
             print(f"podcast_publish=0 status={result.status} error={result.error}")
         return
+    if args.command == "backfill-audio-stats":
+        from .podcast.publish import backfill_audio_stats
+
+        stats = backfill_audio_stats(limit=args.limit, download=not args.no_download)
+        print(
+            f"audio_stats_backfilled local={stats['local']} remote={stats['remote']} "
+            f"missing={stats['missing']} failed={stats['failed']}"
+        )
+        return
     if args.command == "youtube-upload":
+        from .youtube_upload import upload_latest_roundup_for_project, upload_latest_roundups_all
+
         if args.all_projects:
             results = upload_latest_roundups_all()
             success = sum(1 for r in results if r.get("status") == "ok")
@@ -350,6 +412,8 @@ def main() -> None:
             print(f"youtube_upload=0 status={result.get('status')}")
         return
     if args.command == "youtube-analytics":
+        from .youtube_analytics import fetch_youtube_analytics_all, fetch_youtube_analytics_for_project
+
         if args.all_projects:
             results = fetch_youtube_analytics_all(days=args.days)
             success = sum(1 for r in results if r.get("status") == "ok")
@@ -365,6 +429,11 @@ def main() -> None:
             print(f"youtube_analytics=0 status={result.get('status')}")
         return
     if args.command == "youtube-video-metrics":
+        from .youtube_video_metrics import (
+            fetch_youtube_video_metrics_all,
+            fetch_youtube_video_metrics_for_project,
+        )
+
         if args.all_projects:
             results = fetch_youtube_video_metrics_all(max_posts=args.max_posts)
             success = sum(1 for r in results if r.get("status") == "ok")
@@ -382,6 +451,8 @@ def main() -> None:
             print(f"youtube_video_metrics=0 status={result.get('status')}")
         return
     if args.command == "pipeline":
+        from .pipeline import run_pipeline_all, run_project_pipeline
+
         if args.project_id:
             results = run_project_pipeline(args.project_id, max_items=args.max_items)
             print(f"pipeline_project={args.project_id} results={results}")
@@ -390,6 +461,8 @@ def main() -> None:
             print(f"pipeline_all count={len(results)}")
         return
     if args.command == "cleanup":
+        from .pipeline import cleanup_old_data
+
         results = cleanup_old_data(
             hours=args.hours,
             delete_legacy=not args.no_legacy,
@@ -397,6 +470,28 @@ def main() -> None:
         )
         print("cleanup=" + ",".join([f"{k}={v}" for k, v in results.items()]))
         return
+    if args.command == "jobs-worker":
+        from .jobs import run_jobs_worker
+
+        processed = run_jobs_worker(concurrency=args.concurrency, poll_seconds=args.poll, once=args.once)
+        print(f"jobs_processed={processed}")
+        return
+    if args.command == "scheduler":
+        from .scheduler import default_jobs, run_scheduler
+
+        if args.list:
+            for spec in default_jobs():
+                schedule = f"cron='{spec.cron}'" if spec.cron else f"every={spec.interval_seconds}s"
+                backlog = f" batch={spec.batch_size} max_backoff={spec.max_backoff_seconds}s" if spec.batch_size else ""
+                print(
+                    f"job={spec.name} {schedule} jitter={spec.jitter_seconds}s "
+                    f"timeout={spec.timeout_seconds}s{backlog}"
+                )
+            return
+        only = [n.strip() for n in args.only.split(",") if n.strip()]
+        skip = [n.strip() for n in args.skip.split(",") if n.strip()]
+        run_scheduler(only=only, skip=skip, max_workers=args.max_workers)
+        return
 
     if args.command == "scrape-loop":
         while True:
@@ -405,24 +500,32 @@ def main() -> None:
             time.sleep(args.interval)
 
     if args.command == "extract-loop":
+        from .pipeline import run_extraction
+
         while True:
             count = run_extraction()
             print(f"extracted={count}")
             time.sleep(args.interval)
 
     if args.command == "judge-loop":
+        from .pipeline import run_first_judge
+
         while True:
             count = run_first_judge()
             print(f"judged={count}")
             time.sleep(args.interval)
 
     if args.command == "generate-loop":
+        from .pipeline import run_generation
+
         while True:
             count = run_generation()
             print(f"generated_posts={count}")
             time.sleep(args.interval)
 
     if args.command == "second-judge-loop":
+        from .pipeline import run_second_judge
+
         while True:
             count = run_second_judge()
             print(f"second_judged={count}")
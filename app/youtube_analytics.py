@@ -1,66 +1,20 @@
-from datetime import datetime, timedelta, timezone
-import json
-from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-
 from app.admin import list_projects
-from app.config import get_settings
 from app.db import get_supabase
+from app.stats_cache import invalidate_project_stats
+from app.youtube_client import analytics_service, get_youtube_account, youtube_service
+
+# Days within this many days of today are still being revised by YouTube.
+SETTLE_DAYS = 3
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _load_client_secrets(settings: Any) -> tuple[str, str]:
-    if settings.youtube_client_id and settings.youtube_client_secret:
-        return settings.youtube_client_id, settings.youtube_client_secret
-    creds_path = Path(__file__).resolve().parent.parent / "credentials.json"
-    if not creds_path.exists():
-        raise RuntimeError("Missing YouTube client credentials. Set YOUTUBE_CLIENT_ID/SECRET or credentials.json.")
-    data = json.loads(creds_path.read_text(encoding="utf-8"))
-    block = data.get("installed") or data.get("web") or {}
-    client_id = block.get("client_id")
-    client_secret = block.get("client_secret")
-    if not client_id or not client_secret:
-        raise RuntimeError("Invalid credentials.json: missing client_id/client_secret.")
-    return client_id, client_secret
-
-
-def _credentials(refresh_token: str, scopes: list[str]) -> Credentials:
-    settings = get_settings()
-    client_id, client_secret = _load_client_secrets(settings)
-    creds = Credentials(
-        token=None,
-        refresh_token=refresh_token,
-        token_uri=settings.youtube_token_uri,
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=scopes or None,
-    )
-    creds.refresh(Request())
-    return creds
-
-
-def _get_youtube_account(project_id: str) -> dict | None:
-    sb = get_supabase()
-    resp = (
-        sb.table("youtube_accounts")
-        .select("*")
-        .eq("project_id", project_id)
-        .limit(1)
-        .execute()
-    )
-    data = resp.data or []
-    return data[0] if data else None
-
-
-def _get_channel_info(creds: Credentials) -> tuple[str | None, str | None]:
-    youtube = build("youtube", "v3", credentials=creds)
+def _get_channel_info(youtube: Any) -> tuple[str | None, str | None]:
     resp = youtube.channels().list(part="id,snippet", mine=True).execute()
     items = resp.get("items", []) if resp else []
     if not items:
@@ -84,23 +38,52 @@ def _to_float(value: Any) -> float:
         return 0.0
 
 
-def fetch_youtube_analytics_for_project(project_id: str, days: int = 7) -> dict:
-    account = _get_youtube_account(project_id)
-    if not account or not account.get("refresh_token"):
-        return {"status": "missing_account"}
-
-    scopes = account.get("scopes") or []
-    if "https://www.googleapis.com/auth/yt-analytics.readonly" not in scopes:
-        return {"status": "missing_scope"}
+def _parse_date(value: Any) -> date | None:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
 
-    creds = _credentials(account["refresh_token"], scopes)
-    channel_id, channel_title = _get_channel_info(creds)
-    if not channel_id:
-        return {"status": "no_channel"}
 
-    analytics = build("youtubeAnalytics", "v2", credentials=creds)
-    end_date = datetime.now(timezone.utc).date() - timedelta(days=1)
-    start_date = end_date - timedelta(days=max(days, 1) - 1)
+def _final_report_dates(project_id: str, start_date: date, end_date: date) -> set[date]:
+    # YouTube keeps revising a day's numbers for a couple of days, so a stored day is
+    # only final once it was last fetched SETTLE_DAYS or more after the day itself.
+    sb = get_supabase()
+    resp = (
+        sb.table("youtube_metrics")
+        .select("report_date, updated_at")
+        .eq("project_id", project_id)
+        .gte("report_date", start_date.isoformat())
+        .lte("report_date", end_date.isoformat())
+        .execute()
+    )
+    final: set[date] = set()
+    for row in resp.data or []:
+        report_date = _parse_date(row.get("report_date"))
+        updated_at = _parse_date(row.get("updated_at"))
+        if report_date and updated_at and (updated_at - report_date).days >= SETTLE_DAYS:
+            final.add(report_date)
+    return final
+
+
+def _missing_ranges(start_date: date, end_date: date, final: set[date]) -> list[tuple[date, date]]:
+    ranges: list[tuple[date, date]] = []
+    run_start: date | None = None
+    day = start_date
+    while day <= end_date:
+        if day in final:
+            if run_start:
+                ranges.append((run_start, day - timedelta(days=1)))
+                run_start = None
+        elif run_start is None:
+            run_start = day
+        day += timedelta(days=1)
+    if run_start:
+        ranges.append((run_start, end_date))
+    return ranges
+
+
+def _daily_report(analytics: Any, channel_id: str, start_date: date, end_date: date) -> list[list]:
     report = (
         analytics.reports()
         .query(
@@ -113,18 +96,39 @@ def fetch_youtube_analytics_for_project(project_id: str, days: int = 7) -> dict:
         )
         .execute()
     )
+    return report.get("rows") or []
 
-    rows = report.get("rows") or []
-    if not rows:
-        return {"status": "no_data", "channel_id": channel_id, "channel_title": channel_title}
 
-    payloads: list[dict] = []
+def fetch_youtube_analytics_for_project(project_id: str, days: int = 7) -> dict:
+    account = get_youtube_account(project_id)
+    if not account or not account.get("refresh_token"):
+        return {"status": "missing_account"}
+
+    scopes = account.get("scopes") or []
+    if "https://www.googleapis.com/auth/yt-analytics.readonly" not in scopes:
+        return {"status": "missing_scope"}
+
+    today = datetime.now(timezone.utc).date()
+    end_date = today - timedelta(days=1)
+    start_date = end_date - timedelta(days=max(days, 1) - 1)
+    final = _final_report_dates(project_id, start_date, end_date)
+    ranges = _missing_ranges(start_date, end_date, final)
+    if not ranges:
+        return {"status": "ok", "rows": 0, "final_days": len(final)}
+
+    youtube = youtube_service(account["refresh_token"], scopes)
+    channel_id, channel_title = _get_channel_info(youtube)
+    if not channel_id:
+        return {"status": "no_channel"}
+
+    analytics = analytics_service(account["refresh_token"], scopes)
     now = _now_iso()
-    for row in rows:
-        if not row:
-            continue
-        payloads.append(
-            {
+    payloads: dict[str, dict] = {}
+    for range_start, range_end in ranges:
+        for row in _daily_report(analytics, channel_id, range_start, range_end):
+            if not row:
+                continue
+            payloads[row[0]] = {
                 "project_id": project_id,
                 "channel_id": channel_id,
                 "channel_title": channel_title,
@@ -138,15 +142,50 @@ def fetch_youtube_analytics_for_project(project_id: str, days: int = 7) -> dict:
                 "created_at": now,
                 "updated_at": now,
             }
-        )
+    # Settled days the report leaves out had no activity; store them as zeros so
+    # they count as final and are not requested again (also when the whole window
+    # was quiet).
+    for range_start, range_end in ranges:
+        day = range_start
+        while day <= range_end:
+            key = day.isoformat()
+            if key not in payloads and (today - day).days >= SETTLE_DAYS:
+                payloads[key] = {
+                    "project_id": project_id,
+                    "channel_id": channel_id,
+                    "channel_title": channel_title,
+                    "report_date": key,
+                    "views": 0,
+                    "watch_time_minutes": 0.0,
+                    "average_view_duration_seconds": 0.0,
+                    "likes": 0,
+                    "comments": 0,
+                    "subscribers_gained": 0,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            day += timedelta(days=1)
+    if not payloads:
+        return {"status": "no_data", "channel_id": channel_id, "channel_title": channel_title}
 
     sb = get_supabase()
-    sb.table("youtube_metrics").upsert(payloads, on_conflict="project_id,report_date").execute()
+    sb.table("youtube_metrics").upsert(list(payloads.values()), on_conflict="project_id,report_date").execute()
     if channel_title:
         sb.table("youtube_accounts").update(
             {"channel_title": channel_title, "updated_at": now}
         ).eq("project_id", project_id).execute()
-    return {"status": "ok", "rows": len(payloads), "channel_id": channel_id, "channel_title": channel_title}
+    invalidate_project_stats(project_id)
+    print(
+        f"youtube_analytics_synced project_id={project_id} ranges={len(ranges)} "
+        f"rows={len(payloads)} final_days={len(final)}"
+    )
+    return {
+        "status": "ok",
+        "rows": len(payloads),
+        "final_days": len(final),
+        "channel_id": channel_id,
+        "channel_title": channel_title,
+    }
 
 
 def fetch_youtube_analytics_all(days: int = 7) -> list[dict]:
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from app.config import get_settings
+from app.db import get_supabase
+
+# Shared YouTube client factory. Refreshed credentials are kept per account until
+# shortly before expiry, and built service objects are reused per account. Services
+# use the discovery documents bundled with googleapiclient, so building one does
+# not fetch anything over the network.
+
+_REFRESH_MARGIN = timedelta(minutes=5)
+
+_creds_cache: dict[tuple[str, tuple[str, ...]], Credentials] = {}
+_creds_lock = threading.Lock()
+# googleapiclient service objects share an httplib2 connection and are not
+# thread-safe, so each thread keeps its own.
+_services = threading.local()
+
+
+@lru_cache(maxsize=1)
+def load_client_secrets() -> tuple[str, str]:
+    settings = get_settings()
+    if settings.youtube_client_id and settings.youtube_client_secret:
+        return settings.youtube_client_id, settings.youtube_client_secret
+    creds_path = Path(__file__).resolve().parent.parent / "credentials.json"
+    if not creds_path.exists():
+        raise RuntimeError("Missing YouTube client credentials. Set YOUTUBE_CLIENT_ID/SECRET or credentials.json.")
+    data = json.loads(creds_path.read_text(encoding="utf-8"))
+    block = data.get("installed") or data.get("web") or {}
+    client_id = block.get("client_id")
+    client_secret = block.get("client_secret")
+    if not client_id or not client_secret:
+        raise RuntimeError("Invalid credentials.json: missing client_id/client_secret.")
+    return client_id, client_secret
+
+
+def get_youtube_account(project_id: str) -> dict | None:
+    sb = get_supabase()
+    resp = (
+        sb.table("youtube_accounts")
+        .select("*")
+        .eq("project_id", project_id)
+        .limit(1)
+        .execute()
+    )
+    data = resp.data or []
+    return data[0] if data else None
+
+
+def _needs_refresh(creds: Credentials) -> bool:
+    if not creds.token or not creds.expiry:
+        return True
+    # google-auth stores expiry as a naive UTC datetime.
+    expiry = creds.expiry.replace(tzinfo=timezone.utc)
+    return expiry - _REFRESH_MARGIN <= datetime.now(timezone.utc)
+
+
+def credentials(refresh_token: str, scopes: list[str]) -> Credentials:
+    key = (refresh_token, tuple(sorted(scopes or [])))
+    with _creds_lock:
+        creds = _creds_cache.get(key)
+        if creds is None:
+            settings = get_settings()
+            client_id, client_secret = load_client_secrets()
+            creds = Credentials(
+                token=None,
+                refresh_token=refresh_token,
+                token_uri=settings.youtube_token_uri,
+                client_id=client_id,
+                client_secret=client_secret,
+                scopes=scopes or None,
+            )
+            _creds_cache[key] = creds
+        if _needs_refresh(creds):
+            creds.refresh(Request())
+            print(f"youtube_token_refreshed expires={creds.expiry.isoformat() if creds.expiry else 'unknown'}")
+    return creds
+
+
+def service(name: str, version: str, refresh_token: str, scopes: list[str]) -> Any:
+    creds = credentials(refresh_token, scopes)
+    cache = getattr(_services, "cache", None)
+    if cache is None:
+        cache = _services.cache = {}
+    key = (name, version, refresh_token, tuple(sorted(scopes or [])))
+    svc = cache.get(key)
+    if svc is None:
+        # The credentials object is shared, so a cached service picks up later
+        # refreshes (google-auth also refreshes on expiry before each request).
+        svc = build(name, version, credentials=creds, static_discovery=True, cache_discovery=False)
+        cache[key] = svc
+    return svc
+
+
+def youtube_service(refresh_token: str, scopes: list[str]) -> Any:
+    return service("youtube", "v3", refresh_token, scopes)
+
+
+def analytics_service(refresh_token: str, scopes: list[str]) -> Any:
+    return service("youtubeAnalytics", "v2", refresh_token, scopes)
@@ -1,59 +1,29 @@
 import json
-from datetime import datetime, timezone
+import os
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+import httplib2
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
 from app.admin import list_projects, get_project_podcast_image_prompt
 from app.config import get_settings
 from app.db import get_supabase
-from app.media.paths import podcast_image_path, roundup_audio_path, roundup_image_path, roundup_video_path
-from app.media.roundup_video import (
-    ensure_project_podcast_image,
-    ensure_roundup_image,
-    render_audio_roundup_video,
-)
+from app.locks import Lease, distributed_lock
+from app.media.artifacts import Artifact, ensure_roundup_video, roundup_cover_image
+from app.media.paths import roundup_youtube_upload_state_path
 from app.pipeline import fetch_latest_audio_roundup_for_project
+from app.stats_cache import invalidate_project_stats
+from app.youtube_client import get_youtube_account, youtube_service
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _load_client_secrets(settings: Any) -> tuple[str, str]:
-    if settings.youtube_client_id and settings.youtube_client_secret:
-        return settings.youtube_client_id, settings.youtube_client_secret
-    creds_path = Path(__file__).resolve().parent.parent / "credentials.json"
-    if not creds_path.exists():
-        raise RuntimeError("Missing YouTube client credentials. Set YOUTUBE_CLIENT_ID/SECRET or credentials.json.")
-    data = json.loads(creds_path.read_text(encoding="utf-8"))
-    block = data.get("installed") or data.get("web") or {}
-    client_id = block.get("client_id")
-    client_secret = block.get("client_secret")
-    if not client_id or not client_secret:
-        raise RuntimeError("Invalid credentials.json: missing client_id/client_secret.")
-    return client_id, client_secret
-
-
-def _credentials(refresh_token: str, scopes: list[str]) -> Credentials:
-    settings = get_settings()
-    client_id, client_secret = _load_client_secrets(settings)
-    creds = Credentials(
-        token=None,
-        refresh_token=refresh_token,
-        token_uri=settings.youtube_token_uri,
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=scopes or None,
-    )
-    creds.refresh(Request())
-    return creds
-
-
 def _project_language(project_id: str) -> str | None:
     sb = get_supabase()
     resp = (
@@ -137,8 +107,7 @@ def _default_description(project_name: str, language: str | None, subscribe_url:
     return f"{base}\n\n{cta}"
 
 
-def _ensure_roundup_assets(post: dict, project_id: str | None = None) -> tuple[Path, Path, dict]:
-    settings = get_settings()
+def _ensure_roundup_assets(post: dict, project_id: str | None = None) -> tuple[Artifact, Path, dict]:
     content = post.get("content") or {}
     if isinstance(content, str):
         try:
@@ -146,37 +115,130 @@ def _ensure_roundup_assets(post: dict, project_id: str | None = None) -> tuple[P
         except json.JSONDecodeError:
             content = {}
 
-    out_dir = Path(settings.media_output_dir)
-    video_path = roundup_video_path(out_dir, post["id"])
     project_prompt = get_project_podcast_image_prompt(project_id) if project_id else None
-    if not video_path.exists():
-        render_audio_roundup_video(
-            content, post["id"], video_path, project_id=project_id, project_prompt=project_prompt
-        )
-    image_path = roundup_image_path(out_dir, post["id"])
-    if project_id and project_prompt:
-        project_image_path = podcast_image_path(out_dir, project_id)
-        if not project_image_path.exists():
-            ensure_project_podcast_image(project_prompt, project_image_path, allow_placeholder=True)
-        if project_image_path.exists():
-            image_path = project_image_path
-    if not image_path.exists():
-        prompt = content.get("image_prompt") or content.get("imagePrompt")
-        ensure_roundup_image(prompt, image_path, allow_placeholder=True)
-    return video_path, image_path, content
-
-
-def _get_youtube_account(project_id: str) -> dict | None:
-    sb = get_supabase()
-    resp = (
-        sb.table("youtube_accounts")
-        .select("*")
-        .eq("project_id", project_id)
-        .limit(1)
-        .execute()
+    video = ensure_roundup_video(post["id"], content, project_id=project_id, project_prompt=project_prompt)
+    image_path = roundup_cover_image(post["id"], content, project_id, project_prompt)
+    return video, image_path, content
+
+
+# YouTube keeps resumable sessions for about a week; older ones are not worth probing.
+_UPLOAD_SESSION_MAX_AGE = timedelta(days=6)
+_UPLOAD_TRANSPORT_RETRIES = 3
+
+
+def _upload_state_path(post_id: str) -> Path:
+    return roundup_youtube_upload_state_path(Path(get_settings().media_output_dir), post_id)
+
+
+def _load_upload_state(post_id: str, checksum: str) -> dict | None:
+    path = _upload_state_path(post_id)
+    if not path.exists():
+        return None
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+        started_at = datetime.fromisoformat(state["started_at"])
+    except (OSError, json.JSONDecodeError, KeyError, ValueError):
+        return None
+    if not state.get("session_uri") or state.get("checksum") != checksum:
+        return None
+    if datetime.now(timezone.utc) - started_at > _UPLOAD_SESSION_MAX_AGE:
+        return None
+    return state
+
+
+def _save_upload_state(post_id: str, state: dict) -> None:
+    path = _upload_state_path(post_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _clear_upload_state(post_id: str) -> None:
+    _upload_state_path(post_id).unlink(missing_ok=True)
+
+
+def _upload_session_status(http: Any, session_uri: str, size: int) -> tuple[int | None, dict | None]:
+    # Resumable upload status query: an empty PUT with "Content-Range: bytes */<size>".
+    # 308 means incomplete, with the stored bytes in the Range header (none yet when
+    # it is missing); 200/201 means the upload already finished and carries the video
+    # resource. Returns (offset, None), (None, video), or (None, None) when the
+    # session is gone.
+    resp, content = http.request(
+        session_uri, method="PUT", body=b"", headers={"Content-Length": "0", "Content-Range": f"bytes */{size}"}
     )
-    data = resp.data or []
-    return data[0] if data else None
+    if resp.status == 308:
+        received = resp.get("range")
+        return (int(received.rsplit("-", 1)[1]) + 1 if received else 0), None
+    if resp.status in (200, 201):
+        return None, json.loads(content)
+    if resp.status in (404, 410):
+        return None, None
+    raise HttpError(resp, content, uri=session_uri)
+
+
+def _upload_video_resumable(youtube: Any, post_id: str, video: Artifact, body: dict) -> dict:
+    chunk_size = max(1, get_settings().youtube_upload_chunk_mb) * 1024 * 1024
+    media = MediaFileUpload(str(video.path), mimetype="video/mp4", chunksize=chunk_size, resumable=True)
+    request = youtube.videos().insert(part="snippet,status", body=body, media_body=media)
+
+    state = _load_upload_state(post_id, video.checksum)
+    if state:
+        # Ask the server how many bytes it already holds, then continue from there
+        # through the request's public resumable_uri/resumable_progress.
+        offset, finished = _upload_session_status(request.http, state["session_uri"], video.size_bytes)
+        if finished is not None:
+            _clear_upload_state(post_id)
+            print(f"youtube_upload_already_finished post_id={post_id}")
+            return finished
+        if offset is None:
+            _clear_upload_state(post_id)
+            print(f"youtube_upload_session_expired post_id={post_id}")
+            state = None
+        else:
+            request.resumable_uri = state["session_uri"]
+            request.resumable_progress = offset
+            print(f"youtube_upload_resume post_id={post_id} offset={offset}")
+    if not state:
+        state = {"checksum": video.checksum, "size": video.size_bytes, "started_at": _now_iso()}
+
+    def save_progress() -> None:
+        if not request.resumable_uri:
+            return
+        state["session_uri"] = request.resumable_uri
+        state["offset"] = request.resumable_progress
+        state["updated_at"] = _now_iso()
+        _save_upload_state(post_id, state)
+
+    response = None
+    failures = 0
+    while response is None:
+        try:
+            status, response = request.next_chunk(num_retries=3)
+        except HttpError as exc:
+            save_progress()
+            if exc.resp.status in (404, 410) and state.get("session_uri"):
+                # The session expired server-side; the next run starts a fresh upload.
+                _clear_upload_state(post_id)
+                print(f"youtube_upload_session_expired post_id={post_id}")
+            raise
+        except (OSError, httplib2.HttpLib2Error) as exc:
+            save_progress()
+            failures += 1
+            if failures > _UPLOAD_TRANSPORT_RETRIES:
+                raise
+            print(f"youtube_upload_retry post_id={post_id} offset={request.resumable_progress} error={exc}")
+            time.sleep(2**failures)
+            continue
+        failures = 0
+        if status:
+            save_progress()
+            print(
+                f"youtube_upload_progress post_id={post_id} bytes={status.resumable_progress} "
+                f"total={status.total_size} pct={status.progress() * 100:.0f}"
+            )
+    _clear_upload_state(post_id)
+    return response
 
 
 def _mark_post_uploaded(post_id: str, video_url: str) -> None:
@@ -225,7 +287,14 @@ def _record_audio_run(
 
 
 def upload_latest_roundup_for_project(project_id: str) -> dict:
-    account = _get_youtube_account(project_id)
+    with distributed_lock(f"youtube-upload:{project_id}") as lease:
+        if lease is None:
+            return {"status": "locked"}
+        return _upload_latest_roundup_for_project(project_id, lease)
+
+
+def _upload_latest_roundup_for_project(project_id: str, lease: Lease) -> dict:
+    account = get_youtube_account(project_id)
     if not account or not account.get("refresh_token"):
         return {"status": "missing_account"}
 
@@ -241,10 +310,9 @@ def upload_latest_roundup_for_project(project_id: str) -> dict:
         "https://www.googleapis.com/auth/youtube.upload",
         "https://www.googleapis.com/auth/youtube.readonly",
     ]
-    creds = _credentials(account["refresh_token"], scopes)
-    youtube = build("youtube", "v3", credentials=creds)
+    youtube = youtube_service(account["refresh_token"], scopes)
 
-    video_path, image_path, content = _ensure_roundup_assets(post, project_id=project_id)
+    video, image_path, content = _ensure_roundup_assets(post, project_id=project_id)
     language = _project_language(project_id) or "en"
     project_name = _project_name(project_id)
 
@@ -269,12 +337,8 @@ def upload_latest_roundup_for_project(project_id: str) -> dict:
         },
     }
 
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=body,
-        media_body=MediaFileUpload(str(video_path), mimetype="video/mp4", resumable=True),
-    )
-    response = request.execute()
+    lease.check()
+    response = _upload_video_resumable(youtube, post["id"], video, body)
     video_id = response.get("id")
     if not video_id:
         _record_audio_run(project_id, post["id"], content, status="error", error="missing_video_id")
@@ -289,6 +353,7 @@ def upload_latest_roundup_for_project(project_id: str) -> dict:
     video_url = f"https://youtu.be/{video_id}"
     _mark_post_uploaded(post["id"], video_url)
     _record_audio_run(project_id, post["id"], content, status="ok")
+    invalidate_project_stats(project_id)
     return {"status": "ok", "video_id": video_id, "url": video_url}
 
 
@@ -1,16 +1,14 @@
-from datetime import datetime, timedelta, timezone
-import json
-from pathlib import Path
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 from app.admin import list_projects
-from app.config import get_settings
 from app.db import get_supabase
+from app.stats_cache import invalidate_project_stats
+from app.youtube_client import analytics_service, get_youtube_account, youtube_service
 
 CHECKPOINTS_HOURS: dict[str, int] = {
     "1h": 1,
@@ -22,6 +20,9 @@ CHECKPOINTS_HOURS: dict[str, int] = {
     "30d": 720,
 }
 
+VIDEOS_LIST_MAX_IDS = 50
+ANALYTICS_FILTER_MAX_IDS = 200
+
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
@@ -31,51 +32,7 @@ def _now_iso() -> str:
     return _now().isoformat()
 
 
-def _load_client_secrets(settings: Any) -> tuple[str, str]:
-    if settings.youtube_client_id and settings.youtube_client_secret:
-        return settings.youtube_client_id, settings.youtube_client_secret
-    creds_path = Path(__file__).resolve().parent.parent / "credentials.json"
-    if not creds_path.exists():
-        raise RuntimeError("Missing YouTube client credentials. Set YOUTUBE_CLIENT_ID/SECRET or credentials.json.")
-    data = json.loads(creds_path.read_text(encoding="utf-8"))
-    block = data.get("installed") or data.get("web") or {}
-    client_id = block.get("client_id")
-    client_secret = block.get("client_secret")
-    if not client_id or not client_secret:
-        raise RuntimeError("Invalid credentials.json: missing client_id/client_secret.")
-    return client_id, client_secret
-
-
-def _credentials(refresh_token: str, scopes: list[str]) -> Credentials:
-    settings = get_settings()
-    client_id, client_secret = _load_client_secrets(settings)
-    creds = Credentials(
-        token=None,
-        refresh_token=refresh_token,
-        token_uri=settings.youtube_token_uri,
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=scopes or None,
-    )
-    creds.refresh(Request())
-    return creds
-
-
-def _get_youtube_account(project_id: str) -> dict | None:
-    sb = get_supabase()
-    resp = (
-        sb.table("youtube_accounts")
-        .select("*")
-        .eq("project_id", project_id)
-        .limit(1)
-        .execute()
-    )
-    data = resp.data or []
-    return data[0] if data else None
-
-
-def _get_channel_id(creds: Credentials) -> str | None:
-    youtube = build("youtube", "v3", credentials=creds)
+def _get_channel_id(youtube: Any) -> str | None:
     resp = youtube.channels().list(part="id", mine=True).execute()
     items = resp.get("items", []) if resp else []
     if not items:
@@ -113,91 +70,135 @@ def _to_float(value: Any) -> float | None:
         return None
 
 
-def _fetch_video_stats(youtube: Any, video_id: str) -> dict:
-    resp = youtube.videos().list(part="statistics", id=video_id).execute()
-    items = resp.get("items", []) if resp else []
-    if not items:
-        return {}
-    stats = items[0].get("statistics") or {}
-    return {
-        "views": _to_int(stats.get("viewCount")),
-        "likes": _to_int(stats.get("likeCount")),
-        "comments": _to_int(stats.get("commentCount")),
-    }
+def _chunks(items: list[str], size: int) -> list[list[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
 
 
-def _fetch_analytics_stats(
-    analytics: Any,
-    channel_id: str,
-    video_id: str,
-    posted_at: datetime,
-    checkpoint_hours: int,
-) -> dict:
+def _fetch_video_stats_batch(youtube: Any, video_ids: list[str]) -> dict[str, dict]:
+    stats_by_video: dict[str, dict] = {}
+    for chunk in _chunks(sorted(set(video_ids)), VIDEOS_LIST_MAX_IDS):
+        resp = (
+            youtube.videos()
+            .list(part="statistics", id=",".join(chunk), maxResults=len(chunk))
+            .execute()
+        )
+        for item in (resp or {}).get("items", []):
+            stats = item.get("statistics") or {}
+            stats_by_video[item.get("id")] = {
+                "views": _to_int(stats.get("viewCount")),
+                "likes": _to_int(stats.get("likeCount")),
+                "comments": _to_int(stats.get("commentCount")),
+            }
+    return stats_by_video
+
+
+def _analytics_window(posted_at: datetime, checkpoint_hours: int) -> tuple[date, date] | None:
     start_date = posted_at.date()
     end_dt = posted_at + timedelta(hours=checkpoint_hours)
     yesterday = (_now() - timedelta(days=1)).date()
     end_date = min(end_dt.date(), yesterday)
     if end_date < start_date:
-        return {}
-    report = (
-        analytics.reports()
-        .query(
-            ids=f"channel=={channel_id}",
-            startDate=start_date.isoformat(),
-            endDate=end_date.isoformat(),
-            metrics="estimatedMinutesWatched,averageViewDuration",
-            filters=f"video=={video_id}",
-        )
-        .execute()
-    )
-    rows = report.get("rows") or []
-    if not rows:
-        return {}
-    return {
-        "watch_time_minutes": _to_float(rows[0][0]),
-        "average_view_duration_seconds": _to_float(rows[0][1]),
-    }
+        return None
+    return start_date, end_date
 
 
-def _resolve_project_ids(posts: list[dict]) -> dict[str, str | None]:
-    sb = get_supabase()
-    post_ids = [p["id"] for p in posts if p.get("id")]
-    if not post_ids:
-        return {}
-    usage = (
-        sb.table("article_usage")
-        .select("post_id, article_id")
-        .in_("post_id", post_ids)
-        .execute()
-        .data
-        or []
-    )
-    article_ids = list({u.get("article_id") for u in usage if u.get("article_id")})
-    if not article_ids:
-        return {}
-    articles = (
-        sb.table("articles")
-        .select("id, project_id")
-        .in_("id", article_ids)
-        .execute()
-        .data
-        or []
-    )
-    article_project = {a["id"]: a.get("project_id") for a in articles if a.get("id")}
-    post_project: dict[str, str | None] = {}
-    for row in usage:
-        post_id = row.get("post_id")
-        article_id = row.get("article_id")
-        if post_id and article_id:
-            post_project[post_id] = article_project.get(article_id)
-    return post_project
+def _fetch_analytics_stats_batch(
+    analytics: Any,
+    channel_id: str,
+    start_date: date,
+    end_date: date,
+    video_ids: list[str],
+) -> dict[str, dict]:
+    # One report per date window, split by the video dimension, instead of one per video.
+    stats_by_video: dict[str, dict] = {}
+    for chunk in _chunks(sorted(set(video_ids)), ANALYTICS_FILTER_MAX_IDS):
+        try:
+            report = (
+                analytics.reports()
+                .query(
+                    ids=f"channel=={channel_id}",
+                    startDate=start_date.isoformat(),
+                    endDate=end_date.isoformat(),
+                    metrics="estimatedMinutesWatched,averageViewDuration",
+                    dimensions="video",
+                    filters=f"video=={','.join(chunk)}",
+                    # The video dimension requires a sort whenever maxResults is set.
+                    sort="-estimatedMinutesWatched",
+                    maxResults=len(chunk),
+                )
+                .execute()
+            )
+        except HttpError as exc:
+            # Leave these videos without watch time; the checkpoint is retried next run.
+            print(
+                f"youtube_analytics_window_failed channel_id={channel_id} start={start_date} "
+                f"end={end_date} videos={len(chunk)} status={exc.resp.status}"
+            )
+            continue
+        for row in report.get("rows") or []:
+            if len(row) < 3:
+                continue
+            stats_by_video[row[0]] = {
+                "watch_time_minutes": _to_float(row[1]),
+                "average_view_duration_seconds": _to_float(row[2]),
+            }
+    return stats_by_video
+
+
+@dataclass
+class _DueCheckpoint:
+    post_id: str
+    video_id: str
+    checkpoint: str
+    window: tuple[date, date] | None
+    is_new: bool
+
+
+def _plan_due_checkpoints(
+    posts: list[dict], existing: dict[str, dict[str, dict]], now: datetime
+) -> list[_DueCheckpoint]:
+    due: list[_DueCheckpoint] = []
+    for post in posts:
+        post_id = post.get("id")
+        video_id = _parse_video_id(post.get("post_url"))
+        if not post_id or not video_id:
+            continue
+        posted_at_raw = post.get("posted_at") or post.get("created_at")
+        if not posted_at_raw:
+            continue
+        try:
+            posted_at = datetime.fromisoformat(posted_at_raw.replace("Z", "+00:00"))
+        except Exception:
+            continue
+        elapsed_hours = (now - posted_at).total_seconds() / 3600
+        post_existing = existing.get(post_id) or {}
+        for checkpoint, hours in CHECKPOINTS_HOURS.items():
+            if elapsed_hours < hours:
+                continue
+            row = post_existing.get(checkpoint)
+            if row is not None and (
+                row.get("watch_time_minutes") is not None
+                and row.get("average_view_duration_seconds") is not None
+            ):
+                continue
+            due.append(
+                _DueCheckpoint(
+                    post_id=post_id,
+                    video_id=video_id,
+                    checkpoint=checkpoint,
+                    window=_analytics_window(posted_at, hours),
+                    is_new=row is None,
+                )
+            )
+    return due
 
 
-def _list_posted_roundups(limit: int = 50) -> list[dict]:
+def _list_posted_roundups(project_id: str, limit: int = 50) -> list[dict]:
     sb = get_supabase()
     resp = (
         sb.table("posts")
         .select("id, post_url, posted_at, content, created_at")
+        .eq("project_id", project_id)
         .eq("content_type", "audio_roundup")
         .eq("posted", True)
         .order("posted_at", desc=True)
@@ -207,110 +208,111 @@ def _list_posted_roundups(limit: int = 50) -> list[dict]:
     return resp.data or []
 
 
-def _existing_metrics(post_id: str) -> dict[str, dict]:
+def _existing_metrics(post_ids: list[str]) -> dict[str, dict[str, dict]]:
+    if not post_ids:
+        return {}
     sb = get_supabase()
     resp = (
         sb.table("youtube_video_metrics")
-        .select("checkpoint, watch_time_minutes, average_view_duration_seconds")
-        .eq("post_id", post_id)
+        .select("post_id, checkpoint, watch_time_minutes, average_view_duration_seconds")
+        .in_("post_id", post_ids)
         .execute()
     )
-    rows = resp.data or []
-    return {row.get("checkpoint"): row for row in rows if row.get("checkpoint")}
+    existing: dict[str, dict[str, dict]] = {}
+    for row in resp.data or []:
+        if row.get("post_id") and row.get("checkpoint"):
+            existing.setdefault(row["post_id"], {})[row["checkpoint"]] = row
+    return existing
 
 
 def fetch_youtube_video_metrics_for_project(project_id: str, max_posts: int = 50) -> dict:
-    account = _get_youtube_account(project_id)
+    account = get_youtube_account(project_id)
     if not account or not account.get("refresh_token"):
         return {"status": "missing_account"}
     scopes = account.get("scopes") or []
     if "https://www.googleapis.com/auth/youtube.readonly" not in scopes:
         return {"status": "missing_scope"}
 
-    posts = _list_posted_roundups(limit=max_posts)
-    if not posts:
-        return {"status": "no_posts"}
-    post_project = _resolve_project_ids(posts)
-    posts = [p for p in posts if post_project.get(p["id"]) == project_id]
+    posts = _list_posted_roundups(project_id, limit=max_posts)
     if not posts:
         return {"status": "no_posts"}
 
-    creds = _credentials(account["refresh_token"], scopes)
-    youtube = build("youtube", "v3", credentials=creds)
-    analytics = build("youtubeAnalytics", "v2", credentials=creds)
-    channel_id = _get_channel_id(creds)
+    youtube = youtube_service(account["refresh_token"], scopes)
+    analytics = analytics_service(account["refresh_token"], scopes)
+    channel_id = _get_channel_id(youtube)
     if not channel_id:
         return {"status": "no_channel"}
 
-    sb = get_supabase()
     now = _now()
-    inserted = 0
-    updated = 0
-
-    for post in posts:
-        post_id = post.get("id")
-        post_url = post.get("post_url")
-        if not post_id or not post_url:
-            continue
-        video_id = _parse_video_id(post_url)
-        if not video_id:
-            continue
-        posted_at_raw = post.get("posted_at") or post.get("created_at")
-        if not posted_at_raw:
-            continue
-        try:
-            posted_at = datetime.fromisoformat(posted_at_raw.replace("Z", "+00:00"))
-        except Exception:
-            continue
-        elapsed_hours = (now - posted_at).total_seconds() / 3600
-        existing = _existing_metrics(post_id)
+    existing = _existing_metrics([post["id"] for post in posts if post.get("id")])
+    due = _plan_due_checkpoints(posts, existing, now)
+    if not due:
+        return {"status": "ok", "inserted": 0, "updated": 0}
+
+    new_video_ids = [item.video_id for item in due if item.is_new]
+    video_stats = _fetch_video_stats_batch(youtube, new_video_ids) if new_video_ids else {}
+
+    windows: dict[tuple[date, date], list[str]] = {}
+    for item in due:
+        if item.window:
+            windows.setdefault(item.window, []).append(item.video_id)
+    analytics_stats: dict[tuple[date, date], dict[str, dict]] = {}
+    for window, video_ids in windows.items():
+        analytics_stats[window] = _fetch_analytics_stats_batch(
+            analytics, channel_id, window[0], window[1], video_ids
+        )
+    print(
+        f"youtube_video_metrics_planned project_id={project_id} due={len(due)} "
+        f"videos={len(set(new_video_ids))} analytics_windows={len(windows)}"
+    )
 
-        for checkpoint, hours in CHECKPOINTS_HOURS.items():
-            if elapsed_hours < hours:
-                continue
-            if checkpoint not in existing:
-                stats = _fetch_video_stats(youtube, video_id)
-                analytics_stats = _fetch_analytics_stats(
-                    analytics, channel_id, video_id, posted_at, hours
-                )
-                payload = {
+    inserts: list[dict] = []
+    updates: list[dict] = []
+    now_iso = now.isoformat()
+    for item in due:
+        watch = (analytics_stats.get(item.window) or {}).get(item.video_id, {}) if item.window else {}
+        if item.is_new:
+            stats = video_stats.get(item.video_id, {})
+            inserts.append(
+                {
                     "project_id": project_id,
-                    "post_id": post_id,
-                    "video_id": video_id,
-                    "checkpoint": checkpoint,
+                    "post_id": item.post_id,
+                    "video_id": item.video_id,
+                    "checkpoint": item.checkpoint,
                     "views": stats.get("views"),
                     "likes": stats.get("likes"),
                     "comments": stats.get("comments"),
-                    "watch_time_minutes": analytics_stats.get("watch_time_minutes"),
-                    "average_view_duration_seconds": analytics_stats.get("average_view_duration_seconds"),
-                    "collected_at": now.isoformat(),
-                    "created_at": now.isoformat(),
-                    "updated_at": now.isoformat(),
+                    "watch_time_minutes": watch.get("watch_time_minutes"),
+                    "average_view_duration_seconds": watch.get("average_view_duration_seconds"),
+                    "collected_at": now_iso,
+                    "created_at": now_iso,
+                    "updated_at": now_iso,
                 }
-                sb.table("youtube_video_metrics").insert(payload).execute()
-                inserted += 1
-                continue
-            existing_row = existing.get(checkpoint) or {}
-            if (
-                existing_row.get("watch_time_minutes") is None
-                or existing_row.get("average_view_duration_seconds") is None
-            ):
-                analytics_stats = _fetch_analytics_stats(
-                    analytics, channel_id, video_id, posted_at, hours
-                )
-                if analytics_stats:
-                    sb.table("youtube_video_metrics").update(
-                        {
-                            "watch_time_minutes": analytics_stats.get("watch_time_minutes"),
-                            "average_view_duration_seconds": analytics_stats.get(
-                                "average_view_duration_seconds"
-                            ),
-                            "updated_at": now.isoformat(),
-                        }
-                    ).eq("post_id", post_id).eq("checkpoint", checkpoint).execute()
-                    updated += 1
-
-    return {"status": "ok", "inserted": inserted, "updated": updated}
+            )
+        elif watch:
+            # Upsert on (post_id, checkpoint) only touches the columns sent, so
+            # the counts collected at the checkpoint are preserved.
+            updates.append(
+                {
+                    "project_id": project_id,
+                    "post_id": item.post_id,
+                    "video_id": item.video_id,
+                    "checkpoint": item.checkpoint,
+                    "watch_time_minutes": watch.get("watch_time_minutes"),
+                    "average_view_duration_seconds": watch.get("average_view_duration_seconds"),
+                    "updated_at": now_iso,
+                }
+            )
+
+    sb = get_supabase()
+    if inserts:
+        sb.table("youtube_video_metrics").insert(inserts).execute()
+    if updates:
+        sb.table("youtube_video_metrics").upsert(updates, on_conflict="post_id,checkpoint").execute()
+    if inserts or updates:
+        invalidate_project_stats(project_id)
+
+    return {"status": "ok", "inserted": len(inserts), "updated": len(updates)}
 
 
 def fetch_youtube_video_metrics_all(max_posts: int = 50) -> list[dict]:
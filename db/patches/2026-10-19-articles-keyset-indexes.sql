@@ -0,0 +1,16 @@
+-- Keyset pagination for the admin articles listing (score, age and status orderings).
+CREATE INDEX IF NOT EXISTS idx_articles_project_score_page
+  ON articles(project_id, judge_score DESC NULLS LAST, scraped_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_articles_project_age_page
+  ON articles(project_id, scraped_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_articles_project_status_page
+  ON articles(
+    project_id,
+    unusable ASC NULLS LAST,
+    scored DESC NULLS LAST,
+    processed DESC NULLS LAST,
+    scraped_at DESC NULLS LAST,
+    id DESC
+  );
@@ -0,0 +1,66 @@
+CREATE TABLE IF NOT EXISTS jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  kind TEXT NOT NULL,
+  target_id TEXT,
+  params JSONB NOT NULL DEFAULT '{}'::jsonb,
+  dedupe_key TEXT,
+  status TEXT NOT NULL DEFAULT 'queued',
+  progress NUMERIC(5,2) NOT NULL DEFAULT 0,
+  message TEXT,
+  result JSONB,
+  error TEXT,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  worker_id TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  started_at TIMESTAMP WITH TIME ZONE,
+  heartbeat_at TIMESTAMP WITH TIME ZONE,
+  finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- At most one queued/running job per target; duplicate submissions reuse it.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe
+  ON jobs(dedupe_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs(created_at) WHERE status = 'queued';
+
+DROP FUNCTION IF EXISTS claim_job(TEXT, INTEGER);
+
+CREATE OR REPLACE FUNCTION claim_job(
+  p_worker TEXT,
+  p_stale_seconds INTEGER DEFAULT 600,
+  p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS SETOF jobs AS $$
+BEGIN
+  -- Jobs whose worker stopped heartbeating go back to the queue, unless they
+  -- already used up their attempts (e.g. they keep crashing the worker).
+  UPDATE jobs
+  SET status = 'error',
+      worker_id = NULL,
+      error = 'Worker stopped heartbeating after ' || attempts || ' attempts',
+      finished_at = NOW()
+  WHERE status = 'running'
+    AND heartbeat_at < NOW() - make_interval(secs => p_stale_seconds)
+    AND attempts >= p_max_attempts;
+
+  UPDATE jobs
+  SET status = 'queued', worker_id = NULL
+  WHERE status = 'running'
+    AND heartbeat_at < NOW() - make_interval(secs => p_stale_seconds);
+
+  RETURN QUERY
+  UPDATE jobs
+  SET status = 'running',
+      worker_id = p_worker,
+      attempts = attempts + 1,
+      started_at = NOW(),
+      heartbeat_at = NOW()
+  WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = 'queued'
+    ORDER BY created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+  )
+  RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,49 @@
+-- Leased locks for singleton worker operations (see app/locks.py). Every
+-- acquisition gets a new token from lock_fencing_seq, so a holder whose lease
+-- expired and was taken over can tell that its token is no longer current.
+CREATE SEQUENCE IF NOT EXISTS lock_fencing_seq;
+
+CREATE TABLE IF NOT EXISTS locks (
+  name TEXT PRIMARY KEY,
+  owner TEXT NOT NULL,
+  token BIGINT NOT NULL,
+  acquired_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION acquire_lock(p_name TEXT, p_owner TEXT, p_ttl_seconds INTEGER)
+RETURNS BIGINT AS $$
+DECLARE
+  v_token BIGINT;
+BEGIN
+  -- Takes the lock when it is free or its lease has expired; NULL when held.
+  INSERT INTO locks (name, owner, token, acquired_at, expires_at)
+  VALUES (p_name, p_owner, nextval('lock_fencing_seq'), NOW(), NOW() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (name) DO UPDATE
+  SET owner = EXCLUDED.owner,
+      token = EXCLUDED.token,
+      acquired_at = EXCLUDED.acquired_at,
+      expires_at = EXCLUDED.expires_at
+  WHERE locks.expires_at < NOW()
+  RETURNING token INTO v_token;
+  RETURN v_token;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION renew_lock(p_name TEXT, p_token BIGINT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+BEGIN
+  UPDATE locks
+  SET expires_at = NOW() + make_interval(secs => p_ttl_seconds)
+  WHERE name = p_name AND token = p_token AND expires_at >= NOW();
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION release_lock(p_name TEXT, p_token BIGINT)
+RETURNS BOOLEAN AS $$
+BEGIN
+  DELETE FROM locks WHERE name = p_name AND token = p_token;
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
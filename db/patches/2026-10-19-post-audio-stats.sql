@@ -0,0 +1,5 @@
+ALTER TABLE IF EXISTS posts
+  ADD COLUMN IF NOT EXISTS audio_bytes BIGINT;
+
+ALTER TABLE IF EXISTS posts
+  ADD COLUMN IF NOT EXISTS audio_duration_seconds NUMERIC(10, 3);
@@ -0,0 +1,31 @@
+ALTER TABLE IF EXISTS posts
+  ADD COLUMN IF NOT EXISTS project_id UUID REFERENCES projects(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_posts_project_type_created
+  ON posts(project_id, content_type, created_at DESC);
+
+-- Posts generated from a single article.
+UPDATE posts p
+SET project_id = a.project_id
+FROM articles a
+WHERE p.project_id IS NULL
+  AND p.article_id = a.id
+  AND a.project_id IS NOT NULL;
+
+-- Roundups reference their articles through article_usage. Like run_audio_roundup,
+-- use the project most of the stories came from (ties go to the earliest used).
+UPDATE posts p
+SET project_id = u.project_id
+FROM (
+  SELECT DISTINCT ON (c.post_id) c.post_id, c.project_id
+  FROM (
+    SELECT au.post_id, a.project_id, COUNT(*) AS n, MIN(au.used_at) AS first_used_at
+    FROM article_usage au
+    JOIN articles a ON a.id = au.article_id
+    WHERE au.post_id IS NOT NULL AND a.project_id IS NOT NULL
+    GROUP BY au.post_id, a.project_id
+  ) c
+  ORDER BY c.post_id, c.n DESC, c.first_used_at
+) u
+WHERE p.project_id IS NULL
+  AND p.id = u.post_id;
@@ -0,0 +1,31 @@
+-- Covering index so per-source counts and score averages are index-only scans.
+CREATE INDEX IF NOT EXISTS idx_articles_project_source_score
+  ON articles(project_id, source_id) INCLUDE (judge_score);
+
+CREATE INDEX IF NOT EXISTS idx_article_usage_audio_article
+  ON article_usage(article_id) WHERE usage_type = 'audio_roundup';
+
+CREATE OR REPLACE FUNCTION project_source_stats(p_project_id UUID)
+RETURNS TABLE (
+  source_id UUID,
+  total_articles BIGINT,
+  used_in_audio BIGINT,
+  avg_score NUMERIC
+) AS $$
+  SELECT
+    a.source_id,
+    COUNT(*) AS total_articles,
+    COALESCE(SUM(u.uses), 0)::BIGINT AS used_in_audio,
+    ROUND(AVG(a.judge_score)::NUMERIC, 2) AS avg_score
+  FROM articles a
+  LEFT JOIN (
+    SELECT au.article_id, COUNT(*) AS uses
+    FROM article_usage au
+    JOIN articles ua ON ua.id = au.article_id
+    WHERE au.usage_type = 'audio_roundup'
+      AND ua.project_id = p_project_id
+    GROUP BY au.article_id
+  ) u ON u.article_id = a.id
+  WHERE a.project_id = p_project_id
+  GROUP BY a.source_id;
+$$ LANGUAGE sql STABLE;
@@ -141,6 +141,8 @@ CREATE TABLE IF NOT EXISTS posts (
   podcast_posted BOOLEAN DEFAULT FALSE,
   podcast_published_at TIMESTAMP WITH TIME ZONE,
   podcast_url TEXT,
+  audio_bytes BIGINT,
+  audio_duration_seconds NUMERIC(10, 3),
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
@@ -179,6 +181,8 @@ COMMENT ON COLUMN posts.posted IS 'TRUE after publishing to platform';
 COMMENT ON COLUMN posts.post_url IS 'URL of published post (from platform API response)';
 COMMENT ON COLUMN posts.podcast_posted IS 'TRUE after publishing to podcast RSS';
 COMMENT ON COLUMN posts.podcast_url IS 'URL of podcast episode audio (R2)';
+COMMENT ON COLUMN posts.audio_bytes IS 'Byte length of the rendered episode MP3';
+COMMENT ON COLUMN posts.audio_duration_seconds IS 'Measured duration of the rendered episode MP3';
 
 -- ============================================================
 -- TABLE 3: performance_metrics
@@ -440,6 +444,56 @@ CREATE TABLE IF NOT EXISTS tts_rotation (
 
 COMMENT ON TABLE tts_rotation IS 'Global counter for rotating TTS voice combinations';
 
+-- ============================================================
+-- TABLE 12: jobs
+-- Background jobs for long-running API operations
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  kind TEXT NOT NULL,
+  target_id TEXT,
+  params JSONB NOT NULL DEFAULT '{}'::jsonb,
+  dedupe_key TEXT,
+  status TEXT NOT NULL DEFAULT 'queued',
+  progress NUMERIC(5,2) NOT NULL DEFAULT 0,
+  message TEXT,
+  result JSONB,
+  error TEXT,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  worker_id TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  started_at TIMESTAMP WITH TIME ZONE,
+  heartbeat_at TIMESTAMP WITH TIME ZONE,
+  finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- At most one queued/running job per target; duplicate submissions reuse it.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe
+  ON jobs(dedupe_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs(created_at) WHERE status = 'queued';
+
+COMMENT ON TABLE jobs IS 'Background jobs (pipeline runs, roundup generation and renders) claimed by app.worker jobs-worker';
+COMMENT ON COLUMN jobs.status IS 'queued, running, done or error';
+
+-- ============================================================
+-- TABLE 13: locks
+-- Leased locks for singleton worker operations across hosts
+-- ============================================================
+
+CREATE SEQUENCE IF NOT EXISTS lock_fencing_seq;
+
+CREATE TABLE IF NOT EXISTS locks (
+  name TEXT PRIMARY KEY,
+  owner TEXT NOT NULL,
+  token BIGINT NOT NULL,
+  acquired_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+COMMENT ON TABLE locks IS 'Leases taken by app/locks.py around podcast publish, YouTube upload, audio roundup and cleanup';
+COMMENT ON COLUMN locks.token IS 'Fencing token from lock_fencing_seq; a new value on every acquisition';
+
 -- ============================================================
 -- MIGRATION HELPERS (safe to re-run)
 -- ============================================================
@@ -534,6 +588,44 @@ ALTER TABLE IF EXISTS posts
 ALTER TABLE IF EXISTS posts
   ADD COLUMN IF NOT EXISTS podcast_url TEXT;
 
+ALTER TABLE IF EXISTS posts
+  ADD COLUMN IF NOT EXISTS audio_bytes BIGINT;
+
+ALTER TABLE IF EXISTS posts
+  ADD COLUMN IF NOT EXISTS audio_duration_seconds NUMERIC(10, 3);
+
+ALTER TABLE IF EXISTS posts
+  ADD COLUMN IF NOT EXISTS project_id UUID REFERENCES projects(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_posts_project_type_created
+  ON posts(project_id, content_type, created_at DESC);
+
+-- Covering index so per-source counts and score averages are index-only scans.
+CREATE INDEX IF NOT EXISTS idx_articles_project_source_score
+  ON articles(project_id, source_id) INCLUDE (judge_score);
+
+CREATE INDEX IF NOT EXISTS idx_article_usage_audio_article
+  ON article_usage(article_id) WHERE usage_type = 'audio_roundup';
+
+-- Keyset pagination for the admin articles listing (score, age and status orderings).
+CREATE INDEX IF NOT EXISTS idx_articles_project_score_page
+  ON articles(project_id, judge_score DESC NULLS LAST, scraped_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_articles_project_age_page
+  ON articles(project_id, scraped_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_articles_project_status_page
+  ON articles(
+    project_id,
+    unusable ASC NULLS LAST,
+    scored DESC NULLS LAST,
+    processed DESC NULLS LAST,
+    scraped_at DESC NULLS LAST,
+    id DESC
+  );
+
+COMMENT ON COLUMN posts.project_id IS 'Owning project (denormalized from article_usage -> articles)';
+
 -- ============================================================
 -- HELPER VIEWS (Optional but useful)
 -- ============================================================
@@ -663,6 +755,119 @@ $$ LANGUAGE plpgsql;
 
 COMMENT ON FUNCTION next_tts_combo IS 'Atomically increments TTS rotation counter and returns index modulo p_mod';
 
+-- Function: Per-source article stats for a project (stats page)
+CREATE OR REPLACE FUNCTION project_source_stats(p_project_id UUID)
+RETURNS TABLE (
+  source_id UUID,
+  total_articles BIGINT,
+  used_in_audio BIGINT,
+  avg_score NUMERIC
+) AS $$
+  SELECT
+    a.source_id,
+    COUNT(*) AS total_articles,
+    COALESCE(SUM(u.uses), 0)::BIGINT AS used_in_audio,
+    ROUND(AVG(a.judge_score)::NUMERIC, 2) AS avg_score
+  FROM articles a
+  LEFT JOIN (
+    SELECT au.article_id, COUNT(*) AS uses
+    FROM article_usage au
+    JOIN articles ua ON ua.id = au.article_id
+    WHERE au.usage_type = 'audio_roundup'
+      AND ua.project_id = p_project_id
+    GROUP BY au.article_id
+  ) u ON u.article_id = a.id
+  WHERE a.project_id = p_project_id
+  GROUP BY a.source_id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION project_source_stats IS 'Per-source article totals, audio roundup usage and average judge score for a project';
+
+-- Function: Claim the oldest queued job for a worker (requeues stale running jobs)
+DROP FUNCTION IF EXISTS claim_job(TEXT, INTEGER);
+
+CREATE OR REPLACE FUNCTION claim_job(
+  p_worker TEXT,
+  p_stale_seconds INTEGER DEFAULT 600,
+  p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS SETOF jobs AS $$
+BEGIN
+  -- Jobs whose worker stopped heartbeating go back to the queue, unless they
+  -- already used up their attempts (e.g. they keep crashing the worker).
+  UPDATE jobs
+  SET status = 'error',
+      worker_id = NULL,
+      error = 'Worker stopped heartbeating after ' || attempts || ' attempts',
+      finished_at = NOW()
+  WHERE status = 'running'
+    AND heartbeat_at < NOW() - make_interval(secs => p_stale_seconds)
+    AND attempts >= p_max_attempts;
+
+  UPDATE jobs
+  SET status = 'queued', worker_id = NULL
+  WHERE status = 'running'
+    AND heartbeat_at < NOW() - make_interval(secs => p_stale_seconds);
+
+  RETURN QUERY
+  UPDATE jobs
+  SET status = 'running',
+      worker_id = p_worker,
+      attempts = attempts + 1,
+      started_at = NOW(),
+      heartbeat_at = NOW()
+  WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = 'queued'
+    ORDER BY created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+  )
+  RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION claim_job IS 'Atomically claims the oldest queued job with SKIP LOCKED; requeues running jobs with a stale heartbeat, failing them after p_max_attempts';
+
+-- Function: Take a leased lock (free or expired); returns the fencing token or NULL when held
+CREATE OR REPLACE FUNCTION acquire_lock(p_name TEXT, p_owner TEXT, p_ttl_seconds INTEGER)
+RETURNS BIGINT AS $$
+DECLARE
+  v_token BIGINT;
+BEGIN
+  INSERT INTO locks (name, owner, token, acquired_at, expires_at)
+  VALUES (p_name, p_owner, nextval('lock_fencing_seq'), NOW(), NOW() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (name) DO UPDATE
+  SET owner = EXCLUDED.owner,
+      token = EXCLUDED.token,
+      acquired_at = EXCLUDED.acquired_at,
+      expires_at = EXCLUDED.expires_at
+  WHERE locks.expires_at < NOW()
+  RETURNING token INTO v_token;
+  RETURN v_token;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Extend a lease; false once the token is expired or superseded
+CREATE OR REPLACE FUNCTION renew_lock(p_name TEXT, p_token BIGINT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+BEGIN
+  UPDATE locks
+  SET expires_at = NOW() + make_interval(secs => p_ttl_seconds)
+  WHERE name = p_name AND token = p_token AND expires_at >= NOW();
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Release a lease held with the given token
+CREATE OR REPLACE FUNCTION release_lock(p_name TEXT, p_token BIGINT)
+RETURNS BOOLEAN AS $$
+BEGIN
+  DELETE FROM locks WHERE name = p_name AND token = p_token;
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================
 -- SAMPLE DATA (Optional - for testing)
 -- ============================================================
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from app.media.video import RENDER_PROFILES, build_video_command
+
+# Compares encode time and output size of the render profiles against the
+# original (profile-less) ffmpeg command using a synthetic episode.
+
+
+def _make_inputs(work_dir: Path, ffmpeg: str, seconds: int, size: tuple[int, int]) -> tuple[Path, Path]:
+    image_path = work_dir / "image.png"
+    img = Image.new("RGB", size, color=(20, 20, 20))
+    ImageDraw.Draw(img).text((60, 80), "Render benchmark", fill=(255, 255, 255))
+    img.save(image_path)
+
+    audio_path = work_dir / "audio.mp3"
+    subprocess.run(
+        [
+            ffmpeg,
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=220:duration={seconds}",
+            "-c:a",
+            "libmp3lame",
+            "-b:a",
+            "128k",
+            str(audio_path),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return image_path, audio_path
+
+
+def _run(cmd: list[str], cwd: Path) -> float:
+    started = time.perf_counter()
+    subprocess.run(cmd, check=True, cwd=cwd, capture_output=True)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ffmpeg render profiles")
+    parser.add_argument("--seconds", type=int, default=600, help="Episode length in seconds")
+    parser.add_argument("--ffmpeg", type=str, default=None, help="ffmpeg binary (defaults to PATH)")
+    parser.add_argument(
+        "--profiles",
+        type=str,
+        default="still",
+        help="Comma-separated profiles to compare against the original command",
+    )
+    args = parser.parse_args()
+
+    ffmpeg = args.ffmpeg or shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise SystemExit("ffmpeg not found. Pass --ffmpeg or add ffmpeg to PATH.")
+
+    names = [n.strip() for n in args.profiles.split(",") if n.strip()]
+    for name in names:
+        if name not in RENDER_PROFILES:
+            raise SystemExit(f"Unknown profile: {name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        image, audio = _make_inputs(work_dir, ffmpeg, args.seconds, (1280, 720))
+        baseline_out = work_dir / "baseline.mp4"
+        baseline_cmd = build_video_command(
+            ffmpeg, [image], audio, baseline_out, seconds_per_image=args.seconds
+        )
+        baseline_time = _run(baseline_cmd, work_dir)
+        baseline_size = baseline_out.stat().st_size
+        print(f"profile=original seconds={baseline_time:.2f} bytes={baseline_size}")
+
+        for name in names:
+            out = work_dir / f"{name}.mp4"
+            cmd = build_video_command(
+                ffmpeg, [image], audio, out, seconds_per_image=args.seconds, profile=name
+            )
+            elapsed = _run(cmd, work_dir)
+            size = out.stat().st_size
+            speedup = baseline_time / elapsed if elapsed else 0.0
+            print(
+                f"profile={name} seconds={elapsed:.2f} bytes={size} "
+                f"speedup={speedup:.1f}x size_ratio={size / max(1, baseline_size):.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
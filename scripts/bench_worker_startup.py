@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Measures what each `python -m app.worker <command>` pays for imports before it
+# does any work, using `python -X importtime`. The modules a command needs are read
+# from the imports inside its branch of app/worker.py. With --check, exits 1 if the
+# worker module itself, or a command that does not need them, loads the heavy
+# client libraries.
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKER = ROOT / "app" / "worker.py"
+
+HEAVY = ("googleapiclient", "boto3", "PIL", "feedparser", "trafilatura")
+LIGHT_COMMANDS = (
+    "extract",
+    "judge",
+    "generate",
+    "second-judge",
+    "cleanup",
+    "extract-loop",
+    "judge-loop",
+    "generate-loop",
+    "second-judge-loop",
+)
+
+
+def _imports(node: ast.AST) -> list[str]:
+    modules = []
+    for child in ast.walk(node):
+        if isinstance(child, ast.ImportFrom) and child.module:
+            prefix = "app." if child.level else ""
+            modules.append(prefix + child.module)
+        elif isinstance(child, ast.Import):
+            modules.extend(alias.name for alias in child.names)
+    return modules
+
+
+def command_modules() -> dict[str, list[str]]:
+    tree = ast.parse(WORKER.read_text(encoding="utf-8"))
+    helpers = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name != "main"}
+    main = next(node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "main")
+    commands: dict[str, list[str]] = {}
+    for node in main.body:
+        if not isinstance(node, ast.If):
+            continue
+        test = node.test
+        if not (isinstance(test, ast.Compare) and isinstance(test.comparators[0], ast.Constant)):
+            continue
+        modules = _imports(node)
+        # Module-level helpers called from the branch (run_scrape_sources) count too.
+        for call in ast.walk(node):
+            if isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id in helpers:
+                modules.extend(_imports(helpers[call.func.id]))
+        commands[test.comparators[0].value] = sorted(set(modules))
+    return commands
+
+
+def measure(modules: list[str]) -> tuple[float, set[str]]:
+    code = "; ".join(f"import {name}" for name in ["app.worker", *modules])
+    env = dict(os.environ)
+    # Import only; nothing connects, but app.config expects these to be set.
+    env.setdefault("SUPABASE_URL", "http://localhost")
+    env.setdefault("SUPABASE_KEY", "bench")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    loaded: set[str] = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        total_us += int(self_us)
+        loaded.add(name)
+    return total_us / 1000, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark worker CLI import time per command")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (median is reported)")
+    parser.add_argument("--commands", type=str, default="", help="Comma-separated commands (default all)")
+    parser.add_argument("--check", action="store_true", help="Fail if heavy libraries leak into light commands")
+    args = parser.parse_args()
+
+    commands = command_modules()
+    names = [c.strip() for c in args.commands.split(",") if c.strip()] or sorted(commands)
+    for name in names:
+        if name not in commands:
+            raise SystemExit(f"Unknown command: {name}")
+
+    failures: list[str] = []
+    rows = [("(import app.worker)", [])] + [(name, commands[name]) for name in names]
+    print(f"{'command':28} {'import ms':>10} {'modules':>8}  heavy")
+    for name, modules in rows:
+        timings = []
+        loaded: set[str] = set()
+        for _ in range(max(1, args.runs)):
+            ms, loaded = measure(modules)
+            timings.append(ms)
+        heavy = sorted(h for h in HEAVY if h in loaded)
+        print(f"{name:28} {statistics.median(timings):10.0f} {len(loaded):8d}  {','.join(heavy) or '-'}")
+        if heavy and (not modules or name in LIGHT_COMMANDS):
+            failures.append(f"{name} imports {','.join(heavy)}")
+
+    if args.check and failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,15 @@ import json
 import os
 import re
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 CHAPTER_RE = re.compile(r"^(chapter|kapitola|book|part)\s+([0-9ivxlcdm]+)(\b.*)?$", re.IGNORECASE)
 
+# PDFs are read in page ranges of this size; with --page-workers > 1 the ranges
+# are extracted in parallel processes and yielded back in page order.
+PAGES_PER_RANGE = 20
+
 
 def detect_format(path, forced_format):
     if forced_format:
@@ -15,17 +21,54 @@ def detect_format(path, forced_format):
     return ext.lstrip('.').lower()
 
 
-def read_text(path, fmt):
+def _open_pdf(path):
+    try:
+        import pdfplumber
+    except ImportError as exc:
+        raise RuntimeError('Missing dependency: pdfplumber') from exc
+    return pdfplumber.open(path)
+
+
+def extract_page_range(path, start, end):
+    parts = []
+    with _open_pdf(path) as pdf:
+        for page in pdf.pages[start:end]:
+            parts.append(page.extract_text() or '')
+            # Drop the parsed layout so memory stays bounded by one page.
+            page.close()
+    return "\n".join(parts)
+
+
+def iter_pdf_text(path, page_workers=1):
+    with _open_pdf(path) as pdf:
+        page_count = len(pdf.pages)
+    ranges = [(start, min(start + PAGES_PER_RANGE, page_count)) for start in range(0, page_count, PAGES_PER_RANGE)]
+    if page_workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield extract_page_range(path, start, end)
+        return
+    workers = min(page_workers, len(ranges))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep only a couple of ranges per worker in flight so finished text
+        # does not pile up ahead of the consumer.
+        pending = deque()
+        queued = iter(ranges)
+        for start, end in queued:
+            pending.append(executor.submit(extract_page_range, path, start, end))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            text = pending.popleft().result()
+            for start, end in queued:
+                pending.append(executor.submit(extract_page_range, path, start, end))
+                break
+            yield text
+
+
+def iter_text(path, fmt, page_workers=1):
     if fmt == 'pdf':
-        try:
-            import pdfplumber
-        except ImportError as exc:
-            raise RuntimeError('Missing dependency: pdfplumber') from exc
-        parts = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                parts.append(page.extract_text() or '')
-        return "\n".join(parts)
+        yield from iter_pdf_text(path, page_workers)
+        return
 
     if fmt == 'docx':
         try:
@@ -33,11 +76,20 @@ def read_text(path, fmt):
         except ImportError as exc:
             raise RuntimeError('Missing dependency: python-docx') from exc
         doc = Document(path)
-        return "\n".join([p.text for p in doc.paragraphs])
+        for paragraph in doc.paragraphs:
+            yield paragraph.text
+        return
 
     # Default: plain text
     with open(path, 'r', encoding='utf-8', errors='ignore') as handle:
-        return handle.read()
+        yield from handle
+
+
+def read_text(path, fmt, page_workers=1):
+    if fmt == 'txt':
+        with open(path, 'r', encoding='utf-8', errors='ignore') as handle:
+            return handle.read()
+    return "\n".join(iter_text(path, fmt, page_workers))
 
 
 def chunk_by_words(text, max_words):
@@ -56,40 +108,69 @@ def chunk_by_words(text, max_words):
     return chunks
 
 
-def split_by_chapters(text, default_title, max_words):
-    lines = [line.strip() for line in text.splitlines()]
-    sections = []
+def iter_sections(blocks, default_title, max_words=0):
+    # Same splitting as split_by_chapters, but over an iterable of text blocks
+    # (pages, paragraphs, lines); only the current section is held in memory.
+    # Until the first heading, text is cut every max_words words like
+    # chunk_by_words, so a book without headings does not become one section.
     current_title = default_title
     current_lines = []
+    current_words = 0
+    parts = 0
     saw_heading = False
 
     def flush(title):
-        nonlocal current_lines
-        body = "\n".join([line for line in current_lines if line]).strip()
+        nonlocal current_lines, current_words
+        body = "\n".join(current_lines).strip()
+        current_lines = []
+        current_words = 0
         if body:
-            sections.append({
+            return {
                 'title': title,
                 'text': body
-            })
-        current_lines = []
-
-    for line in lines:
-        if not line:
-            continue
-        if CHAPTER_RE.match(line):
-            if current_lines:
-                flush('Intro' if not saw_heading else current_title)
-            current_title = line
-            saw_heading = True
-            continue
-        current_lines.append(line)
+            }
+        return None
+
+    def untitled():
+        return f'Part {parts + 1}' if parts else 'Intro'
+
+    for block in blocks:
+        for line in block.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if CHAPTER_RE.match(line):
+                if current_lines:
+                    section = flush(current_title if saw_heading else untitled())
+                    if section:
+                        yield section
+                current_title = line
+                saw_heading = True
+                continue
+            current_lines.append(line)
+            if saw_heading or max_words <= 0:
+                continue
+            current_words += len(line.split())
+            while current_words >= max_words:
+                words = " ".join(current_lines).split()
+                current_lines = [" ".join(words[max_words:])] if len(words) > max_words else []
+                current_words = len(words) - max_words
+                parts += 1
+                yield {
+                    'title': f'Part {parts}',
+                    'text': " ".join(words[:max_words])
+                }
 
     if current_lines:
-        flush(current_title)
+        section = flush(current_title if saw_heading or not parts else untitled())
+        if section:
+            yield section
+
 
+def split_by_chapters(text, default_title, max_words):
+    sections = list(iter_sections([text], default_title, max_words))
     if not sections:
         return chunk_by_words(text, max_words)
-
     return sections
 
 
@@ -99,6 +180,7 @@ def main():
     parser.add_argument('--format', default='', help='Override file format: pdf, docx, txt')
     parser.add_argument('--title', default='', help='Override document title')
     parser.add_argument('--max-words', type=int, default=2500, help='Chunk size when no headings found')
+    parser.add_argument('--page-workers', type=int, default=1, help='Processes used to extract PDF page ranges')
     args = parser.parse_args()
 
     input_path = args.input
@@ -109,14 +191,12 @@ def main():
     if fmt not in {'pdf', 'docx', 'txt'}:
         fmt = 'txt'
 
-    text = read_text(input_path, fmt)
-    if not text or not text.strip():
-        raise RuntimeError('No text extracted from file')
-
     base_name = os.path.splitext(os.path.basename(input_path))[0]
     doc_title = args.title.strip() or base_name or 'Manual Upload'
 
-    sections = split_by_chapters(text, doc_title, args.max_words)
+    sections = list(iter_sections(iter_text(input_path, fmt, args.page_workers), doc_title, args.max_words))
+    if not sections:
+        raise RuntimeError('No text extracted from file')
 
     payload = {
         'document_title': doc_title,